@@ -6,12 +6,37 @@ import sys
 # Change current working directory to the directory of this script.
 os.chdir(os.path.dirname(os.path.realpath(__file__)))
 
-from pylims.shell import Shell
+from pylims import daemon
 
 
 def main():
-    """Starts the application."""
+    """Starts the application. The serve command starts a daemon, the
+    serve_http command starts the HTTP/JSON API and the migrate command
+    upgrades the database schema and enables its write-ahead log; other commands are forwarded to a running
+    daemon, or run in this process if no daemon is running."""
     args = sys.argv[1:]
+    if args == ['migrate']:
+        from pylims import config, migrate
+        count = migrate.migrate_database(config.database['name'])
+        print('Applied %d migrations.' % count)
+        mode = migrate.enable_wal(config.database['name'])
+        print('Journal mode: %s' % mode)
+        sys.exit(0)
+    if args == ['serve']:
+        daemon.serve()
+        sys.exit(0)
+    if args == ['serve_http']:
+        from pylims import api
+        api.serve()
+        sys.exit(0)
+
+    reply = daemon.forward(args)
+    if reply is not None:
+        output, code = reply
+        sys.stdout.write(output)
+        sys.exit(code)
+
+    from pylims.shell import Shell
     app = Shell()
     code = app.main(args)
     sys.exit(code)
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""Benchmarks the HTTP/JSON API under concurrent load.
+
+Runs the API on a copy of misc/template_db.sqlite3 and sends record_receipt
+requests followed by list_samples_in requests from concurrent clients.
+
+    python3 misc/bench_api.py [--workers 8] [--clients 16] [--requests 2000]
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+from concurrent.futures import ThreadPoolExecutor
+
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, base_dir)
+
+from pylims import api  # noqa: E402
+
+
+def post(url, params):
+    """Sends a request and returns its JSON data."""
+    data = json.dumps(params).encode('utf-8')
+    headers = {'Content-Type': 'application/json'}
+    request = urllib.request.Request(url, data, headers)
+    with urllib.request.urlopen(request) as fp:
+        return json.loads(fp.read())
+
+
+def run(label, func, count, clients):
+    """Runs func for numbers 1 to count from concurrent clients and prints
+    the throughput."""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(clients) as executor:
+        results = list(executor.map(func, range(1, count + 1)))
+    elapsed = time.perf_counter() - start
+    failed = sum(1 for x in results if not x['success'])
+    print('%-16s %6d requests %8.1f req/s %6d failed'
+          % (label, count, count / elapsed, failed))
+
+
+def main():
+    """Starts the API and runs the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    name = os.path.join(directory, 'bench.sqlite3')
+    shutil.copy(os.path.join(base_dir, 'misc', 'template_db.sqlite3'), name)
+    database = dict(engine='sqlite3', name=name, read_cache_size=10000)
+    server = api.Server(('127.0.0.1', 0), args.workers, database)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    url = 'http://127.0.0.1:%d/' % server.server_address[1]
+    print('workers=%d clients=%d' % (args.workers, args.clients))
+    try:
+        def record_receipt(number):
+            return post(url + 'record_receipt', dict(
+                customer_sample_name='customer1-sample%d' % number,
+                tube_barcode='NT%05d' % number))
+
+        def list_samples_in(number):
+            return post(url + 'list_samples_in', dict(
+                container_barcode='NT%05d' % number))
+
+        run('record_receipt', record_receipt, args.requests, args.clients)
+        run('list_samples_in', list_samples_in, args.requests, args.clients)
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""Benchmarks export_samples throughput and memory.
+
+Fills a copy of misc/template_db.sqlite3 with samples in sample tubes, half
+of them also in plate wells, and exports them to CSV and JSONL. Prints rows
+per second and, with --memory, the peak memory of Python allocations during
+each export, which stays flat as the number of samples grows. Tracing memory
+slows the export.
+
+    python3 misc/bench_export.py [--samples 1000000] [--memory]
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, base_dir)
+
+from pylims.dba import DataSet  # noqa: E402
+from pylims.process import Process  # noqa: E402
+
+
+def fill(name, count):
+    """Inserts count samples with tubes, and wells for every other one."""
+    conn = sqlite3.connect(name)
+    conn.executemany(
+        "insert into sample (sample_id, customer, name, concentration) "
+        "values (?, ?, ?, ?)",
+        ((i, 'customer%d' % (i % 10), 'sample%d' % i, 50 + i % 151)
+         for i in range(1, count + 1)))
+    conn.executemany(
+        "insert into sample_tube (barcode, sample_id) values (?, ?)",
+        (('NT%09d' % i, i) for i in range(1, count + 1)))
+    conn.executemany(
+        "insert into well (plate_barcode, label, sample_id, ordinal) "
+        "values (?, ?, ?, ?)",
+        (('DN%07d' % (i // 96), 'ABCDEFGH'[i % 96 // 12] + str(i % 12 + 1), i,
+          i % 96) for i in range(2, count + 1, 2)))
+    conn.commit()
+    conn.close()
+
+
+def main():
+    """Fills a database and runs the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--samples', type=int, default=1000000)
+    parser.add_argument('--memory', action='store_true')
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    name = os.path.join(directory, 'bench.sqlite3')
+    shutil.copy(os.path.join(base_dir, 'misc', 'template_db.sqlite3'), name)
+    try:
+        fill(name, args.samples)
+        process = Process(DataSet(dict(engine='sqlite3', name=name)))
+        print('samples=%d' % args.samples)
+        for file_format in ('csv', 'jsonl'):
+            filename = os.path.join(directory, 'export.' + file_format)
+            if args.memory:
+                tracemalloc.start()
+            start = time.perf_counter()
+            response = process.export_samples(file_format, filename)
+            elapsed = time.perf_counter() - start
+            count = response.get_data()['count']
+            line = '%-6s %9d rows %10.1f rows/s' % (file_format, count,
+                                                   count / elapsed)
+            if args.memory:
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                line += ' %8.1f KiB peak' % (peak / 1024)
+            print(line)
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Benchmarks memory and construction throughput of lab objects.
+
+Builds Samples, each in a SampleTube, and Plates of 96 Wells holding them,
+as a large plate set or export loads them. Prints objects per second and
+the memory of Python allocations per 1M Samples with their tubes and
+wells. With --dict, subclasses without __slots__ are used, which have a
+__dict__ like the lab classes before they were slotted.
+
+    python3 misc/bench_lab.py [--samples 1000000] [--dict]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, base_dir)
+
+from pylims import lab  # noqa: E402
+
+
+def classes(use_dict):
+    """Returns the Sample, SampleTube, Plate and Well classes to build."""
+    types = lab.Sample, lab.SampleTube, lab.Plate, lab.Well
+    if use_dict:
+        types = tuple(type(x.__name__, (x,), {}) for x in types)
+    return types
+
+
+def build(count, types):
+    """Returns count Samples in SampleTubes and in Plates of 96 Wells."""
+    sample_class, tube_class, plate_class, well_class = types
+    layout = lab.GridLayout.get(lab.Plate.default_grid)
+    tubes = []
+    plates = []
+    plate = None
+    for i in range(count):
+        sample = sample_class('customer%d' % (i % 10), 'sample%d' % i, i + 1,
+                              None, 50 + i % 151)
+        tubes.append(tube_class('NT%09d' % (i + 1), sample))
+        ordinal = i % 96
+        if not ordinal:
+            plate = plate_class('DN%07d' % (i // 96 + 1))
+            plates.append(plate)
+        plate.add_well(well_class(layout.get_label(ordinal), sample))
+    return tubes, plates
+
+
+def main():
+    """Builds the objects once for throughput and once for memory."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--samples', type=int, default=1000000)
+    parser.add_argument('--dict', action='store_true')
+    args = parser.parse_args()
+    types = classes(args.dict)
+
+    start = time.perf_counter()
+    result = build(args.samples, types)
+    elapsed = time.perf_counter() - start
+    del result
+    print('samples=%d slots=%s' % (args.samples, not args.dict))
+    print('construction %10.1f samples/s' % (args.samples / elapsed))
+
+    tracemalloc.start()
+    result = build(args.samples, types)
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    print('memory       %10.1f MiB per 1M samples'
+          % (current / 1024 / 1024 * 1000000 / args.samples))
+
+
+if __name__ == '__main__':
+    main()
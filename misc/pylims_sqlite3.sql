@@ -35,7 +35,27 @@ create table well (
     plate_barcode text not null,
     label text not null, -- A1, A2, ..., H12
     sample_id integer,
+    ordinal integer, -- position on the plate, rows and then columns from 0
     unique (plate_barcode, label),
     foreign key(plate_barcode) references plate(barcode)
     foreign key(sample_id) references sample(sample_id)
 );
+
+-- Containers by sample, for finding where a sample is.
+create index sample_tube_sample_id on sample_tube (sample_id);
+create index lab_tube_sample_id on lab_tube (sample_id);
+create index well_sample_id on well (sample_id);
+
+-- Tubes by the tube their sample moved to, for transfer lineage.
+create index sample_tube_moved_to on sample_tube (moved_to);
+create index lab_tube_moved_to on lab_tube (moved_to);
+
+-- Samples by customer, for pages of a customer's samples by sample_id.
+create index sample_customer on sample (customer);
+
+-- Wells of a plate in order of position, covering plate reads.
+create index well_plate_ordinal on well (plate_barcode, ordinal, label,
+                                         sample_id);
+
+-- Schema version; see pylims/migrate.py.
+pragma user_version = 5;
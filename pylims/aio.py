@@ -0,0 +1,231 @@
+"""Asynchronous Interface."""
+import asyncio
+import logging
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+
+from . import config
+from .dba import DataSet
+from .process import Methods, Process, Response
+from .session import Session
+
+LOG = logging.getLogger(__name__)
+
+
+class Service:
+    """Runs Process methods for asyncio callers.
+
+    Reads run concurrently on a pool of reader threads, each with its own
+    Process and connection. Writes are queued to a single writer task, which
+    runs them one at a time on the writer thread and its connection, so
+    writers never contend for the SQLite write lock.
+
+    With group_size above one, writes are grouped into one transaction that
+    commits after group_size writes or group_delay seconds, whichever comes
+    first, so that many writes share one commit. Each write's Response is
+    returned only after its group commits. If the commit fails, every write
+    of the group returns Unexpected Error.
+
+    Usage:
+        async with Service() as service:
+            response = await service.record_receipt('c1-s1', 'NT00001')
+    """
+
+    # Methods that do not write; all other Methods are writes.
+    read_methods = ('list_samples_in', 'where_is', 'lineage',
+                    'list_samples_by_customer', 'export_samples')
+
+    def __init__(self, database=None, readers=4, group_size=1,
+                 group_delay=0.01):
+        """Initialises Service using the database config, the number of
+        reader threads, and the maximum size and delay of commit groups."""
+        if database is None:
+            database = config.database
+        self._database = database
+        self._reader_count = readers
+        self._group_size = group_size
+        self._group_delay = group_delay
+        self._local = threading.local()  # Process of each thread
+        self._readers = None
+        self._writer = None
+        self._queue = None
+        self._writer_task = None
+
+    async def __aenter__(self):
+        """Starts Service."""
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        """Stops Service."""
+        await self.stop()
+        return False
+
+    def __getattr__(self, name):
+        """Returns a coroutine function for a method of Methods."""
+        if name.startswith('_') or not hasattr(Methods, name):
+            raise AttributeError(name)
+
+        async def method(*args):
+            return await self.call(name, *args)
+        return method
+
+    async def start(self):
+        """Starts the reader threads and the writer task."""
+        self._readers = ThreadPoolExecutor(self._reader_count,
+                                           thread_name_prefix='pylims-reader')
+        self._writer = ThreadPoolExecutor(1, thread_name_prefix='pylims-writer',
+                                          initializer=self._init_writer)
+        self._queue = asyncio.Queue()
+        self._writer_task = asyncio.ensure_future(self._write())
+
+    async def stop(self):
+        """Completes queued writes, and stops the writer task and the reader
+        threads after closing their connections."""
+        await self._queue.put(None)
+        await self._writer_task
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._writer, self._close, None)
+        # Each close waits at the barrier, so every reader thread runs one.
+        barrier = threading.Barrier(self._reader_count)
+        await asyncio.gather(*[
+            loop.run_in_executor(self._readers, self._close, barrier)
+            for _ in range(self._reader_count)])
+        self._readers.shutdown()
+        self._writer.shutdown()
+
+    async def call(self, name, *args):
+        """Runs the Process method name with args, and returns its result."""
+        if not hasattr(Methods, name):
+            raise AttributeError(name)
+        if name in self.read_methods:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._readers, self._run,
+                                              name, args)
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((future, name, args))
+        return await future
+
+    async def _write(self):
+        """Runs queued writes one at a time until None is queued."""
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await self._queue.get()
+            if item is None:
+                break
+            if self._group_size > 1:
+                if not await self._write_group(item):
+                    break
+                continue
+            future, name, args = item
+            try:
+                result = await loop.run_in_executor(self._writer, self._run,
+                                                    name, args)
+            except Exception as error:
+                self._resolve(future, None, error)
+            else:
+                self._resolve(future, result, None)
+
+    async def _write_group(self, item):
+        """Runs item and the writes queued within group_size and
+        group_delay in one unit of work, then commits it and resolves their
+        futures. Returns False if None was queued."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self._group_delay
+        running = True
+        results = []  # (future, result, error)
+        await loop.run_in_executor(self._writer, self._begin_group)
+        while True:
+            future, name, args = item
+            try:
+                result = await loop.run_in_executor(self._writer, self._run,
+                                                    name, args)
+            except Exception as error:
+                results.append((future, None, error))
+            else:
+                results.append((future, result, None))
+            timeout = deadline - loop.time()
+            if len(results) >= self._group_size or timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            if item is None:
+                running = False
+                break
+        try:
+            await loop.run_in_executor(self._writer, self._commit_group)
+        except Exception:
+            LOG.exception('Unexpected error in group commit.')
+            await loop.run_in_executor(self._writer, self._rollback_group)
+            results = [(future, self._unexpected_error(result), error)
+                       for future, result, error in results]
+        for future, result, error in results:
+            self._resolve(future, result, error)
+        return running
+
+    @staticmethod
+    def _unexpected_error(result):
+        """Returns an Unexpected Error Response in place of result."""
+        if isinstance(result, Response):
+            return Response(Response.UNEXPECTED_ERROR, result.get_data())
+        if isinstance(result, list):  # bulk methods
+            return [Response(Response.UNEXPECTED_ERROR, x.get_data())
+                    for x in result]
+        return result
+
+    @staticmethod
+    def _resolve(future, result, error):
+        """Sets result or error on future unless its caller cancelled."""
+        if future.cancelled():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def _init_writer(self):
+        """Marks the writer thread."""
+        self._local.writer = True
+
+    def _begin_group(self):
+        """Begins the unit of work of a group on the writer thread."""
+        self.get_process().get_dataset().begin()
+
+    def _commit_group(self):
+        """Commits the unit of work of a group on the writer thread. The
+        identity map is emptied, since other processes may write before the
+        next group."""
+        session = self.get_process().get_dataset()
+        session.commit()
+        session.clear()
+
+    def _rollback_group(self):
+        """Rollbacks the unit of work of a group on the writer thread."""
+        self.get_process().get_dataset().rollback()
+
+    def get_process(self):
+        """Returns Process of the current thread."""
+        process = getattr(self._local, 'process', None)
+        if process is None:
+            dataset = DataSet(self._database)
+            if self._group_size > 1 and getattr(self._local, 'writer', False):
+                dataset = Session(dataset)  # unit of work for groups
+            process = Process(dataset)
+            self._local.process = process
+        return process
+
+    def _run(self, name, args):
+        """Runs the Process method name with args in the current thread."""
+        return getattr(self.get_process(), name)(*args)
+
+    def _close(self, barrier):
+        """Closes the connection of the current thread."""
+        if barrier is not None:
+            barrier.wait()
+        process = getattr(self._local, 'process', None)
+        if process is not None:
+            process.get_dataset().close_connection()
+            self._local.process = None
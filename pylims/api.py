@@ -0,0 +1,227 @@
+"""HTTP/JSON Interface."""
+import json
+import logging
+import queue
+import threading
+
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from . import config
+from .dba import DataSet
+from .lab import Sample, Tube, SampleTube, Plate, Well
+from .process import Process, Response
+from .shell import Shell
+
+LOG = logging.getLogger(__name__)
+
+UNKNOWN_COMMAND = 'Unknown command'
+INVALID_REQUEST = 'Invalid request'
+UNSUPPORTED_MEDIA_TYPE = 'Unsupported media type'
+
+# Commands that write files on the server, which are not served.
+local_commands = ('export_samples',)
+commands = tuple(x for x in Shell.command_parameters
+                 if x not in local_commands)
+
+
+def to_json_data(value):
+    """Returns value with Samples, Tubes, Plates and Wells converted to
+    dictionaries, so that it can be serialized to JSON."""
+    if isinstance(value, Sample):
+        return dict(customer=value.get_customer(), name=value.get_name(),
+                    sample_id=value.get_sample_id(), tag=value.get_tag(),
+                    concentration=value.get_concentration())
+    if isinstance(value, Tube):
+        kind = 'sample_tube' if isinstance(value, SampleTube) else 'lab_tube'
+        return dict(kind=kind, barcode=value.get_barcode(),
+                    moved_to=value.get_moved_to(),
+                    sample=to_json_data(value.get_sample()))
+    if isinstance(value, Plate):
+        return dict(barcode=value.get_barcode(), grid=value.get_grid(),
+                    wells=[to_json_data(x) for x in value.get_wells()])
+    if isinstance(value, Well):
+        return dict(label=value.get_label(),
+                    sample=to_json_data(value.get_sample()))
+    if isinstance(value, dict):
+        return dict((k, to_json_data(v)) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return [to_json_data(x) for x in value]
+    return value
+
+
+def response_to_json_data(response):
+    """Returns status, success and data of Response as a dictionary."""
+    return dict(status=response.get_status(), success=response.is_success(),
+                data=to_json_data(response.get_data()))
+
+
+class Handler(BaseHTTPRequestHandler):
+    """Maps Shell commands to endpoints.
+
+    GET / lists the commands and their parameters. POST /<command> runs a
+    command with the parameters given as a JSON object; the options of a
+    command are optional parameters. Commands that read a file in Shell take
+    the rows of the file as a list of lists in the rows parameter instead,
+    and return a list of results. Requests must have a JSON Content-Type,
+    so that browsers do not send them cross-site without a preflight.
+    Commands that write files on the server are not served.
+    """
+
+    def do_GET(self):
+        """Lists the commands and their parameters."""
+        if self.path.rstrip('/') != '':
+            return self._send(404, dict(status=UNKNOWN_COMMAND))
+        self._send(200, dict((command, self._parameters(command))
+                             for command in commands))
+
+    def do_POST(self):
+        """Runs a command and sends its results."""
+        command = self.path.strip('/')
+        if command not in commands:
+            return self._send(404, dict(status=UNKNOWN_COMMAND,
+                                        command=command))
+        content_type = self.headers.get('Content-Type', '')
+        if content_type.split(';')[0].strip().lower() != 'application/json':
+            return self._send(415, dict(status=UNSUPPORTED_MEDIA_TYPE))
+        try:
+            args, options = self._read_args(command)
+        except (ValueError, TypeError, KeyError):
+            return self._send(400, dict(status=INVALID_REQUEST,
+                                        parameters=self._parameters(command)))
+
+        try:
+            method = getattr(self.server.get_process(), command)
+            result = method(*args, **options)
+        except Exception:
+            LOG.exception('Unexpected error in %s', command)
+            return self._send(500, dict(status=Response.UNEXPECTED_ERROR))
+        if command in Shell.file_commands:
+            self._send(200, [response_to_json_data(x) for x in result])
+        else:
+            self._send(200, response_to_json_data(result))
+
+    def _read_args(self, command):
+        """Returns the arguments and a dictionary of the options of command
+        from the JSON body as strings, as Shell passes them. Rows are padded
+        or truncated to the columns of the file, as Shell reads them."""
+        length = int(self.headers.get('Content-Length', 0))
+        params = json.loads(self.rfile.read(length) or b'{}')
+        required = Shell.command_parameters[command]
+        if command in Shell.file_commands:
+            required = required[:-1] + ('rows',)
+        args = [params[x] for x in required]
+        options = dict((x, str(params[x]))
+                       for x in Shell.command_options.get(command, ())
+                       if x in params)
+        if command not in Shell.file_commands:
+            return [str(x) for x in args], options
+        *args, rows = args
+        columns = len(Shell.file_commands[command])
+        if not isinstance(rows, list):
+            raise TypeError('rows must be a list')
+        table = []
+        for row in rows:
+            if not isinstance(row, list):
+                raise TypeError('row must be a list')
+            row = [str(x) for x in row] + [''] * columns
+            table.append(tuple(row[:columns]))
+        return [str(x) for x in args] + [table], options
+
+    def _parameters(self, command):
+        """Returns the names of the parameters of command, followed by its
+        options."""
+        params = Shell.command_parameters[command]
+        if command in Shell.file_commands:
+            params = params[:-1] + ('rows',)
+        return params + Shell.command_options.get(command, ())
+
+    def _send(self, code, data):
+        """Sends data as JSON."""
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """Logs requests at debug level instead of writing to stderr."""
+        LOG.debug(format, *args)
+
+
+class Server(HTTPServer):
+    """Serves requests with a fixed pool of worker threads. Each worker has
+    its own Process and DataSet, since a SQLite connection is used only by
+    the thread that created it."""
+
+    def __init__(self, address=None, workers=None, database=None):
+        """Initialises Server on address with the number of worker threads
+        using the database config."""
+        if address is None:
+            address = config.http_address
+        if workers is None:
+            workers = config.http_workers
+        if database is None:
+            database = config.database
+        self._database = database
+        self._local = threading.local()
+        self._requests = queue.Queue()
+        super().__init__(address, Handler)
+        self._workers = [threading.Thread(target=self._work, daemon=True)
+                         for _ in range(workers)]
+        for worker in self._workers:
+            worker.start()
+
+    def get_process(self):
+        """Returns Process of the current worker thread."""
+        process = getattr(self._local, 'process', None)
+        if process is None:
+            process = Process(DataSet(self._database))
+            self._local.process = process
+        return process
+
+    def process_request(self, request, client_address):
+        """Queues request for the workers."""
+        self._requests.put((request, client_address))
+
+    def _work(self):
+        """Handles queued requests until None is queued."""
+        while True:
+            item = self._requests.get()
+            if item is None:
+                break
+            request, client_address = item
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+        process = getattr(self._local, 'process', None)
+        if process is not None:
+            process.get_dataset().close_connection()
+
+    def handle_error(self, request, client_address):
+        """Logs unexpected errors."""
+        LOG.exception('Unexpected error in request from %s', client_address)
+
+    def server_close(self):
+        """Stops the workers and closes the socket."""
+        for _ in self._workers:
+            self._requests.put(None)
+        for worker in self._workers:
+            worker.join()
+        super().server_close()
+
+
+def serve(address=None, workers=None):
+    """Serves requests until interrupted."""
+    format = "%(asctime)s %(levelname)s %(name)s:%(lineno)s %(message)s"
+    logging.basicConfig(filename=config.logfile, format=format)
+    server = Server(address, workers)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
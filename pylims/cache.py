@@ -0,0 +1,67 @@
+"""Caching."""
+
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Bounded mapping that evicts the least recently used entries. Counts
+    hits, misses and evictions to help choosing the size."""
+
+    def __init__(self, maxsize):
+        """Initialises LRUCache with the maximum number of entries. A cache
+        with maxsize zero keeps nothing."""
+        self._maxsize = maxsize
+        self._entries = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def __len__(self):
+        """Returns the number of entries."""
+        return len(self._entries)
+
+    def __contains__(self, key):
+        """Returns True if key has an entry. It does not count as a hit."""
+        return key in self._entries
+
+    def get(self, key):
+        """Returns the value of key and marks it as recently used, or None if
+        key has no entry."""
+        try:
+            value = self._entries[key]
+        except KeyError:
+            self._misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self._hits += 1
+        return value
+
+    def put(self, key, value):
+        """Sets the value of key, evicting least recently used entries when
+        the cache is full."""
+        if self._maxsize <= 0:
+            return
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._maxsize:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def invalidate(self, key):
+        """Removes the entry of key if there is one."""
+        self._entries.pop(key, None)
+
+    def clear(self):
+        """Removes all entries. Counters are kept."""
+        self._entries.clear()
+
+    def get_maxsize(self):
+        """Returns the maximum number of entries."""
+        return self._maxsize
+
+    def get_stats(self):
+        """Returns a dictionary of hits, misses, evictions, size and
+        maxsize."""
+        return dict(hits=self._hits, misses=self._misses,
+                    evictions=self._evictions, size=len(self._entries),
+                    maxsize=self._maxsize)
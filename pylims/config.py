@@ -3,19 +3,53 @@ import os
 
 base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
+# SQLite tuning profiles; PRAGMAs applied on connect by the profile named in
+# database config, or temporarily with DataSet.use_profile(name).
+profiles = {
+    # synchronous=normal syncs only at checkpoints in write-ahead log mode,
+    # which is durable except on power loss. The journal mode persists in
+    # the database file, so it is set once by "lims.py migrate" rather than
+    # on every connect.
+    'production': {
+        'synchronous': 'normal',
+        'cache_size': -65536,  # KiB, so 64 MiB of pages
+        'mmap_size': 268435456,  # 256 MiB
+        'busy_timeout': 5000,  # milliseconds
+    },
+    # Large imports that can be repeated if the machine crashes.
+    'bulk_import': {
+        'synchronous': 'off',
+        'cache_size': -262144,  # 256 MiB
+    },
+}
+
 # Production database with schema; initially copy of misc/template_db.sqlite3
+# The read_cache_size is the number of Sample, Tube and Plate rows kept in the read
+# cache of each connection; zero disables the cache.
 database = {
     'engine': 'sqlite3',
-    'name': os.path.join(base_dir, 'db.sqlite3')
+    'name': os.path.join(base_dir, 'db.sqlite3'),
+    'read_cache_size': 10000,
+    'profile': 'production'
 }
 
 # Unit test database with schema; initially copy of misc/template_db.sqlite3
 # Pylims unit tests reset the tables and sequences but they don't execute DDL.
+# PYLIMS_TEST_ENGINE=memory runs the tests of Process and Shell in memory.
 test_database = {
-    'engine': 'sqlite3',
+    'engine': os.environ.get('PYLIMS_TEST_ENGINE', 'sqlite3'),
     'name': os.path.join(base_dir, 'test_db.sqlite3')
 }
 
+# Unix socket of the daemon started by "lims.py serve".
+socket_file = os.path.join(base_dir, 'pylims.sock')
+daemon_timeout = 600  # seconds a forwarded command may take
+
+# Address and number of worker threads of the HTTP/JSON API started by
+# "lims.py serve_http".
+http_address = ('127.0.0.1', 8080)
+http_workers = 8
+
 # Log file for unexpected errors; typically errors during transactions.
 logfile = os.path.join(base_dir, 'pylims.log')
 
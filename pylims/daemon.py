@@ -0,0 +1,148 @@
+"""Daemon mode."""
+import contextlib
+import io
+import json
+import logging
+import os
+import signal
+import socket
+import socketserver
+
+from . import config
+
+# Shell, and with it Process and DataSet, is imported by the server only, so
+# that forwarding a command does not pay for importing them.
+
+LOG = logging.getLogger(__name__)
+
+# Output of a forwarded command without a valid reply, and its exit code,
+# Shell.EXIT_FAILURE.
+NO_REPLY_TEMP = """No reply from the daemon: %s
+The command may or may not have been completed. Please check before running
+it again.
+"""
+NO_REPLY_EXIT = 1
+
+
+class Handler(socketserver.StreamRequestHandler):
+    """Runs one command sent by a client. The request is a JSON line with
+    the command-line arguments, and the reply is a JSON line with the output
+    and the exit code of Shell."""
+
+    def handle(self):
+        """Reads arguments, runs Shell and writes its output and exit code."""
+        line = self.rfile.readline()
+        if not line:  # connection check of is_running
+            return
+        args = json.loads(line.decode('utf-8'))['args']
+        shell = self.server.get_shell()
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            try:
+                code = shell.main(args)
+            except Exception:
+                LOG.exception('Unexpected error in daemon: %s', args)
+                code = shell.EXIT_FAILURE
+        reply = dict(output=output.getvalue(), code=code)
+        self.wfile.write(json.dumps(reply).encode('utf-8') + b'\n')
+
+
+class Server(socketserver.UnixStreamServer):
+    """Serves commands over a Unix socket using one warm Shell, so its
+    Process keeps the database connection and the read cache between
+    commands. Requests are handled one at a time."""
+
+    def __init__(self, socket_file=None, shell=None):
+        """Initialises Server on socket_file using the given Shell. A stale
+        socket file left by a stopped daemon is removed."""
+        if socket_file is None:
+            socket_file = config.socket_file
+        if shell is None:
+            from .shell import Shell
+            shell = Shell()  # default
+        self._socket_file = socket_file
+        self._shell = shell
+        if os.path.exists(socket_file) and not is_running(socket_file):
+            os.remove(socket_file)
+        super().__init__(socket_file, Handler)
+
+    def get_shell(self):
+        """Returns Shell of this Server."""
+        return self._shell
+
+    def server_close(self):
+        """Closes the socket and removes the socket file."""
+        super().server_close()
+        with contextlib.suppress(OSError):
+            os.remove(self._socket_file)
+
+
+def is_running(socket_file=None):
+    """Returns True if a daemon accepts connections on socket_file."""
+    if socket_file is None:
+        socket_file = config.socket_file
+    try:
+        with _connect(socket_file):
+            return True
+    except OSError:
+        return False
+
+
+def serve(socket_file=None, shell=None):
+    """Serves commands until interrupted or terminated."""
+    server = Server(socket_file, shell)
+    signal.signal(signal.SIGTERM, _terminate)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def _terminate(signum, frame):
+    """Stops serve on SIGTERM as on an interrupt."""
+    raise KeyboardInterrupt
+
+
+def forward(args, socket_file=None, timeout=None):
+    """Sends command-line arguments to a running daemon and returns its
+    output and exit code, or None if no daemon is running. If the daemon
+    closes the connection without a valid reply, or does not reply within
+    timeout seconds, the output reports it with a failure exit code; the
+    command is not run again locally, since it may have been completed."""
+    if socket_file is None:
+        socket_file = config.socket_file
+    if timeout is None:
+        timeout = config.daemon_timeout
+    try:
+        conn = _connect(socket_file)
+    except OSError:
+        return None
+    with conn:
+        conn.settimeout(timeout)
+        request = json.dumps(dict(args=list(args)))
+        try:
+            conn.sendall(request.encode('utf-8') + b'\n')
+            with conn.makefile('rb') as fp:
+                line = fp.readline()
+        except socket.timeout:
+            return NO_REPLY_TEMP % 'timed out', NO_REPLY_EXIT
+        except OSError as error:
+            return NO_REPLY_TEMP % error, NO_REPLY_EXIT
+    try:
+        reply = json.loads(line.decode('utf-8'))
+        return reply['output'], reply['code']
+    except (ValueError, TypeError, KeyError):
+        return NO_REPLY_TEMP % 'invalid reply', NO_REPLY_EXIT
+
+
+def _connect(socket_file):
+    """Returns a socket connected to socket_file."""
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        conn.connect(socket_file)
+    except OSError:
+        conn.close()
+        raise
+    return conn
@@ -1,14 +1,29 @@
 """Database Access."""
 
+import bisect
+import contextlib
 import logging
 import sqlite3
 
-from .config import database
+from .cache import LRUCache
+from .config import database, profiles
+from .migrate import get_version, migrations
 from .lab import Sample, SampleTube, LabTube, Plate, Well
 
 LOG = logging.getLogger(__name__)
 
 
+class SchemaError(Exception):
+    """Database schema older than the one the code uses."""
+
+    def __init__(self, version, latest):
+        """Initialises SchemaError with the database and latest versions."""
+        super().__init__("Database schema version %d is behind version %d; "
+                         "run: python3 lims.py migrate" % (version, latest))
+        self.version = version
+        self.latest = latest
+
+
 class DataSet:
     """Provides access to DataSource using delegation."""
 
@@ -19,6 +34,8 @@ class DataSet:
         engine = conf['engine']
         if engine == 'sqlite3':
             self._data_source = SQLite3DataSource(conf)
+        elif engine == 'memory':
+            self._data_source = MemoryDataSource(conf)
         else:
             self._data_source = None
             raise NotImplementedError("DataSource not implemented: %s" % engine)
@@ -55,6 +72,11 @@ class DataSource:
         """Finds Sample by customer and sample name used by customer."""
         raise NotImplementedError("Method not implemented.")
 
+    def find_samples_by_customer_sample_names(self, names):
+        """Finds Samples by (customer, sample name) pairs and returns a
+        dictionary of Samples by the pairs."""
+        raise NotImplementedError("Method not implemented.")
+
     def find_sample_tube_by_barcode(self, barcode):
         """Finds SampleTube by barcode."""
         raise NotImplementedError("Method not implemented.")
@@ -63,6 +85,37 @@ class DataSource:
         """Finds LabTube by barcode."""
         raise NotImplementedError("Method not implemented.")
 
+    def find_tube_by_barcode(self, barcode):
+        """Finds SampleTube or LabTube by barcode."""
+        raise NotImplementedError("Method not implemented.")
+
+    def find_tubes_by_barcodes(self, barcodes):
+        """Finds SampleTubes and LabTubes by barcodes and returns a
+        dictionary of Tubes by barcode."""
+        raise NotImplementedError("Method not implemented.")
+
+    def find_tube_by_kind_barcode(self, kind, barcode):
+        """Finds Tube by kind (sample_tube or lab_tube) and barcode."""
+        raise NotImplementedError("Method not implemented.")
+
+    def find_containers_by_sample_id(self, sample_id):
+        """Finds SampleTubes, LabTubes and Plates holding the Sample, and
+        returns them in a list. Plates have only the Wells of the Sample."""
+        raise NotImplementedError("Method not implemented.")
+
+    def find_lineage_by_barcode(self, barcode):
+        """Finds the Tubes that a Sample moved through before and after the
+        Tube with barcode, and returns them in order of transfers."""
+        raise NotImplementedError("Method not implemented.")
+
+    def iter_sample_locations(self, customer=None, tagged=None,
+                              min_concentration=None, max_concentration=None):
+        """Yields rows of sample_id, customer, name, tag, concentration,
+        container kind, container barcode and well label for every Sample
+        matching the filters, by sample_id; one row for each current
+        Container, or one with None for a Sample in none."""
+        raise NotImplementedError("Method not implemented.")
+
     def begin_transaction(self):
         """Begins database transaction."""
         raise NotImplementedError("Method not implemented.")
@@ -75,11 +128,34 @@ class DataSource:
         """Roll backs any changes since the last commit."""
         raise NotImplementedError("Method not implemented.")
 
+    def begin_savepoint(self, name):
+        """Begins a named savepoint within the current transaction."""
+        raise NotImplementedError("Method not implemented.")
+
+    def release_savepoint(self, name):
+        """Releases a named savepoint, keeping its changes in the current
+        transaction."""
+        raise NotImplementedError("Method not implemented.")
+
+    def rollback_savepoint(self, name):
+        """Roll backs any changes since a named savepoint and releases it."""
+        raise NotImplementedError("Method not implemented.")
+
+    def use_profile(self, name):
+        """Returns a context manager that applies a named tuning profile and
+        restores the previous settings on exit."""
+        raise NotImplementedError("Method not implemented.")
+
     def create_sample_tube(self, tube):
         """Creates Tube and its Sample in the database and
         assigns sample_id in Sample."""
         raise NotImplementedError("Method not implemented.")
 
+    def create_sample_tubes(self, tubes):
+        """Creates SampleTubes and their Samples in the database in bulk and
+        assigns sample_id in Samples."""
+        raise NotImplementedError("Method not implemented.")
+
     def create_lab_tube(self, tube):
         """Creates LabTube and its Sample in the database."""
         raise NotImplementedError("Method not implemented.")
@@ -88,19 +164,56 @@ class DataSource:
         """Transfers Sample from source Tube to destination Tube."""
         raise NotImplementedError("Method not implemented.")
 
+    def move_samples(self, pairs):
+        """Transfers Samples from source Tubes to destination Tubes in bulk,
+        given (source, destination) pairs."""
+        raise NotImplementedError("Method not implemented.")
+
     def find_plate_by_barcode(self, barcode):
         """Finds Plate by barcode."""
         raise NotImplementedError("Method not implemented.")
 
+    def find_plate_occupancy(self, barcode, label):
+        """Finds Plate by barcode without its Wells, and returns it with the
+        number of filled Wells and whether the Well with label is filled, or
+        None if there is no Plate."""
+        raise NotImplementedError("Method not implemented.")
+
     def find_sample_by_sample_id(self, sample_id):
         """Finds Sample by sample_id."""
         raise NotImplementedError("Method not implemented.")
 
+    def find_samples_by_customer(self, customer, after=None, limit=100,
+                                 order='name'):
+        """Finds up to limit Samples of customer in order of name or
+        sample_id, after the name or sample_id given as after."""
+        raise NotImplementedError("Method not implemented.")
+
+    def find_samples_by_sample_ids(self, sample_ids):
+        """Finds Samples by sample_ids and returns a dictionary of Samples by
+        sample_id."""
+        raise NotImplementedError("Method not implemented.")
+
     def update_sample_tag(self, tag):
         """Updates tag of Sample in the database and
         assigns tag in Sample."""
         raise NotImplementedError("Method not implemented.")
 
+    def update_sample_tags(self, pairs):
+        """Updates tags of Samples in the database in bulk, given (sample,
+        tag) pairs, and assigns tags in Samples."""
+        raise NotImplementedError("Method not implemented.")
+
+    def update_sample_concentration(self, sample, value):
+        """Updates concentration of Sample in the database and assigns
+        concentration in Sample."""
+        raise NotImplementedError("Method not implemented.")
+
+    def update_sample_concentrations(self, pairs):
+        """Updates concentrations of Samples in the database in bulk, given
+        (sample, value) pairs, and assigns concentrations in Samples."""
+        raise NotImplementedError("Method not implemented.")
+
     def create_plate(self, plate):
         """Creates Plate and its Wells in the database."""
         raise NotImplementedError("Method not implemented.")
@@ -109,20 +222,53 @@ class DataSource:
         """Creates Well in the database and adds it to Plate."""
         raise NotImplementedError("Method not implemented.")
 
+    def create_wells(self, plate, wells):
+        """Creates Wells in the database in bulk and adds them to Plate."""
+        raise NotImplementedError("Method not implemented.")
+
+
+# Location of a Sample in no Container, in iter_sample_locations.
+_no_location = [(None, None, None)]
+
+
+def _location_order(row):
+    """Returns the sort key of a row of sample_id, kind, barcode and label:
+    Tubes first and then Wells, by barcode and well row and column."""
+    sample_id, kind, barcode, label = row
+    if label is None:
+        return sample_id, kind == 'plate', barcode, 0, '', 0
+    return (sample_id, kind == 'plate', barcode) + Plate.well_label_key(label)
+
 
 class SQLite3DataSource(DataSource):
     """DataSource that uses a SQLite database."""
+    chunk_size = 450  # Values per IN (...) list; below SQLite variable limit.
+    lineage_limit = 1000  # Maximum transfers followed in each direction.
 
     def __init__(self, conf):
-        """Initialises DataSource using database config."""
+        """Initialises DataSource using database config. The optional
+        read_cache_size in config is the number of Sample, Tube and Plate
+        rows to keep in the read cache."""
         self._conf = conf
         self._conn = None
+        self._cache = LRUCache(conf.get('read_cache_size', 0))
+        self._data_version = None  # Last seen PRAGMA data_version
         self.start_connection()
 
     def start_connection(self):
-        """Starts database connection."""
+        """Starts database connection, and applies the tuning profile named
+        by profile in config. Raises SchemaError if the database has not
+        been migrated to the latest schema version."""
         if self._conn is None:
-            self._conn = sqlite3.connect(self._conf['name'])
+            conn = sqlite3.connect(self._conf['name'])
+            version = get_version(conn)
+            if version < len(migrations):
+                conn.close()
+                raise SchemaError(version, len(migrations))
+            self._conn = conn
+            profile = self._conf.get('profile')
+            if profile is not None:
+                self._set_pragmas(profiles[profile])
 
     def close_connection(self):
         """Closes database connection."""
@@ -137,6 +283,103 @@ class SQLite3DataSource(DataSource):
         """Returns database connection."""
         return self._conn
 
+    def get_cache(self):
+        """Returns the read cache of Sample, Tube and Plate rows."""
+        return self._cache
+
+    def get_cache_stats(self):
+        """Returns a dictionary of read cache hits, misses, evictions, size
+        and maxsize."""
+        return self._cache.get_stats()
+
+    # Read cache entries are rows, not instances, so that callers can change
+    # the instances they receive. Tube and Plate rows refer to Sample rows by
+    # sample_id, so a Sample update invalidates only its own entry.
+
+    def _sync_cache(self):
+        """Empties the read cache if another connection, possibly in another
+        process, committed since the last check. Called at the start of
+        every operation that reads the cache."""
+        if self._cache.get_maxsize() <= 0:
+            return
+        # data_version changes only on commits of other connections.
+        cursor = self._conn.execute("pragma data_version")
+        try:
+            data_version, = cursor.fetchone()
+        finally:
+            cursor.close()
+        if data_version != self._data_version:
+            self._cache.clear()
+            self._data_version = data_version
+
+    @staticmethod
+    def _sample_key(sample_id):
+        """Returns the read cache key of Sample, or None if sample_id is not a
+        number."""
+        sample_id = Sample.parse_sample_id(sample_id)
+        if sample_id is not None:
+            return 'sample', sample_id
+
+    def _cache_sample_row(self, row):
+        """Caches a row of customer, name, sample_id and tag."""
+        if row[2] is not None:
+            self._cache.put(('sample', row[2]), tuple(row))
+
+    def _cached_sample_row(self, sample_id):
+        """Returns the cached row of Sample, or None."""
+        key = self._sample_key(sample_id)
+        if key is not None:
+            return self._cache.get(key)
+
+    def _cache_tube_row(self, row):
+        """Caches a Tube and its Sample from a row of kind, barcode,
+        moved_to, customer, name, sample_id and tag."""
+        kind, barcode, moved_to, customer, name, sample_id, tag = row
+        self._cache.put(('tube', barcode), (kind, barcode, moved_to, sample_id))
+        self._cache_sample_row((customer, name, sample_id, tag))
+
+    def _cached_tube_row(self, barcode):
+        """Returns the cached row of Tube joined with its Sample, or None if
+        the Tube or its Sample is not cached."""
+        entry = self._cache.get(('tube', barcode))
+        if entry is None:
+            return None
+        kind, barcode, moved_to, sample_id = entry
+        if sample_id is None:
+            return kind, barcode, moved_to, None, None, None, None
+        row = self._cached_sample_row(sample_id)
+        if row is None:
+            return None
+        return (kind, barcode, moved_to) + row
+
+    def _cache_plate_rows(self, rows):
+        """Caches a Plate and the Samples of its Wells from rows of plate
+        barcode, grid, label, customer, name, sample_id and tag."""
+        barcode, grid = rows[0][:2]
+        wells = []
+        for row in rows:
+            if row[2] is not None:
+                wells.append((row[2], row[5]))
+                self._cache_sample_row(row[3:])
+        self._cache.put(('plate', barcode), (barcode, grid, tuple(wells)))
+
+    def _cached_plate_rows(self, barcode):
+        """Returns the cached rows of Plate joined with its Wells and their
+        Samples, or None if the Plate or any of the Samples is not cached."""
+        entry = self._cache.get(('plate', barcode))
+        if entry is None:
+            return None
+        barcode, grid, wells = entry
+        rows = [(barcode, grid, None, None, None, None, None)]
+        for label, sample_id in wells:
+            row = (None, None, None, None)
+            if sample_id is not None:
+                row = self._cached_sample_row(sample_id)
+                if row is None:
+                    return None
+            rows.append((barcode, grid, label) + row)
+        return rows
+
     def find_sample_by_customer_sample_name(self, customer, name):
         """Finds Sample by customer and sample name."""
         sql = ("select customer, name, sample_id, tag from sample "
@@ -153,13 +396,240 @@ class SQLite3DataSource(DataSource):
         finally:
             cursor.close()
 
+    def find_samples_by_customer_sample_names(self, names):
+        """Finds Samples by (customer, sample name) pairs and returns a
+        dictionary of Samples by the pairs. Pairs are looked up with a single
+        query per chunk using the unique (customer, name) index."""
+        samples = {}
+        names = list(names)
+        size = self.chunk_size // 2  # two variables per pair
+        for i in range(0, len(names), size):
+            chunk = names[i:i + size]
+            values = ', '.join(['(?, ?)'] * len(chunk))
+            sql = ("select customer, name, sample_id, tag from sample "
+                   "where (customer, name) in "
+                   "(select column1, column2 from (values %s))" % values)
+            params = tuple(x for pair in chunk for x in pair)
+            cursor = self._conn.cursor()
+            try:
+                cursor.execute(sql, params)
+                for customer, name, sample_id, tag in cursor.fetchall():
+                    sample = Sample(customer, name, sample_id, tag)
+                    samples[(customer, name)] = sample
+            finally:
+                cursor.close()
+        return samples
+
     def find_tube_by_barcode(self, barcode):
-        """Finds Tube by barcode."""
-        sample_tube = self.find_sample_tube_by_barcode(barcode)
-        if sample_tube:
-            return sample_tube
-        lab_tube = self.find_lab_tube_by_barcode(barcode)
-        return lab_tube
+        """Finds SampleTube or LabTube by barcode, together with its Sample,
+        using a single query."""
+        tubes = self.find_tubes_by_barcodes([barcode])
+        return tubes.get(barcode)
+
+    def find_tubes_by_barcodes(self, barcodes):
+        """Finds SampleTubes and LabTubes by barcodes, together with their
+        Samples, and returns a dictionary of Tubes by barcode. Barcodes are
+        resolved in both tube tables with a single query per chunk."""
+        self._sync_cache()
+        tubes = {}
+        missing = []
+        for barcode in barcodes:
+            row = self._cached_tube_row(barcode)
+            if row is None:
+                missing.append(barcode)
+            else:
+                tubes[barcode] = self._make_tube(row)
+        barcodes = missing
+        for i in range(0, len(barcodes), self.chunk_size):
+            chunk = barcodes[i:i + self.chunk_size]
+            marks = ', '.join('?' * len(chunk))
+            sql = ("select 'sample_tube' as kind, t.barcode, t.moved_to, "
+                   "s.customer, s.name, s.sample_id, s.tag "
+                   "from sample_tube t "
+                   "left join sample s on s.sample_id = t.sample_id "
+                   "where t.barcode in (%s) "
+                   "union all "
+                   "select 'lab_tube' as kind, t.barcode, t.moved_to, "
+                   "s.customer, s.name, s.sample_id, s.tag "
+                   "from lab_tube t "
+                   "left join sample s on s.sample_id = t.sample_id "
+                   "where t.barcode in (%s) "
+                   "order by kind desc" % (marks, marks))  # sample_tube first
+            params = tuple(chunk) * 2
+            cursor = self._conn.cursor()
+            try:
+                cursor.execute(sql, params)
+                for row in cursor.fetchall():
+                    if row[1] in tubes:
+                        continue
+                    tubes[row[1]] = self._make_tube(row)
+                    self._cache_tube_row(row)
+            finally:
+                cursor.close()
+        return tubes
+
+    def find_containers_by_sample_id(self, sample_id):
+        """Finds SampleTubes, LabTubes and Plates holding the Sample with a
+        single query using the sample_id indexes, and returns them in a
+        list; Tubes first and then Plates, by barcode. Plates have only the
+        Wells of the Sample."""
+        sql = ("select c.kind, c.barcode, c.grid, c.label, "
+               "s.customer, s.name, s.sample_id, s.tag "
+               "from (select 'sample_tube' as kind, barcode, "
+               "null as grid, null as label, sample_id "
+               "from sample_tube where sample_id = ? "
+               "union all "
+               "select 'lab_tube', barcode, null, null, sample_id "
+               "from lab_tube where sample_id = ? "
+               "union all "
+               "select 'plate', w.plate_barcode, p.grid, w.label, w.sample_id "
+               "from well w join plate p on p.barcode = w.plate_barcode "
+               "where w.sample_id = ?) c "
+               "join sample s on s.sample_id = c.sample_id "
+               "order by c.kind = 'plate', c.barcode")
+        params = (sample_id,) * 3
+        containers = []
+        plates = {}
+        cursor = self._conn.cursor()
+        try:
+            cursor.execute(sql, params)
+            for kind, barcode, grid, label, *sample_row in cursor.fetchall():
+                customer, name, sample_id, tag = sample_row
+                if kind != 'plate':
+                    row = (kind, barcode, None) + tuple(sample_row)
+                    containers.append(self._make_tube(row))
+                    continue
+                sample = Sample(customer=customer, name=name,
+                                sample_id=sample_id, tag=tag)
+                plate = plates.get(barcode)
+                if plate is None:
+                    plate = plates[barcode] = Plate(barcode, grid)
+                    containers.append(plate)
+                plate.add_well(Well(label, sample))
+        finally:
+            cursor.close()
+        return containers
+
+    def find_lineage_by_barcode(self, barcode):
+        """Finds the Tubes that a Sample moved through before and after the
+        Tube with barcode with a single recursive query, and returns them in
+        order of transfers; the last Tube is the current location. Returns
+        an empty list if there is no Tube with barcode."""
+        # Ancestors follow moved_to backwards, using the moved_to indexes,
+        # and descendants follow it forwards, using the primary keys. Each
+        # recursive step has one SELECT per tube table, so that SQLite can
+        # use the indexes of each table. Depth is bounded against cycles.
+        sql = ("with recursive "
+               "ancestor(depth, barcode) as ("
+               "select 0, ? "
+               "union all "
+               "select a.depth - 1, t.barcode from ancestor a "
+               "join sample_tube t on t.moved_to = a.barcode "
+               "where a.depth > -%(limit)d "
+               "union all "
+               "select a.depth - 1, t.barcode from ancestor a "
+               "join lab_tube t on t.moved_to = a.barcode "
+               "where a.depth > -%(limit)d), "
+               "descendant(depth, barcode) as ("
+               "select 0, ? "
+               "union all "
+               "select d.depth + 1, t.moved_to from descendant d "
+               "join sample_tube t on t.barcode = d.barcode "
+               "where t.moved_to is not null and d.depth < %(limit)d "
+               "union all "
+               "select d.depth + 1, t.moved_to from descendant d "
+               "join lab_tube t on t.barcode = d.barcode "
+               "where t.moved_to is not null and d.depth < %(limit)d), "
+               "lineage(depth, barcode) as ("
+               "select depth, barcode from ancestor "
+               "union "
+               "select depth, barcode from descendant) "
+               "select l.depth, 'sample_tube', t.barcode, t.moved_to, "
+               "s.customer, s.name, s.sample_id, s.tag "
+               "from lineage l join sample_tube t on t.barcode = l.barcode "
+               "left join sample s on s.sample_id = t.sample_id "
+               "union all "
+               "select l.depth, 'lab_tube', t.barcode, t.moved_to, "
+               "s.customer, s.name, s.sample_id, s.tag "
+               "from lineage l join lab_tube t on t.barcode = l.barcode "
+               "left join sample s on s.sample_id = t.sample_id "
+               "order by 1" % dict(limit=self.lineage_limit))
+        params = (barcode, barcode)
+        cursor = self._conn.cursor()
+        try:
+            cursor.execute(sql, params)
+            return [self._make_tube(row[1:]) for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+
+    def iter_sample_locations(self, customer=None, tagged=None,
+                              min_concentration=None, max_concentration=None):
+        """Yields rows of sample_id, customer, name, tag, concentration,
+        container kind, container barcode and well label for every Sample
+        matching the filters, by sample_id; one row for each current
+        Container, or one with None for a Sample in none.
+
+        Samples are read with fetchmany, and the Containers of each chunk
+        with one query per container table using the sample_id indexes, so
+        memory does not grow with the number of Samples."""
+        conditions = []
+        params = []
+        if customer is not None:
+            conditions.append("customer = ?")
+            params.append(customer)
+        if tagged is not None:
+            conditions.append("tag is not null" if tagged else "tag is null")
+        if min_concentration is not None:
+            conditions.append("concentration >= ?")
+            params.append(min_concentration)
+        if max_concentration is not None:
+            conditions.append("concentration <= ?")
+            params.append(max_concentration)
+        sql = ("select sample_id, customer, name, tag, concentration "
+               "from sample")
+        if conditions:
+            sql += " where " + " and ".join(conditions)
+        sql += " order by sample_id"
+        cursor = self._conn.cursor()
+        try:
+            cursor.execute(sql, params)
+            while True:
+                samples = cursor.fetchmany(self.chunk_size)
+                if not samples:
+                    break
+                locations = self._find_locations([x[0] for x in samples])
+                for row in samples:
+                    for location in locations.get(row[0], _no_location):
+                        yield row + location
+        finally:
+            cursor.close()
+
+    def _find_locations(self, sample_ids):
+        """Returns a dictionary of (kind, barcode, label) tuples by
+        sample_id for the Containers of sample_ids; Tubes first and then
+        Wells, by barcode and label."""
+        marks = ', '.join('?' * len(sample_ids))
+        queries = [
+            "select sample_id, 'sample_tube', barcode, null "
+            "from sample_tube where sample_id in (%s)",
+            "select sample_id, 'lab_tube', barcode, null "
+            "from lab_tube where sample_id in (%s)",
+            "select sample_id, 'plate', plate_barcode, label "
+            "from well where sample_id in (%s)",
+        ]
+        rows = []
+        cursor = self._conn.cursor()
+        try:
+            for sql in queries:
+                cursor.execute(sql % marks, sample_ids)
+                rows.extend(cursor.fetchall())
+        finally:
+            cursor.close()
+        rows.sort(key=_location_order)
+        locations = {}
+        for row in rows:
+            locations.setdefault(row[0], []).append(row[1:])
+        return locations
 
     def find_sample_tube_by_barcode(self, barcode):
         """Finds SampleTube by barcode."""
@@ -171,31 +641,43 @@ class SQLite3DataSource(DataSource):
 
     def find_tube_by_kind_barcode(self, kind, barcode):
         """Finds Tube by kind (sample_tube or lab_tube) and barcode."""
-        sql = ("select barcode, sample_id, moved_to "
-               "from %s where barcode = ?" % kind)
+        self._sync_cache()
+        row = self._cached_tube_row(barcode)
+        if row is not None:
+            if row[0] == kind:
+                return self._make_tube(row)
+            return None  # Barcodes are unique across tube tables.
+        sql = ("select '%s', t.barcode, t.moved_to, "
+               "s.customer, s.name, s.sample_id, s.tag "
+               "from %s t left join sample s on s.sample_id = t.sample_id "
+               "where t.barcode = ?" % (kind, kind))
         params = (barcode,)
         cursor = self._conn.cursor()
         try:
             cursor.execute(sql, params)
             result = cursor.fetchall()
             if result:
-                barcode, sample_id, moved_to = result[0]
-                if kind == 'sample_tube':
-                    tube = SampleTube(barcode)
-                else:
-                    tube = LabTube(barcode)
-                if moved_to is not None:
-                    tube.set_moved_to(moved_to)
-                if sample_id is None:
-                    return tube
-                else:
-                    # eager fetch sample
-                    sample = self.find_sample_by_sample_id(sample_id)
-                    tube.set_sample(sample)
-                    return tube
+                self._cache_tube_row(result[0])
+                return self._make_tube(result[0])
         finally:
             cursor.close()
 
+    def _make_tube(self, row):
+        """Creates SampleTube or LabTube, and its Sample (eager fetch), from a
+        row of kind, barcode, moved_to, customer, name, sample_id and tag."""
+        kind, barcode, moved_to, customer, name, sample_id, tag = row
+        if kind == 'sample_tube':
+            tube = SampleTube(barcode)
+        else:
+            tube = LabTube(barcode)
+        if moved_to is not None:
+            tube.set_moved_to(moved_to)
+        if sample_id is not None:
+            sample = Sample(customer=customer, name=name,
+                            sample_id=sample_id, tag=tag)
+            tube.set_sample(sample)
+        return tube
+
     def begin_transaction(self):
         """Begins transaction on the database connection."""
         # Automatically starts at INSERT, UPDATE, or DELETE and finishes when
@@ -210,9 +692,58 @@ class SQLite3DataSource(DataSource):
         return self._conn.commit()
 
     def rollback_transaction(self):
-        """Rollbacks transaction on the database connection."""
+        """Rollbacks transaction on the database connection. The read cache
+        is emptied since it may hold rolled back changes."""
+        self._cache.clear()
         return self._conn.rollback()
 
+    def begin_savepoint(self, name):
+        """Begins a savepoint; it starts a transaction if none is active."""
+        self._conn.execute("savepoint %s" % name)
+
+    def release_savepoint(self, name):
+        """Releases a savepoint into the enclosing transaction."""
+        self._conn.execute("release savepoint %s" % name)
+
+    def rollback_savepoint(self, name):
+        """Rollbacks changes since a savepoint and releases it. The read
+        cache is emptied since it may hold rolled back changes."""
+        self._cache.clear()
+        self._conn.execute("rollback to savepoint %s" % name)
+        self._conn.execute("release savepoint %s" % name)
+
+    @contextlib.contextmanager
+    def use_profile(self, name):
+        """Applies the PRAGMAs of a named tuning profile, and restores their
+        previous values on exit. Used, for example, to relax durability
+        with bulk_import during large file imports."""
+        pragmas = profiles[name]
+        previous = dict((x, self._get_pragma(x)) for x in pragmas)
+        self._set_pragmas(pragmas)
+        try:
+            yield self
+        finally:
+            self._set_pragmas(previous)
+
+    def _get_pragma(self, name):
+        """Returns the value of a PRAGMA."""
+        cursor = self._conn.execute("pragma %s" % name)
+        try:
+            value, = cursor.fetchone()
+        finally:
+            cursor.close()
+        return value
+
+    def _set_pragmas(self, pragmas):
+        """Sets PRAGMAs from a dictionary of names and values. Profiles come
+        from config, so names and values are not parameters."""
+        for name, value in pragmas.items():
+            cursor = self._conn.execute("pragma %s = %s" % (name, value))
+            try:
+                cursor.fetchall()  # journal_mode returns the new mode
+            finally:
+                cursor.close()
+
     def create_sample_tube(self, tube):
         """Creates SampleTube and Sample, and assigns sample_id to Sample."""
         sql = "insert into sample (customer, name) values (?, ?)"
@@ -225,9 +756,46 @@ class SQLite3DataSource(DataSource):
             sample.set_sample_id(sample_id)
         finally:
             cursor.close()
+        self._cache.invalidate(('sample', sample_id))
 
         return self._create_tube('sample_tube', tube)
 
+    def create_sample_tubes(self, tubes):
+        """Creates SampleTubes and their Samples with one executemany per
+        table, and assigns sample_id to Samples."""
+        tubes = list(tubes)
+        if not tubes:
+            return
+        samples = [tube.get_sample() for tube in tubes]
+        sql = "insert into sample (customer, name) values (?, ?)"
+        params = [(x.get_customer(), x.get_name()) for x in samples]
+        cursor = self._conn.cursor()
+        try:
+            cursor.executemany(sql, params)
+            # executemany does not report row ids. The transaction holds the
+            # write lock, so autoincrement assigned a contiguous range ending
+            # at the sequence value of the sample table.
+            sql = "select seq from sqlite_sequence where name = 'sample'"
+            cursor.execute(sql)
+            last_id, = cursor.fetchone()
+        finally:
+            cursor.close()
+        first_id = last_id - len(samples) + 1
+        for i, sample in enumerate(samples):
+            sample.set_sample_id(first_id + i)
+            self._cache.invalidate(('sample', first_id + i))
+
+        sql = "insert into sample_tube (barcode, sample_id) values (?, ?)"
+        params = [(x.get_barcode(), x.get_sample().get_sample_id())
+                  for x in tubes]
+        cursor = self._conn.cursor()
+        try:
+            cursor.executemany(sql, params)
+        finally:
+            cursor.close()
+        for tube in tubes:
+            self._cache.invalidate(('tube', tube.get_barcode()))
+
     def create_lab_tube(self, tube):
         """Creates LabTube."""
         return self._create_tube('lab_tube', tube)
@@ -242,6 +810,7 @@ class SQLite3DataSource(DataSource):
             cursor.execute(sql, params)
         finally:
             cursor.close()
+        self._cache.invalidate(('tube', tube.get_barcode()))
 
     def move_sample(self, source_tube, destination_tube):
         """Transfers Sample from source_tube to destination_tube. The moved_to
@@ -271,43 +840,115 @@ class SQLite3DataSource(DataSource):
         finally:
             cursor.close()
 
+        self._cache.invalidate(('tube', source_tube.get_barcode()))
+        self._cache.invalidate(('tube', destination_tube.get_barcode()))
         source_tube.set_sample(None)
         source_tube.set_moved_to(destination_tube.get_barcode())
         destination_tube.set_sample(sample)
 
+    def move_samples(self, pairs):
+        """Transfers Samples from source Tubes to destination Tubes given as
+        (source_tube, destination_tube) pairs, with one executemany for the
+        updates and one for the inserts of each tube table. Destinations
+        must not be sources of other pairs."""
+        pairs = list(pairs)
+        for kind, cls in (('sample_tube', SampleTube), ('lab_tube', LabTube)):
+            moves = [x for x in pairs if isinstance(x[0], cls)]
+            if not moves:
+                continue
+            sql = ("update %s set sample_id = ?, moved_to = ? "
+                   "where barcode = ?" % kind)
+            params = [(None, destination.get_barcode(), source.get_barcode())
+                      for source, destination in moves]
+            cursor = self._conn.cursor()
+            try:
+                cursor.executemany(sql, params)
+            finally:
+                cursor.close()
+
+            sql = "insert into %s (barcode, sample_id) values (?, ?)" % kind
+            params = [(destination.get_barcode(),
+                       source.get_sample().get_sample_id())
+                      for source, destination in moves]
+            cursor = self._conn.cursor()
+            try:
+                cursor.executemany(sql, params)
+            finally:
+                cursor.close()
+
+        for source_tube, destination_tube in pairs:
+            self._cache.invalidate(('tube', source_tube.get_barcode()))
+            self._cache.invalidate(('tube', destination_tube.get_barcode()))
+            sample = source_tube.get_sample()
+            source_tube.set_sample(None)
+            source_tube.set_moved_to(destination_tube.get_barcode())
+            destination_tube.set_sample(sample)
+
     def find_plate_by_barcode(self, barcode):
-        """Finds Plate by barcode, together with all Plate wells."""
-        sql = "select barcode, grid from plate where barcode = ?"
+        """Finds Plate by barcode, together with all Plate wells and their
+        Samples, using a single query."""
+        self._sync_cache()
+        result = self._cached_plate_rows(barcode)
+        if result is not None:
+            return self._make_plate(result)
+        sql = ("select p.barcode, p.grid, w.label, "
+               "s.customer, s.name, s.sample_id, s.tag "
+               "from plate p "
+               "left join well w on w.plate_barcode = p.barcode "
+               "left join sample s on s.sample_id = w.sample_id "
+               "where p.barcode = ? "
+               "order by w.ordinal")
         params = (barcode,)
         cursor = self._conn.cursor()
         try:
             cursor.execute(sql, params)
             result = cursor.fetchall()
             if result:
-                barcode, grid = result[0]
-                wells = self._find_wells_by_barcode(barcode)
-                plate = Plate(barcode, grid, wells)
-                return plate
+                self._cache_plate_rows(result)
+                return self._make_plate(result)
         finally:
             cursor.close()
 
-    def _find_wells_by_barcode(self, barcode):
-        """Finds wells by plate barcode ordered by Well position."""
-        sql = "select label, sample_id from well where plate_barcode = ?" \
-              "order by substr(label, 1, 1), cast (substr(label, 2) as integer)"
-        params = (barcode,)
+    def find_plate_occupancy(self, barcode, label):
+        """Finds Plate by barcode without its Wells, and returns it with the
+        number of filled Wells and whether the Well with label is filled, or
+        None if there is no Plate. One query counts the Wells and checks the
+        target Well in the unique (plate_barcode, label) index, without
+        reading Well or Sample rows."""
+        sql = ("select p.grid, "
+               "(select count(*) from well w "
+               "where w.plate_barcode = p.barcode), "
+               "exists (select 1 from well w "
+               "where w.plate_barcode = p.barcode and w.label = ?) "
+               "from plate p where p.barcode = ?")
+        params = (label, barcode)
         cursor = self._conn.cursor()
         try:
             cursor.execute(sql, params)
-            result = cursor.fetchall()
-            wells = []
-            for label, sample_id in result:
-                sample = self.find_sample_by_sample_id(sample_id)
-                well = Well(label, sample)
-                wells.append(well)
-            return wells
+            row = cursor.fetchone()
         finally:
             cursor.close()
+        if row is not None:
+            grid, filled, occupied = row
+            return Plate(barcode, grid), filled, bool(occupied)
+
+    @staticmethod
+    def _make_plate(rows):
+        """Returns Plate from rows of plate barcode, grid, label, customer,
+        name, sample_id and tag."""
+        barcode, grid = rows[0][:2]
+        wells = []
+        for row in rows:
+            label, customer, name, sample_id, tag = row[2:]
+            if label is None:  # plate without wells
+                continue
+            sample = None
+            if sample_id is not None:
+                sample = Sample(customer=customer, name=name,
+                                sample_id=sample_id, tag=tag)
+            well = Well(label, sample)
+            wells.append(well)
+        return Plate(barcode, grid, wells)
 
     def update_sample_tag(self, sample, tag):
         """Updates tag of sample."""
@@ -318,10 +959,26 @@ class SQLite3DataSource(DataSource):
             cursor.execute(sql, params)
         finally:
             cursor.close()
+        self._cache.invalidate(self._sample_key(sample.get_sample_id()))
         sample.set_tag(tag)
 
+    def update_sample_tags(self, pairs):
+        """Updates tags of Samples given as (sample, tag) pairs with one
+        executemany."""
+        pairs = list(pairs)
+        sql = "update sample set tag = ? where sample_id = ?"
+        params = [(tag, sample.get_sample_id()) for sample, tag in pairs]
+        cursor = self._conn.cursor()
+        try:
+            cursor.executemany(sql, params)
+        finally:
+            cursor.close()
+        for sample, tag in pairs:
+            self._cache.invalidate(self._sample_key(sample.get_sample_id()))
+            sample.set_tag(tag)
+
     def update_sample_concentration(self, sample, value):
-        """Updates tag of sample."""
+        """Updates concentration of sample."""
         sql = "update sample set concentration = ? where sample_id = ?"
         params = value, sample.get_sample_id()
         cursor = self._conn.cursor()
@@ -329,8 +986,24 @@ class SQLite3DataSource(DataSource):
             cursor.execute(sql, params)
         finally:
             cursor.close()
+        self._cache.invalidate(self._sample_key(sample.get_sample_id()))
         sample.set_concentration(value)
 
+    def update_sample_concentrations(self, pairs):
+        """Updates concentrations of Samples given as (sample, value) pairs
+        with one executemany."""
+        pairs = list(pairs)
+        sql = "update sample set concentration = ? where sample_id = ?"
+        params = [(value, sample.get_sample_id()) for sample, value in pairs]
+        cursor = self._conn.cursor()
+        try:
+            cursor.executemany(sql, params)
+        finally:
+            cursor.close()
+        for sample, value in pairs:
+            self._cache.invalidate(self._sample_key(sample.get_sample_id()))
+            sample.set_concentration(value)
+
     def create_plate(self, plate):
         """Creates a Plate and its wells."""
         sql = "insert into plate (barcode, grid) values (?, ?)"
@@ -340,34 +1013,51 @@ class SQLite3DataSource(DataSource):
             cursor.execute(sql, params)
         finally:
             cursor.close()
-        sql = ("insert into well (plate_barcode, label, sample_id) "
-               "values (?, ?, ?)")
-        plate_barcode = plate.get_barcode()
-        wells = plate.get_wells()
-        cursor = self._conn.cursor()
-        try:
-            for well in wells:
-                params = (plate_barcode, well.get_label(),
-                          well.get_sample().get_sample_id())
-                cursor.execute(sql, params)
-        finally:
-            cursor.close()
+        self._insert_wells(plate, plate.get_wells())
 
     def create_well(self, plate, well):
         """Creates a Well and adds to plate."""
-        sql = ("insert into well (plate_barcode, label, sample_id) "
-               "values (?, ?, ?)")
-        params = (plate.get_barcode(), well.get_label(),
-                  well.get_sample().get_sample_id())
+        sql = ("insert into well (plate_barcode, label, sample_id, ordinal) "
+               "values (?, ?, ?, ?)")
+        label = well.get_label()
+        params = (plate.get_barcode(), label,
+                  well.get_sample().get_sample_id(), plate.get_ordinal(label))
         cursor = self._conn.cursor()
         try:
             cursor.execute(sql, params)
         finally:
             cursor.close()
+        self._cache.invalidate(('plate', plate.get_barcode()))
         plate.add_well(well)
 
+    def create_wells(self, plate, wells):
+        """Creates Wells with one executemany and adds them to plate."""
+        self._insert_wells(plate, wells)
+        for well in wells:
+            plate.add_well(well)
+
+    def _insert_wells(self, plate, wells):
+        """Inserts Wells of plate with one executemany."""
+        sql = ("insert into well (plate_barcode, label, sample_id, ordinal) "
+               "values (?, ?, ?, ?)")
+        plate_barcode = plate.get_barcode()
+        params = [(plate_barcode, x.get_label(), x.get_sample().get_sample_id(),
+                   plate.get_ordinal(x.get_label())) for x in wells]
+        cursor = self._conn.cursor()
+        try:
+            cursor.executemany(sql, params)
+        finally:
+            cursor.close()
+        self._cache.invalidate(('plate', plate_barcode))
+
     def find_sample_by_sample_id(self, sample_id):
         """Finds Sample by sample_id."""
+        self._sync_cache()
+        row = self._cached_sample_row(sample_id)
+        if row is not None:
+            customer, name, sample_id, tag = row
+            return Sample(customer=customer, name=name,
+                          sample_id=sample_id, tag=tag)
         sql = ("select customer, name, sample_id, tag from sample "
                "where sample_id = ?")
         params = (sample_id,)
@@ -376,6 +1066,7 @@ class SQLite3DataSource(DataSource):
             cursor.execute(sql, params)
             result = cursor.fetchall()
             if result:
+                self._cache_sample_row(result[0])
                 customer, name, sample_id, tag = result[0]
                 sample = Sample(customer=customer, name=name,
                                 sample_id=sample_id, tag=tag)
@@ -383,8 +1074,67 @@ class SQLite3DataSource(DataSource):
         finally:
             cursor.close()
 
+    def find_samples_by_sample_ids(self, sample_ids):
+        """Finds Samples by sample_ids with a single query per chunk, and
+        returns a dictionary of Samples by sample_id."""
+        self._sync_cache()
+        samples = {}
+        missing = []
+        for sample_id in sample_ids:
+            row = self._cached_sample_row(sample_id)
+            if row is None:
+                missing.append(sample_id)
+            else:
+                customer, name, sample_id, tag = row
+                samples[sample_id] = Sample(customer=customer, name=name,
+                                            sample_id=sample_id, tag=tag)
+        sample_ids = missing
+        for i in range(0, len(sample_ids), self.chunk_size):
+            chunk = sample_ids[i:i + self.chunk_size]
+            marks = ', '.join('?' * len(chunk))
+            sql = ("select customer, name, sample_id, tag from sample "
+                   "where sample_id in (%s)" % marks)
+            cursor = self._conn.cursor()
+            try:
+                cursor.execute(sql, chunk)
+                for row in cursor.fetchall():
+                    self._cache_sample_row(row)
+                    customer, name, sample_id, tag = row
+                    sample = Sample(customer=customer, name=name,
+                                    sample_id=sample_id, tag=tag)
+                    samples[sample_id] = sample
+            finally:
+                cursor.close()
+        return samples
+
+    def find_samples_by_customer(self, customer, after=None, limit=100,
+                                 order='name'):
+        """Finds up to limit Samples of customer in order of name or
+        sample_id, after the name or sample_id given as after. Pages seek
+        to after in the unique (customer, name) index or the customer
+        index, so every page costs the same."""
+        if order not in ('name', 'sample_id'):
+            raise ValueError("order must be name or sample_id: %r" % order)
+        sql = ("select customer, name, sample_id, tag from sample "
+               "where customer = ?")
+        params = [customer]
+        if after is not None:
+            sql += " and %s > ?" % order
+            params.append(after)
+        sql += " order by %s limit ?" % order
+        params.append(limit)
+        cursor = self._conn.cursor()
+        try:
+            cursor.execute(sql, params)
+            return [Sample(customer=customer, name=name, sample_id=sample_id,
+                           tag=tag)
+                    for customer, name, sample_id, tag in cursor.fetchall()]
+        finally:
+            cursor.close()
+
     def _reset_tables(self):
         """Truncates tables and resets sequences of the underlying database."""
+        self._cache.clear()
         tables = 'sample sample_tube lab_tube plate well'.split()
         for table in tables:
             sql = "delete from %s" % table
@@ -393,3 +1143,555 @@ class SQLite3DataSource(DataSource):
             params = table,
             self._conn.execute(sql, params)
         self._conn.commit()
+
+
+class IntegrityError(Exception):
+    """Constraint violation in MemoryDataSource, like sqlite3.IntegrityError
+    in SQLite3DataSource."""
+
+
+class MemoryDatabase:
+    """Tables and indexes of MemoryDataSource, shared by the data sources
+    with the same database name like connections to one SQLite file."""
+
+    def __init__(self):
+        """Initialises empty tables and indexes."""
+        self.samples = {}  # [customer, name, sample_id, tag, concentration]
+        self.names = {}  # sample_id by (customer, name)
+        self.customer_names = {}  # sorted list of names by customer
+        self.customer_sample_ids = {}  # sorted list of sample_ids by customer
+        self.sequence = 0  # last sample_id
+        self.tubes = dict(sample_tube={}, lab_tube={})  # [sample_id, moved_to]
+        self.tube_sample_ids = {}  # set of (kind, barcode) by sample_id
+        self.moved_from = {}  # set of (kind, barcode) by moved_to
+        self.plates = {}  # grid by barcode
+        self.wells = {}  # sample_id by label, by plate barcode
+        self.well_sample_ids = {}  # set of (plate_barcode, label) by sample_id
+
+
+class MemoryDataSource(DataSource):
+    """DataSource that keeps tables in dictionaries, with dictionaries of
+    sets as secondary indexes. For simulations and tests; nothing is stored.
+
+    Data sources with the same database name share a MemoryDatabase. Each
+    keeps an undo log of its writes for rollbacks and savepoints, but there
+    is no isolation; other data sources see uncommitted writes.
+    """
+    _databases = {}  # MemoryDatabase by name
+
+    def __init__(self, conf):
+        """Initialises DataSource using database config."""
+        self._conf = conf
+        self._db = None
+        self._undo = []  # Functions that revert writes, in order of writes
+        self._savepoints = []  # (name, undo length, starts transaction)
+        self._in_transaction = False
+        self.start_connection()
+
+    def get_conf(self):
+        """Returns database configuration."""
+        return self._conf
+
+    def get_conn(self):
+        """Returns the MemoryDatabase in place of a connection."""
+        return self._db
+
+    def start_connection(self):
+        """Opens the MemoryDatabase named in config, creating it if new."""
+        if self._db is None:
+            name = self._conf.get('name')
+            self._db = self._databases.setdefault(name, MemoryDatabase())
+
+    def close_connection(self):
+        """Rollbacks uncommitted writes like closing a SQLite connection."""
+        self.rollback_transaction()
+
+    # Transactions. Like the sqlite3 module, a write begins a transaction if
+    # none is active, and so does a savepoint; releasing a savepoint that
+    # began a transaction commits it.
+
+    def begin_transaction(self):
+        """Begins transaction; it starts at the first write."""
+        return
+
+    def commit_transaction(self):
+        """Commits transaction by forgetting its undo log."""
+        self._undo = []
+        self._savepoints = []
+        self._in_transaction = False
+
+    def rollback_transaction(self):
+        """Rollbacks transaction by reverting its writes."""
+        self._revert(0)
+        self._savepoints = []
+        self._in_transaction = False
+
+    def begin_savepoint(self, name):
+        """Begins a savepoint; it starts a transaction if none is active."""
+        starts = not self._in_transaction
+        self._in_transaction = True
+        self._savepoints.append((name, len(self._undo), starts))
+
+    def release_savepoint(self, name):
+        """Releases a savepoint, and the savepoints after it, into the
+        enclosing transaction."""
+        index = self._find_savepoint(name)
+        starts = self._savepoints[index][2]
+        del self._savepoints[index:]
+        if starts:
+            self.commit_transaction()
+
+    def rollback_savepoint(self, name):
+        """Rollbacks changes since a savepoint and releases it."""
+        index = self._find_savepoint(name)
+        self._revert(self._savepoints[index][1])
+        self.release_savepoint(name)
+
+    def _find_savepoint(self, name):
+        """Returns the index of the last savepoint with name."""
+        for index in range(len(self._savepoints) - 1, -1, -1):
+            if self._savepoints[index][0] == name:
+                return index
+        raise IntegrityError("No such savepoint: %s" % name)
+
+    def _revert(self, length):
+        """Reverts writes until the undo log has length entries."""
+        while len(self._undo) > length:
+            undo, args = self._undo.pop()
+            undo(*args, log=False)
+
+    def _log(self, undo, *args):
+        """Records the write function and arguments that revert a write."""
+        self._in_transaction = True
+        self._undo.append((undo, args))
+
+    @contextlib.contextmanager
+    def use_profile(self, name):
+        """Accepts tuning profiles from config; they have no effect."""
+        profiles[name]
+        yield self
+
+    # Writes of rows. Each one updates the indexes and, unless it is undoing,
+    # logs the write that reverts it.
+
+    def _put_sample(self, sample_id, row, log=True):
+        """Sets or, if row is None, deletes the row of sample_id."""
+        db = self._db
+        old = db.samples.get(sample_id)
+        if row is not None and old is not None and row[:2] == old[:2]:
+            db.samples[sample_id] = row  # indexed columns are unchanged
+        else:
+            if old is not None:
+                del db.samples[sample_id]
+                del db.names[(old[0], old[1])]
+                self._unindex_sorted(db.customer_names, old[0], old[1])
+                self._unindex_sorted(db.customer_sample_ids, old[0],
+                                     sample_id)
+            if row is not None:
+                db.samples[sample_id] = row
+                db.names[(row[0], row[1])] = sample_id
+                bisect.insort(db.customer_names.setdefault(row[0], []),
+                              row[1])
+                bisect.insort(db.customer_sample_ids.setdefault(row[0], []),
+                              sample_id)
+        if log:
+            self._log(self._put_sample, sample_id, old)
+
+    def _set_sequence(self, value, log=True):
+        """Sets the last sample_id."""
+        old, self._db.sequence = self._db.sequence, value
+        if log:
+            self._log(self._set_sequence, old)
+
+    def _put_tube(self, kind, barcode, row, log=True):
+        """Sets or, if row is None, deletes the row of a Tube."""
+        db = self._db
+        old = db.tubes[kind].pop(barcode, None)
+        if old is not None:
+            self._unindex(db.tube_sample_ids, old[0], (kind, barcode))
+            self._unindex(db.moved_from, old[1], (kind, barcode))
+        if row is not None:
+            db.tubes[kind][barcode] = row
+            self._index(db.tube_sample_ids, row[0], (kind, barcode))
+            self._index(db.moved_from, row[1], (kind, barcode))
+        if log:
+            self._log(self._put_tube, kind, barcode, old)
+
+    def _put_plate(self, barcode, grid, log=True):
+        """Sets or, if grid is None, deletes the row of a Plate."""
+        db = self._db
+        old = db.plates.pop(barcode, None)
+        if grid is not None:
+            db.plates[barcode] = grid
+            db.wells.setdefault(barcode, {})
+        elif not db.wells.get(barcode, True):
+            del db.wells[barcode]
+        if log:
+            self._log(self._put_plate, barcode, old)
+
+    def _put_well(self, plate_barcode, label, sample_id, delete=False,
+                  log=True):
+        """Sets or deletes the row of a Well."""
+        db = self._db
+        wells = db.wells.setdefault(plate_barcode, {})
+        existed = label in wells
+        old = wells.pop(label, None)
+        if existed:
+            self._unindex(db.well_sample_ids, old, (plate_barcode, label))
+        if not delete:
+            wells[label] = sample_id
+            self._index(db.well_sample_ids, sample_id, (plate_barcode, label))
+        if log:
+            self._log(self._put_well, plate_barcode, label, old, not existed)
+
+    @staticmethod
+    def _index(index, key, value):
+        """Adds value to the set of key, unless key is None."""
+        if key is not None:
+            index.setdefault(key, set()).add(value)
+
+    @staticmethod
+    def _unindex_sorted(index, key, value):
+        """Removes value from the sorted list of key."""
+        values = index[key]
+        del values[bisect.bisect_left(values, value)]
+        if not values:
+            del index[key]
+
+    @staticmethod
+    def _unindex(index, key, value):
+        """Removes value from the set of key."""
+        values = index.get(key)
+        if values is not None:
+            values.discard(value)
+            if not values:
+                del index[key]
+
+    # Reads
+
+    def _make_sample(self, sample_id):
+        """Returns Sample of sample_id, or None. Concentration is not loaded,
+        as in SQLite3DataSource."""
+        row = self._db.samples.get(Sample.parse_sample_id(sample_id))
+        if row is not None:
+            customer, name, sample_id, tag = row[:4]
+            return Sample(customer=customer, name=name, sample_id=sample_id,
+                          tag=tag)
+
+    def _make_tube(self, kind, barcode):
+        """Returns SampleTube or LabTube with its Sample, or None."""
+        row = self._db.tubes[kind].get(barcode)
+        if row is None:
+            return None
+        sample_id, moved_to = row
+        cls = SampleTube if kind == 'sample_tube' else LabTube
+        tube = cls(barcode)
+        tube.set_moved_to(moved_to)
+        if sample_id is not None:
+            tube.set_sample(self._make_sample(sample_id))
+        return tube
+
+    def find_sample_by_customer_sample_name(self, customer, name):
+        """Finds Sample by customer and sample name."""
+        sample_id = self._db.names.get((customer, name))
+        if sample_id is not None:
+            return self._make_sample(sample_id)
+
+    def find_samples_by_customer_sample_names(self, names):
+        """Finds Samples by (customer, sample name) pairs and returns a
+        dictionary of Samples by the pairs."""
+        samples = {}
+        for pair in names:
+            sample_id = self._db.names.get(tuple(pair))
+            if sample_id is not None:
+                samples[tuple(pair)] = self._make_sample(sample_id)
+        return samples
+
+    def find_sample_by_sample_id(self, sample_id):
+        """Finds Sample by sample_id."""
+        return self._make_sample(sample_id)
+
+    def find_samples_by_sample_ids(self, sample_ids):
+        """Finds Samples by sample_ids and returns a dictionary of Samples by
+        sample_id."""
+        samples = {}
+        for sample_id in sample_ids:
+            sample = self._make_sample(sample_id)
+            if sample is not None:
+                samples[sample.get_sample_id()] = sample
+        return samples
+
+    def find_samples_by_customer(self, customer, after=None, limit=100,
+                                 order='name'):
+        """Finds up to limit Samples of customer in order of name or
+        sample_id, after the name or sample_id given as after, by bisecting
+        the sorted lists of the customer."""
+        if order == 'name':
+            keys = self._db.customer_names.get(customer, [])
+        elif order == 'sample_id':
+            keys = self._db.customer_sample_ids.get(customer, [])
+            after = None if after is None else int(after)
+        else:
+            raise ValueError("order must be name or sample_id: %r" % order)
+        start = 0 if after is None else bisect.bisect_right(keys, after)
+        keys = keys[start:start + limit]
+        if order == 'name':
+            keys = [self._db.names[(customer, x)] for x in keys]
+        return [self._make_sample(x) for x in keys]
+
+    def find_sample_tube_by_barcode(self, barcode):
+        """Finds SampleTube by barcode."""
+        return self.find_tube_by_kind_barcode('sample_tube', barcode)
+
+    def find_lab_tube_by_barcode(self, barcode):
+        """Finds LabTube by barcode."""
+        return self.find_tube_by_kind_barcode('lab_tube', barcode)
+
+    def find_tube_by_kind_barcode(self, kind, barcode):
+        """Finds Tube by kind (sample_tube or lab_tube) and barcode."""
+        return self._make_tube(kind, barcode)
+
+    def find_tube_by_barcode(self, barcode):
+        """Finds SampleTube or LabTube by barcode."""
+        return (self._make_tube('sample_tube', barcode) or
+                self._make_tube('lab_tube', barcode))
+
+    def find_tubes_by_barcodes(self, barcodes):
+        """Finds SampleTubes and LabTubes by barcodes and returns a
+        dictionary of Tubes by barcode."""
+        tubes = {}
+        for barcode in barcodes:
+            tube = self.find_tube_by_barcode(barcode)
+            if tube is not None:
+                tubes[barcode] = tube
+        return tubes
+
+    def find_containers_by_sample_id(self, sample_id):
+        """Finds SampleTubes, LabTubes and Plates holding the Sample using
+        the sample_id indexes, and returns them in a list; Tubes first and
+        then Plates, by barcode. Plates have only the Wells of the
+        Sample."""
+        key = Sample.parse_sample_id(sample_id)
+        db = self._db
+        containers = [self._make_tube(kind, barcode) for kind, barcode in
+                      sorted(db.tube_sample_ids.get(key, ()),
+                             key=lambda x: x[1])]
+        plates = {}
+        for barcode, label in sorted(db.well_sample_ids.get(key, ())):
+            plate = plates.get(barcode)
+            if plate is None:
+                plate = plates[barcode] = Plate(barcode, db.plates[barcode])
+                containers.append(plate)
+            plate.add_well(Well(label, self._make_sample(key)))
+        return containers
+
+    def find_lineage_by_barcode(self, barcode):
+        """Finds the Tubes that a Sample moved through before and after the
+        Tube with barcode, and returns them in order of transfers; the last
+        Tube is the current location."""
+        db = self._db
+        kinds = [x for x in ('sample_tube', 'lab_tube')
+                 if barcode in db.tubes[x]]
+        if not kinds:
+            return []
+        chain = [(kinds[0], barcode)]
+        seen = set(chain)
+        while True:  # ancestors
+            sources = db.moved_from.get(chain[0][1], ())
+            source = min(sources, default=None)
+            if source is None or source in seen:
+                break
+            chain.insert(0, source)
+            seen.add(source)
+        while True:  # descendants
+            kind, current = chain[-1]
+            moved_to = db.tubes[kind][current][1]
+            if moved_to is None:
+                break
+            found = [(x, moved_to) for x in ('sample_tube', 'lab_tube')
+                     if moved_to in db.tubes[x]]
+            if not found or found[0] in seen:
+                break
+            chain.append(found[0])
+            seen.add(found[0])
+        return [self._make_tube(kind, barcode) for kind, barcode in chain]
+
+    def iter_sample_locations(self, customer=None, tagged=None,
+                              min_concentration=None, max_concentration=None):
+        """Yields rows of sample_id, customer, name, tag, concentration,
+        container kind, container barcode and well label for every Sample
+        matching the filters, by sample_id; one row for each current
+        Container, or one with None for a Sample in none."""
+        db = self._db
+        for sample_id in sorted(db.samples):
+            row = db.samples.get(sample_id)
+            if row is None:  # rolled back meanwhile
+                continue
+            concentration = row[4]
+            if customer is not None and row[0] != customer:
+                continue
+            if tagged is not None and (row[3] is not None) != tagged:
+                continue
+            if min_concentration is not None and (
+                    concentration is None or concentration < min_concentration):
+                continue
+            if max_concentration is not None and (
+                    concentration is None or concentration > max_concentration):
+                continue
+            rows = [(sample_id, kind, barcode, None) for kind, barcode in
+                    db.tube_sample_ids.get(sample_id, ())]
+            rows.extend((sample_id, 'plate', barcode, label) for barcode, label
+                        in db.well_sample_ids.get(sample_id, ()))
+            rows.sort(key=_location_order)
+            sample = (sample_id, row[0], row[1], row[3], concentration)
+            for location in [x[1:] for x in rows] or _no_location:
+                yield sample + location
+
+    def find_plate_by_barcode(self, barcode):
+        """Finds Plate by barcode, together with its Wells and Samples."""
+        grid = self._db.plates.get(barcode)
+        if grid is None:
+            return None
+        wells = [Well(label, self._make_sample(sample_id))
+                 for label, sample_id in self._db.wells[barcode].items()]
+        return Plate(barcode, grid, sorted(wells))
+
+    def find_plate_occupancy(self, barcode, label):
+        """Finds Plate by barcode without its Wells, and returns it with the
+        number of filled Wells and whether the Well with label is filled, or
+        None if there is no Plate."""
+        grid = self._db.plates.get(barcode)
+        if grid is not None:
+            wells = self._db.wells[barcode]
+            return Plate(barcode, grid), len(wells), label in wells
+
+    # Writes
+
+    def create_sample_tube(self, tube):
+        """Creates SampleTube and Sample, and assigns sample_id to Sample."""
+        self.create_sample_tubes([tube])
+
+    def create_sample_tubes(self, tubes):
+        """Creates SampleTubes and their Samples, and assigns sample_id to
+        Samples."""
+        for tube in tubes:
+            sample = tube.get_sample()
+            name = (sample.get_customer(), sample.get_name())
+            if name in self._db.names:
+                raise IntegrityError("Existing sample: %s, %s" % name)
+            sample_id = self._db.sequence + 1
+            self._set_sequence(sample_id)
+            self._put_sample(sample_id, list(name) + [sample_id, None, None])
+            sample.set_sample_id(sample_id)
+            self._create_tube('sample_tube', tube)
+
+    def create_lab_tube(self, tube):
+        """Creates LabTube."""
+        self._create_tube('lab_tube', tube)
+
+    def _create_tube(self, kind, tube):
+        """Creates Tube as either SampleTube or LabTube depending on the kind
+        argument."""
+        barcode = tube.get_barcode()
+        if barcode in self._db.tubes[kind]:
+            raise IntegrityError("Existing tube: %s" % barcode)
+        sample = tube.get_sample()
+        sample_id = sample.get_sample_id() if sample else None
+        self._put_tube(kind, barcode, [Sample.parse_sample_id(sample_id), None])
+
+    def move_sample(self, source_tube, destination_tube):
+        """Transfers Sample from source_tube to destination_tube, which is
+        created in the table of source_tube."""
+        self.move_samples([(source_tube, destination_tube)])
+
+    def move_samples(self, pairs):
+        """Transfers Samples from source Tubes to destination Tubes given as
+        (source_tube, destination_tube) pairs."""
+        for source_tube, destination_tube in pairs:
+            if isinstance(source_tube, SampleTube):
+                kind = 'sample_tube'
+            else:
+                kind = 'lab_tube'
+            sample = source_tube.get_sample()
+            source = source_tube.get_barcode()
+            destination = destination_tube.get_barcode()
+            if destination in self._db.tubes[kind]:
+                raise IntegrityError("Existing tube: %s" % destination)
+            if source in self._db.tubes[kind]:
+                self._put_tube(kind, source, [None, destination])
+            self._put_tube(kind, destination,
+                           [Sample.parse_sample_id(sample.get_sample_id()), None])
+            source_tube.set_sample(None)
+            source_tube.set_moved_to(destination)
+            destination_tube.set_sample(sample)
+
+    def update_sample_tag(self, sample, tag):
+        """Updates tag of sample."""
+        self._update_sample(sample, 3, tag)
+        sample.set_tag(tag)
+
+    def update_sample_tags(self, pairs):
+        """Updates tags of Samples given as (sample, tag) pairs."""
+        for sample, tag in pairs:
+            self.update_sample_tag(sample, tag)
+
+    def update_sample_concentration(self, sample, value):
+        """Updates concentration of sample. Values are stored as integers
+        when they look like one, as in the integer column of SQLite."""
+        try:
+            stored = int(value)
+        except (TypeError, ValueError):
+            stored = value
+        self._update_sample(sample, 4, stored)
+        sample.set_concentration(value)
+
+    def update_sample_concentrations(self, pairs):
+        """Updates concentrations of Samples given as (sample, value)
+        pairs."""
+        for sample, value in pairs:
+            self.update_sample_concentration(sample, value)
+
+    def _update_sample(self, sample, column, value):
+        """Sets a column of the row of sample, if there is one."""
+        key = Sample.parse_sample_id(sample.get_sample_id())
+        row = self._db.samples.get(key)
+        if row is not None:
+            row = list(row)
+            row[column] = value
+            self._put_sample(key, row)
+
+    def create_plate(self, plate):
+        """Creates a Plate and its wells."""
+        barcode = plate.get_barcode()
+        if barcode in self._db.plates:
+            raise IntegrityError("Existing plate: %s" % barcode)
+        self._put_plate(barcode, plate.get_grid())
+        self._insert_wells(plate, plate.get_wells())
+
+    def create_well(self, plate, well):
+        """Creates a Well and adds to plate."""
+        self._insert_wells(plate, [well])
+        plate.add_well(well)
+
+    def create_wells(self, plate, wells):
+        """Creates Wells and adds them to plate."""
+        self._insert_wells(plate, wells)
+        for well in wells:
+            plate.add_well(well)
+
+    def _insert_wells(self, plate, wells):
+        """Inserts Wells of plate."""
+        barcode = plate.get_barcode()
+        for well in wells:
+            label = well.get_label()
+            if label in self._db.wells.get(barcode, ()):
+                raise IntegrityError("Existing well: %s %s" % (barcode, label))
+            sample_id = well.get_sample().get_sample_id()
+            self._put_well(barcode, label, Sample.parse_sample_id(sample_id))
+
+    def _reset_tables(self):
+        """Empties tables and resets the sample_id sequence."""
+        self._db.__init__()
+        self._undo = []
+        self._savepoints = []
+        self._in_transaction = False
@@ -0,0 +1,57 @@
+"""Export Formats."""
+import csv
+import io
+import itertools
+import json
+
+# Columns of exported rows, in the order of DataSource.iter_sample_locations.
+columns = ('sample_id', 'customer', 'name', 'tag', 'concentration',
+           'container_kind', 'container_barcode', 'well_label')
+
+# Rows formatted in memory before each write to the file.
+chunk_size = 1000
+
+
+def _chunks(rows):
+    """Yields lists of up to chunk_size rows."""
+    rows = iter(rows)
+    while True:
+        chunk = list(itertools.islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def write_csv(fp, rows):
+    """Writes a header and rows to fp as CSV, with empty values for None,
+    and returns the number of rows."""
+    count = 0
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for chunk in _chunks(rows):
+        writer.writerows(chunk)
+        fp.write(buffer.getvalue())
+        buffer.seek(0)
+        buffer.truncate()
+        count += len(chunk)
+    fp.write(buffer.getvalue())
+    return count
+
+
+def write_jsonl(fp, rows):
+    """Writes rows to fp as JSON Lines, one object of columns per row, and
+    returns the number of rows."""
+    count = 0
+    for chunk in _chunks(rows):
+        fp.write(''.join(json.dumps(dict(zip(columns, row))) + '\n'
+                         for row in chunk))
+        count += len(chunk)
+    return count
+
+
+# Writers by format name.
+formats = {
+    'csv': write_csv,
+    'jsonl': write_jsonl,
+}
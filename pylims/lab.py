@@ -7,6 +7,7 @@ import re
 
 class Sample:
     """Sample DNA."""
+    __slots__ = ('_customer', '_name', '_sample_id', '_tag', '_concentration')
     name_delimiter = '-'  # between customer and sample name used by customer
     tag_re = re.compile('^[ATGC]+$')  # DNA regex
 
@@ -95,6 +96,15 @@ class Sample:
             return True
         return False
 
+    @classmethod
+    def parse_sample_id(cls, sample_id):
+        """Returns sample_id as an integer, or None if it is not a number,
+        like SQLite compares it with the integer sample_id column."""
+        try:
+            return int(sample_id)
+        except (TypeError, ValueError):
+            return None
+
     @classmethod
     def split_customer_sample_name(cls, name):
         """Splits name into customer and sample name used by customer."""
@@ -109,6 +119,7 @@ class Sample:
 
 class Container:
     """Represents a unique container for Sample."""
+    __slots__ = ('_barcode',)
     barcode_prefix = None  # Must be set in child.
     barcode_places = 5  # For number formatting in barcode.
 
@@ -143,6 +154,7 @@ class Container:
 
 class Tube(Container):
     """Represents a tube."""
+    __slots__ = ('_sample', '_moved_to')
     barcode_prefix = 'NT'
 
     def __init__(self, barcode, sample=None):
@@ -197,18 +209,91 @@ class Tube(Container):
 
 class SampleTube(Tube):
     """Represents a tube that holds customer Sample."""
-    pass
+    __slots__ = ()
 
 
 class LabTube(Tube):
     """Represents a tube where Sample is added."""
-    pass
+    __slots__ = ()
+
+
+class GridLayout:
+    """Well labels of a Plate grid and their ordinals, rows and then columns
+    from zero. Layouts are computed once for each grid and shared by the
+    Plates with that grid, so label checks are dictionary lookups."""
+    __slots__ = ('_rows', '_columns', '_labels', '_ordinals', '_splits')
+    # Grids of 6, 24, 48, 96, 384 and 1536-well plates.
+    standard_grids = ('2x3', '4x6', '6x8', '8x12', '16x24', '32x48')
+    _layouts = {}  # GridLayouts by grid
+
+    def __init__(self, rows, columns):
+        """Initialises GridLayout with the number of rows and columns, and
+        computes its labels."""
+        self._rows = rows
+        self._columns = columns
+        names = [self.row_name(x) for x in range(rows)]
+        self._labels = [name + str(column) for name in names
+                        for column in range(1, columns + 1)]
+        self._ordinals = dict((x, i) for i, x in enumerate(self._labels))
+        self._splits = dict((name + str(column), (name, column))
+                            for name in names
+                            for column in range(1, columns + 1))
+
+    @classmethod
+    def get(cls, grid):
+        """Returns the GridLayout of grid in <rows>x<columns> format."""
+        layout = cls._layouts.get(grid)
+        if layout is None:
+            rows, columns = grid.split('x')
+            layout = cls._layouts[grid] = cls(int(rows), int(columns))
+        return layout
+
+    @staticmethod
+    def row_name(row):
+        """Returns the letters of row from zero; A to Z, then AA, AB and so
+        on."""
+        name = ''
+        row += 1
+        while row:
+            row, letter = divmod(row - 1, 26)
+            name = string.ascii_uppercase[letter] + name
+        return name
+
+    def get_rows_columns(self):
+        """Returns a tuple of number of rows and number columns."""
+        return self._rows, self._columns
+
+    def get_capacity(self):
+        """Returns the number of Wells (rows x columns)."""
+        return len(self._labels)
+
+    def get_ordinal(self, label):
+        """Returns the ordinal of label, or None if it is not in the grid."""
+        return self._ordinals.get(label)
+
+    def get_label(self, ordinal):
+        """Returns the label at ordinal."""
+        return self._labels[ordinal]
+
+    def get_split_label(self, label):
+        """Returns a tuple of row letters and column number of label, or
+        None if it is not in the grid."""
+        return self._splits.get(label)
+
+
+for _grid in GridLayout.standard_grids:
+    GridLayout.get(_grid)
 
 
 class Plate(Container):
     """Represents a plate, which has wells where samples are added."""
+    __slots__ = ('_grid', '_layout', '_slots', '_count', '_outside')
     barcode_prefix = 'DN'
     default_grid = "8x12"  # default is 96 wells; 8 rows and 12 columns.
+    # Labels of the largest standard grid, 1536-well, A1 to AF48, which has
+    # the labels of all the others.
+    label_layout = GridLayout.get(GridLayout.standard_grids[-1])
+    well_label_re = re.compile('^([A-Z]+)([0-9]+)$')
 
     def __init__(self, barcode, grid=None, wells=None):
         """Initialises a Plate using the barcode, grid size, and wells that
@@ -217,10 +302,14 @@ class Plate(Container):
         if grid is None:
             grid = self.default_grid
         self._grid = grid
-        wells = wells or []
-        # Sort wells by label; rows and then columns
-        wells.sort(key=lambda x: x.get_split_label())
-        self._wells = wells  # Wells that contain Samples
+        self._layout = GridLayout.get(grid)
+        # Wells by ordinal, rows and then columns, so that lookups need no
+        # search and iteration no sorting.
+        self._slots = [None] * self._layout.get_capacity()
+        self._count = 0  # number of filled slots
+        self._outside = []  # Wells outside the grid, sorted by label
+        for well in wells or []:
+            self.add_well(well)
 
     def __str__(self):
         """Returns string representation of this Plate and its Wells."""
@@ -234,34 +323,50 @@ class Plate(Container):
         return '\n'.join(lines)
 
     def get_wells(self):
-        """Returns Wells of this Plate."""
-        return self._wells
+        """Returns Wells of this Plate, rows and then columns."""
+        wells = [x for x in self._slots if x is not None]
+        return wells + self._outside
 
     def add_well(self, well):
-        """Adds a Well that contains Sample to this Plate."""
-        # Python < 3.10 does not support key argument to bisect.insort
-        bisect.insort(self._wells, well)  # uses Well.__lt__
+        """Adds a Well that contains Sample to this Plate, replacing a Well
+        with the same label."""
+        ordinal = self.get_ordinal(well.get_label())
+        if ordinal is None:
+            # Python < 3.10 does not support key argument to bisect.insort
+            bisect.insort(self._outside, well)  # uses Well.__lt__
+            return
+        if self._slots[ordinal] is None:
+            self._count += 1
+        self._slots[ordinal] = well
+
+    def get_ordinal(self, label):
+        """Returns the position of the Well with label on the Plate, rows and
+        then columns from zero, or None if it is not on the Plate."""
+        return self._layout.get_ordinal(label)
+
+    def get_well_label(self, ordinal):
+        """Returns the label of the Well at ordinal."""
+        return self._layout.get_label(ordinal)
 
     def well_in_range(self, label):
         """Returns True if the Well position on the Plate."""
-        rows, columns = self.get_grid_rows_columns()
-        min_pos = 'A', 1
-        max_pos = string.ascii_uppercase[rows - 1], columns
-
-        pos = self.split_well_label(label)
-
-        if (min_pos[0] <= pos[0] <= max_pos[0] and
-                min_pos[1] <= pos[1] <= max_pos[1]):
-            return True
-
-        return False
+        return self.get_ordinal(label) is not None
 
     def well_is_empty(self, label):
-        """Returns True if the Well specified by label has Sample."""
-        for well in self.get_wells():
-            if well.get_label() == label:
-                return False
-        return True
+        """Returns True if the Well specified by label has no Sample."""
+        ordinal = self.get_ordinal(label)
+        if ordinal is None:
+            return all(x.get_label() != label for x in self._outside)
+        return self._slots[ordinal] is None
+
+    def next_empty_label(self):
+        """Returns the label of the first empty Well, rows and then columns,
+        or None if the Plate is full."""
+        try:
+            ordinal = self._slots.index(None)
+        except ValueError:
+            return None
+        return self.get_well_label(ordinal)
 
     def get_grid(self):
         """Returns grid size."""
@@ -269,41 +374,51 @@ class Plate(Container):
 
     def get_grid_rows_columns(self):
         """Returns a tuple of number of rows and number columns."""
-        rows, columns = self.get_grid().split('x')
-        return int(rows), int(columns)
+        return self._layout.get_rows_columns()
+
+    def get_filled_count(self):
+        """Returns the number of Wells on the Plate that contain Samples,
+        including Wells outside the grid."""
+        return self._count + len(self._outside)
 
     def is_full(self):
         """Returns True if all Plate Wells contain Samples."""
-        capacity = self.get_capacity()
-        if len(self.get_wells()) >= capacity:
-            return True
-        return False
+        return self.get_filled_count() >= len(self._slots)
 
     def get_capacity(self):
         """Returns the maximum number of Wells (rows x columns)"""
-        nrows, ncolumns = self.get_grid_rows_columns()
-        return nrows * ncolumns
+        return len(self._slots)
 
     @classmethod
     def validate_well_label_format(cls, label):
         """Returns True if the Well label format is valid. Label must start
-        with a letter for the row, followed by a number for the column to
-        specify the position on the Plate."""
-        if label:
-            letter, number = label[0], label[1:]
-            if letter.isalpha() and number.isdigit():
-                if 'A' <= letter <= 'P' and 1 <= int(number) <= 24:
-                    return True  # 384-well, 16x24, A1 to P24
-        return False
+        with letters for the row, followed by a number for the column to
+        specify the position on a standard Plate, up to AF48 on a 1536-well
+        Plate."""
+        return cls.label_layout.get_ordinal(label) is not None
 
     @classmethod
     def split_well_label(cls, label):
-        """Splits label into row letter and column number."""
-        return label[0], int(label[1:])
+        """Splits label into row letters and column number."""
+        split = cls.label_layout.get_split_label(label)
+        if split is None:
+            match = cls.well_label_re.match(label)
+            if match is None:
+                raise ValueError('Invalid well label: %r' % label)
+            split = match.group(1), int(match.group(2))
+        return split
+
+    @classmethod
+    def well_label_key(cls, label):
+        """Returns the sort key of label, rows and then columns, where rows
+        A to Z come before AA."""
+        row, column = cls.split_well_label(label)
+        return len(row), row, column
 
 
 class Well:
     """Represents a location on a Plate to add Sample."""
+    __slots__ = ('_label', '_sample')
 
     def __init__(self, label, sample=None):
         """Initialises Well using label and Sample."""
@@ -314,7 +429,8 @@ class Well:
         """Returns True if the position of this Well is smaller than the other.
         This operator is used for sorting the Wells, rows and then columns.
         """
-        return self.get_split_label() < other.get_split_label()
+        return (Plate.well_label_key(self._label) <
+                Plate.well_label_key(other._label))
 
     def __str__(self):
         """Returns string representation of this Well."""
@@ -346,5 +462,5 @@ class Well:
         return self._sample
 
     def get_split_label(self):
-        """Splits the Well label into row letter and column number."""
-        return self._label[0], int(self._label[1:])
+        """Splits the Well label into row letters and column number."""
+        return Plate.split_well_label(self._label)
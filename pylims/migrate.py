@@ -0,0 +1,106 @@
+"""Schema Migrations."""
+
+import logging
+import sqlite3
+
+from .lab import GridLayout, Plate
+
+LOG = logging.getLogger(__name__)
+
+
+def _add_concentration(conn):
+    """Adds sample.concentration to databases created before it."""
+    columns = [x[1] for x in conn.execute("pragma table_info(sample)")]
+    if 'concentration' not in columns:
+        conn.execute("alter table sample add column concentration integer")
+
+
+def _index_sample_ids(conn):
+    """Indexes sample_id of containers for finding where a Sample is."""
+    for table in ('sample_tube', 'lab_tube', 'well'):
+        conn.execute("create index if not exists %s_sample_id "
+                     "on %s (sample_id)" % (table, table))
+
+
+def _index_moved_to(conn):
+    """Indexes moved_to of tubes for finding the source of a transfer."""
+    for table in ('sample_tube', 'lab_tube'):
+        conn.execute("create index if not exists %s_moved_to "
+                     "on %s (moved_to)" % (table, table))
+
+
+def _index_customer(conn):
+    """Indexes sample.customer for pages of a customer's samples by
+    sample_id."""
+    conn.execute("create index if not exists sample_customer "
+                 "on sample (customer)")
+
+
+def _add_well_ordinal(conn):
+    """Adds well.ordinal, the position of a Well on its Plate from the grid
+    layout, fills it for existing Wells, and indexes it for reading the
+    Wells of a Plate in order."""
+    columns = [x[1] for x in conn.execute("pragma table_info(well)")]
+    if 'ordinal' not in columns:
+        conn.execute("alter table well add column ordinal integer")
+    rows = conn.execute("select w.rowid, p.grid, w.label from well w "
+                        "left join plate p on p.barcode = w.plate_barcode")
+    params = [(GridLayout.get(grid or Plate.default_grid).get_ordinal(label),
+               rowid) for rowid, grid, label in rows.fetchall()]
+    conn.executemany("update well set ordinal = ? where rowid = ?", params)
+    conn.execute("create index if not exists well_plate_ordinal "
+                 "on well (plate_barcode, ordinal, label, sample_id)")
+
+
+# Migration i upgrades schema version i to i + 1. The version is kept in
+# PRAGMA user_version, and misc/pylims_sqlite3.sql creates the latest one.
+migrations = [
+    _add_concentration,
+    _index_sample_ids,
+    _index_moved_to,
+    _index_customer,
+    _add_well_ordinal,
+]
+
+
+def get_version(conn):
+    """Returns the schema version of the database."""
+    version, = conn.execute("pragma user_version").fetchone()
+    return version
+
+
+def migrate(conn):
+    """Applies pending migrations, each in its own transaction, and returns
+    the number applied."""
+    version = get_version(conn)
+    for number in range(version, len(migrations)):
+        LOG.info("Migrating schema to version %d", number + 1)
+        conn.execute("begin")
+        try:
+            migrations[number](conn)
+            conn.execute("pragma user_version = %d" % (number + 1))
+        except Exception:
+            conn.execute("rollback")
+            raise
+        conn.execute("commit")
+    return max(len(migrations) - version, 0)
+
+
+def enable_wal(name):
+    """Switches the SQLite database file name to write-ahead log mode, which
+    lets readers work during writes, and returns the journal mode."""
+    conn = sqlite3.connect(name, isolation_level=None)
+    try:
+        mode, = conn.execute("pragma journal_mode = wal").fetchone()
+        return mode
+    finally:
+        conn.close()
+
+
+def migrate_database(name):
+    """Applies pending migrations to the SQLite database file name."""
+    conn = sqlite3.connect(name, isolation_level=None)
+    try:
+        return migrate(conn)
+    finally:
+        conn.close()
@@ -1,9 +1,13 @@
 """Processing"""
 
 import logging
+import os
+import tempfile
+import time
 
+from . import export
 from .dba import DataSet
-from .lab import Tube, Plate, Sample, SampleTube, LabTube, Well
+from .lab import Tube, Plate, Sample, SampleTube, LabTube, Well, GridLayout
 
 LOG = logging.getLogger(__name__)
 
@@ -15,6 +19,11 @@ class Methods:
         """Records a Sample."""
         raise NotImplementedError("Method not implemented.")
 
+    def record_receipts(self, rows):
+        """Records Samples from rows of customer_sample_name and
+        tube_barcode."""
+        raise NotImplementedError("Method not implemented.")
+
     def add_to_tube(self, sample_id, tube_barcode):
         """Adds a Sample to a Tube."""
         raise NotImplementedError("Method not implemented.")
@@ -23,22 +32,60 @@ class Methods:
         """Adds a Sample to a Plate Well."""
         raise NotImplementedError("Method not implemented.")
 
+    def add_to_plate_map(self, plate_barcode, rows, grid=None):
+        """Adds Samples to Plate Wells from rows of sample_id and
+        well_position."""
+        raise NotImplementedError("Method not implemented.")
+
     def tube_transfer(self, source_tube_barcode, destination_tube_barcode):
         """Moves Sample from a source Tube to a destination Tube."""
         raise NotImplementedError("Method not implemented.")
 
+    def tube_transfers(self, rows):
+        """Moves Samples from source Tubes to destination Tubes from rows of
+        source_tube_barcode and destination_tube_barcode."""
+        raise NotImplementedError("Method not implemented.")
+
     def list_samples_in(self, container_barcode):
         """Lists Samples in a Container."""
         raise NotImplementedError("Method not implemented.")
 
+    def where_is(self, sample_id):
+        """Lists Containers holding a Sample."""
+        raise NotImplementedError("Method not implemented.")
+
+    def list_samples_by_customer(self, customer, after=None, limit=None,
+                                 order=None):
+        """Lists a page of the Samples of a customer."""
+        raise NotImplementedError("Method not implemented.")
+
+    def lineage(self, tube_barcode):
+        """Lists Tubes a Sample moved through."""
+        raise NotImplementedError("Method not implemented.")
+
     def tag(self, sample_id, tag):
         """Applies a tag to a Sample."""
         raise NotImplementedError("Method not implemented.")
 
+    def tags(self, rows):
+        """Applies tags to Samples from rows of sample_id and tag."""
+        raise NotImplementedError("Method not implemented.")
+
     def update_concentration(self, sample_id, value):
         """Set concentrationon the Sample."""
         raise NotImplementedError("Method not implemented.")
 
+    def update_concentrations(self, plate_barcode, rows):
+        """Sets concentrations of Samples in Plate Wells from rows of
+        well_position and concentration."""
+        raise NotImplementedError("Method not implemented.")
+
+    def export_samples(self, file_format, filename, customer=None,
+                       tagged=None, min_concentration=None,
+                       max_concentration=None):
+        """Exports Samples and their Containers to a file."""
+        raise NotImplementedError("Method not implemented.")
+
 
 class Response:
     """Result of Methods."""
@@ -62,12 +109,14 @@ class Response:
     DISCARDED_DESTINATION_TUBE = 'Discarded destination tube'
     DESTINATION_TUBE_NOT_EMPTY = 'Destination tube not empty'
     MOVED_SAMPLE = 'Moved sample'  # success
+    CHAINED_TRANSFER = 'Chained transfer'
     INVALID_PLATE_BARCODE = 'Invalid plate barcode'
     INVALID_WELL_POSITION = 'Invalid well position'
     WELL_OUT_OF_RANGE = 'Well out of range'
     WELL_NOT_EMPTY = 'Well not empty'
     ADDED_SAMPLE_TO_PLATE = 'Added sample to plate'  # OK
     PLATE_IS_FULL = 'Plate is full'
+    INVALID_GRID = 'Invalid grid'
     INVALID_TAG = 'Invalid tag'
     ALREADY_TAGGED = 'Already tagged'
     TAGGED_SAMPLE = 'Tagged sample'  # OK
@@ -80,7 +129,22 @@ class Response:
     PLATE_NOT_FOUND = 'Plate not found'
     INVALID_BARCODE_PREFIX = 'Invalid barcode prefix'
     UPDATED_SAMPLE_CONCENTRATION = 'Updated sample concentration'
-    INVALID_SAMPLE_CONCENTRATION = 'Invalid concentration value'
+    INVALID_SAMPLE_CONCENTRATION = 'Invalid sample concentration'
+    EMPTY_WELL = 'Empty well'
+    FOUND_SAMPLE_CONTAINERS = 'Found sample containers'  # OK
+    FOUND_LINEAGE = 'Found lineage'  # OK
+    CUSTOMER_NOT_FOUND = 'Customer not found'
+    INVALID_PAGE = 'Invalid page'
+    FOUND_CUSTOMER_SAMPLES = 'Found customer samples'  # OK
+    FOUND_LAST_CUSTOMER_SAMPLES = 'Found last customer samples'  # OK
+    INVALID_EXPORT_FORMAT = 'Invalid export format'
+    INVALID_FILTER = 'Invalid filter'
+    CANNOT_WRITE_FILE = 'Cannot write file'
+    EXPORTED_SAMPLES = 'Exported samples'  # OK
+
+    # Statuses of success start with these.
+    success_prefixes = ('FOUND', 'RECORDED', 'ADDED', 'MOVED', 'TAGGED',
+                        'UPDATED', 'EXPORTED')
 
     def __init__(self, status, data=None):
         """Initialises Response with status and data."""
@@ -95,9 +159,16 @@ class Response:
         """Returns a dictionary that contains result of Methods."""
         return self._data
 
+    def is_success(self):
+        """Returns True if status reports success by its start."""
+        return self._status.upper().startswith(self.success_prefixes)
+
 
 class Process(Methods):
     """Receives user input and returns Responses."""
+    batch_size = 5000  # Rows per transaction in bulk methods.
+    page_size = 100  # Default Samples per page in listings.
+    max_page_size = 1000
 
     def __init__(self, dataset=None):
         """Initialises a Process using DataSet."""
@@ -109,6 +180,18 @@ class Process(Methods):
         """Returns DataSet of this Process."""
         return self._dataset
 
+    @staticmethod
+    def _existing_tube_status(tube):
+        """Returns the status for a barcode that belongs to an existing or
+        discarded SampleTube or LabTube."""
+        if isinstance(tube, SampleTube):
+            if tube.is_discarded():
+                return Response.DISCARDED_SAMPLE_TUBE
+            return Response.EXISTING_SAMPLE_TUBE
+        if tube.is_discarded():
+            return Response.DISCARDED_LAB_TUBE
+        return Response.EXISTING_LAB_TUBE
+
     def record_receipt(self, customer_sample_name, tube_barcode):
         """Records Sample and SampleTube."""
         data = dict(customer_sample_name=customer_sample_name,
@@ -129,21 +212,10 @@ class Process(Methods):
             data['sample'] = sample
             return Response(Response.EXISTING_CUSTOMER_SAMPLE_NAME, data)
 
-        sample_tube = self._dataset.find_sample_tube_by_barcode(tube_barcode)
-        if sample_tube:
-            data['tube'] = sample_tube
-            if sample_tube.is_discarded():
-                return Response(Response.DISCARDED_SAMPLE_TUBE, data)
-            else:
-                return Response(Response.EXISTING_SAMPLE_TUBE, data)
-
-        lab_tube = self._dataset.find_lab_tube_by_barcode(tube_barcode)
-        if lab_tube:
-            data['tube'] = lab_tube
-            if lab_tube.is_discarded():
-                return Response(Response.DISCARDED_LAB_TUBE, data)
-            else:
-                return Response(Response.EXISTING_LAB_TUBE, data)
+        tube = self._dataset.find_tube_by_barcode(tube_barcode)
+        if tube:
+            data['tube'] = tube
+            return Response(self._existing_tube_status(tube), data)
 
         sample = Sample(customer, sample_name)
         tube = SampleTube(tube_barcode, sample)
@@ -160,6 +232,89 @@ class Process(Methods):
         data = dict(tube=tube)
         return Response(Response.RECORDED_SAMPLE, data)
 
+    def record_receipts(self, rows):
+        """Records Samples and SampleTubes from rows of customer_sample_name
+        and tube_barcode, for example a customer manifest. Rows are validated
+        and checked for existing names and barcodes in batches, and each
+        batch is recorded in one transaction. Returns a list of Responses,
+        one for each row."""
+        responses = []
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == self.batch_size:
+                responses.extend(self._record_receipt_batch(batch))
+                batch = []
+        if batch:
+            responses.extend(self._record_receipt_batch(batch))
+        return responses
+
+    def _record_receipt_batch(self, rows):
+        """Records a batch of Samples and SampleTubes in one transaction."""
+        responses = []
+        accepted = []  # (response index, data, customer, sample name)
+        for customer_sample_name, tube_barcode in rows:
+            data = dict(customer_sample_name=customer_sample_name,
+                        barcode=tube_barcode)
+            if not Sample.validate_customer_sample_name_format(
+                    customer_sample_name):
+                data['name_delimiter'] = Sample.name_delimiter
+                status = Response.INVALID_CUSTOMER_SAMPLE_NAME
+            elif not Tube.validate_barcode_format(tube_barcode):
+                status = Response.INVALID_TUBE_BARCODE
+            else:
+                customer, sample_name = Sample.split_customer_sample_name(
+                    customer_sample_name)
+                accepted.append((len(responses), data, customer, sample_name))
+                status = None  # decided below
+            responses.append(Response(status, data))
+
+        names = set((x[2], x[3]) for x in accepted)
+        samples = self._dataset.find_samples_by_customer_sample_names(names)
+        barcodes = set(x[1]['barcode'] for x in accepted)
+        tubes = self._dataset.find_tubes_by_barcodes(barcodes)
+
+        created = []  # (response index, SampleTube)
+        for i, data, customer, sample_name in accepted:
+            sample = samples.get((customer, sample_name))
+            if sample:
+                data['sample'] = sample
+                status = Response.EXISTING_CUSTOMER_SAMPLE_NAME
+                responses[i] = Response(status, data)
+                continue
+            tube = tubes.get(data['barcode'])
+            if tube:
+                data['tube'] = tube
+                status = self._existing_tube_status(tube)
+                responses[i] = Response(status, data)
+                continue
+            # Later rows with the same name or barcode see this one.
+            sample = Sample(customer, sample_name)
+            tube = SampleTube(data['barcode'], sample)
+            samples[(customer, sample_name)] = sample
+            tubes[data['barcode']] = tube
+            created.append((i, tube))
+
+        if not created:
+            return responses
+
+        self._dataset.begin_transaction()
+        try:
+            self._dataset.create_sample_tubes([x[1] for x in created])
+        except Exception:
+            self._dataset.rollback_transaction()
+            LOG.exception("record_receipts(%s rows)", len(rows))
+            for i, tube in created:
+                tube.get_sample().set_sample_id(None)
+                data = responses[i].get_data()
+                responses[i] = Response(Response.UNEXPECTED_ERROR, data)
+            return responses
+        self._dataset.commit_transaction()
+
+        for i, tube in created:
+            responses[i] = Response(Response.RECORDED_SAMPLE, dict(tube=tube))
+        return responses
+
     def add_to_tube(self, sample_id, tube_barcode):
         """Adds Sample to a Tube."""
         data = dict(barcode=tube_barcode, sample_id=sample_id)
@@ -170,21 +325,10 @@ class Process(Methods):
         if not sample:
             return Response(Response.SAMPLE_NOT_FOUND, data)
 
-        sample_tube = self._dataset.find_sample_tube_by_barcode(tube_barcode)
-        if sample_tube:
-            data['tube'] = sample_tube
-            if sample_tube.is_discarded():
-                return Response(Response.DISCARDED_SAMPLE_TUBE, data)
-            else:
-                return Response(Response.EXISTING_SAMPLE_TUBE, data)
-
-        lab_tube = self._dataset.find_lab_tube_by_barcode(tube_barcode)
-        if lab_tube:
-            data['tube'] = lab_tube
-            if lab_tube.is_discarded():
-                return Response(Response.DISCARDED_LAB_TUBE, data)
-            else:
-                return Response(Response.EXISTING_LAB_TUBE, data)
+        tube = self._dataset.find_tube_by_barcode(tube_barcode)
+        if tube:
+            data['tube'] = tube
+            return Response(self._existing_tube_status(tube), data)
 
         tube = LabTube(tube_barcode, sample)
         self._dataset.begin_transaction()
@@ -213,14 +357,18 @@ class Process(Methods):
         if not sample:
             return Response(Response.SAMPLE_NOT_FOUND, data)
 
-        plate = self._dataset.find_plate_by_barcode(plate_barcode)
-        if plate:
+        # The Plate header, its count of filled Wells and the target Well;
+        # the other Wells are not loaded.
+        occupancy = self._dataset.find_plate_occupancy(plate_barcode,
+                                                       well_position)
+        if occupancy:
+            plate, filled, occupied = occupancy
             data['plate_grid'] = plate.get_grid()
-            if plate.is_full():
+            if filled >= plate.get_capacity():
                 return Response(Response.PLATE_IS_FULL, data)
             if not plate.well_in_range(well_position):
                 return Response(Response.WELL_OUT_OF_RANGE, data)
-            if not plate.well_is_empty(well_position):
+            if occupied:
                 return Response(Response.WELL_NOT_EMPTY, data)
 
             well = Well(well_position, sample)
@@ -257,6 +405,102 @@ class Process(Methods):
         data['well'] = well
         return Response(Response.ADDED_SAMPLE_TO_PLATE, data)
 
+    def add_to_plate_map(self, plate_barcode, rows, grid=None):
+        """Adds Samples to Plate Wells from rows of sample_id and
+        well_position, for example a plate map of a 96 or 384-well layout.
+        A new Plate has grid, one of GridLayout.standard_grids, or the
+        default grid; the grid of an existing Plate is kept. The Plate is
+        loaded once, every Well is validated in memory, and the Wells are
+        created in one transaction. Returns a list of Responses, one for
+        each row."""
+        rows = list(rows)
+        responses = []
+        if not Plate.validate_barcode_format(plate_barcode):
+            status = Response.INVALID_PLATE_BARCODE
+        elif grid is not None and grid not in GridLayout.standard_grids:
+            status = Response.INVALID_GRID
+        else:
+            status = None
+        if status is not None:
+            for sample_id, well_position in rows:
+                data = dict(sample_id=sample_id, plate_barcode=plate_barcode,
+                            well_position=well_position)
+                if status == Response.INVALID_GRID:
+                    data['plate_grid'] = grid
+                    data['grids'] = ', '.join(GridLayout.standard_grids)
+                responses.append(Response(status, data))
+            return responses
+
+        plate = self._dataset.find_plate_by_barcode(plate_barcode)
+        is_new = plate is None
+        if is_new:
+            plate = Plate(plate_barcode, grid)
+        samples = self._dataset.find_samples_by_sample_ids(
+            set(Sample.parse_sample_id(x[0]) for x in rows) - {None})
+
+        capacity = plate.get_capacity()
+        filled = plate.get_filled_count()
+        wells = {}  # Wells to create by label
+        created = []  # (response index, Well)
+        for sample_id, well_position in rows:
+            data = dict(sample_id=sample_id, plate_barcode=plate_barcode,
+                        well_position=well_position,
+                        plate_grid=plate.get_grid())
+            sample = samples.get(Sample.parse_sample_id(sample_id))
+            if not Plate.validate_well_label_format(well_position):
+                status = Response.INVALID_WELL_POSITION
+            elif not sample:
+                status = Response.SAMPLE_NOT_FOUND
+            elif filled + len(wells) >= capacity:
+                status = Response.PLATE_IS_FULL
+            elif not plate.well_in_range(well_position):
+                status = Response.WELL_OUT_OF_RANGE
+            elif (well_position in wells or
+                  not plate.well_is_empty(well_position)):
+                status = Response.WELL_NOT_EMPTY
+            else:
+                well = Well(well_position, sample)
+                wells[well_position] = well
+                created.append((len(responses), well))
+                data['well'] = well
+                status = Response.ADDED_SAMPLE_TO_PLATE
+            responses.append(Response(status, data))
+
+        if not created:
+            return responses
+
+        self._dataset.begin_transaction()
+        try:
+            if is_new:
+                for i, well in created:
+                    plate.add_well(well)
+                self._dataset.create_plate(plate)
+            else:
+                self._dataset.create_wells(plate, [x[1] for x in created])
+        except Exception:
+            self._dataset.rollback_transaction()
+            LOG.exception("add_to_plate_map('%s', %s rows)", plate_barcode,
+                          len(rows))
+            for i, well in created:
+                data = responses[i].get_data()
+                del data['well']
+                responses[i] = Response(Response.UNEXPECTED_ERROR, data)
+            return responses
+        self._dataset.commit_transaction()
+        return responses
+
+    @classmethod
+    def _parse_page_size(cls, limit):
+        """Returns limit as a page size from 1 to max_page_size, or None if
+        it is not one."""
+        try:
+            size = int(limit)
+        except (TypeError, ValueError):
+            return None
+        if 0 < size <= cls.max_page_size:
+            return size
+        return None
+
     def tube_transfer(self, source_tube_barcode, destination_tube_barcode):
         """Moves Sample from source Tube to destination Tube."""
         data = dict(source_tube_barcode=source_tube_barcode,
@@ -266,15 +510,16 @@ class Process(Methods):
         if not Tube.validate_barcode_format(destination_tube_barcode):
             return Response(Response.INVALID_DESTINATION_TUBE_BARCODE, data)
 
-        source = self._dataset.find_tube_by_barcode(source_tube_barcode)
+        tubes = self._dataset.find_tubes_by_barcodes(
+            [source_tube_barcode, destination_tube_barcode])
+        source = tubes.get(source_tube_barcode)
         if not source:
             return Response(Response.SOURCE_TUBE_NOT_FOUND, data)
         data['source_tube'] = source
         if source.is_discarded():
             return Response(Response.DISCARDED_SOURCE_TUBE, data)
 
-        destination = self._dataset.find_tube_by_barcode(
-            destination_tube_barcode)
+        destination = tubes.get(destination_tube_barcode)
         if destination:
             data['destination_tube'] = destination
             if destination.is_discarded():
@@ -299,6 +544,81 @@ class Process(Methods):
         data['destination_tube'] = destination
         return Response(Response.MOVED_SAMPLE, data)
 
+    def tube_transfers(self, rows):
+        """Moves Samples from source Tubes to destination Tubes from rows of
+        source_tube_barcode and destination_tube_barcode, for example a
+        re-racking of 96 tubes. All barcodes are resolved with set queries,
+        conflicts within the rows are detected in memory, and all transfers
+        are applied in one transaction. Returns a list of Responses, one for
+        each row.
+
+        A source that is the destination of an earlier row is a chained
+        transfer; it is rejected so that the transfers can be applied
+        together.
+        """
+        rows = list(rows)
+        barcodes = set()
+        for row in rows:
+            barcodes.update(x for x in row if Tube.validate_barcode_format(x))
+        tubes = self._dataset.find_tubes_by_barcodes(barcodes)
+
+        responses = []
+        moved = set()  # source barcodes transferred by earlier rows
+        destinations = {}  # destination Tubes of earlier rows by barcode
+        created = []  # (response index, source Tube, destination Tube)
+        for source_tube_barcode, destination_tube_barcode in rows:
+            data = dict(source_tube_barcode=source_tube_barcode,
+                        destination_tube_barcode=destination_tube_barcode)
+            source = tubes.get(source_tube_barcode)
+            destination = (tubes.get(destination_tube_barcode) or
+                           destinations.get(destination_tube_barcode))
+            if source:
+                data['source_tube'] = source
+            if destination:
+                data['destination_tube'] = destination
+            if not Tube.validate_barcode_format(source_tube_barcode):
+                status = Response.INVALID_SOURCE_TUBE_BARCODE
+            elif not Tube.validate_barcode_format(destination_tube_barcode):
+                status = Response.INVALID_DESTINATION_TUBE_BARCODE
+            elif source_tube_barcode in destinations:
+                status = Response.CHAINED_TRANSFER
+            elif not source:
+                status = Response.SOURCE_TUBE_NOT_FOUND
+            elif source.is_discarded() or source_tube_barcode in moved:
+                status = Response.DISCARDED_SOURCE_TUBE
+            elif destination and destination.is_discarded():
+                status = Response.DISCARDED_DESTINATION_TUBE
+            elif destination:
+                status = Response.DESTINATION_TUBE_NOT_EMPTY
+            else:
+                if isinstance(source, SampleTube):
+                    destination = SampleTube(destination_tube_barcode)
+                else:
+                    destination = LabTube(destination_tube_barcode)
+                data['destination_tube'] = destination
+                moved.add(source_tube_barcode)
+                destinations[destination_tube_barcode] = destination
+                created.append((len(responses), source, destination))
+                status = Response.MOVED_SAMPLE
+            responses.append(Response(status, data))
+
+        if not created:
+            return responses
+
+        self._dataset.begin_transaction()
+        try:
+            self._dataset.move_samples([x[1:] for x in created])
+        except Exception:
+            self._dataset.rollback_transaction()
+            LOG.exception("tube_transfers(%s rows)", len(rows))
+            for i, source, destination in created:
+                data = responses[i].get_data()
+                del data['destination_tube']
+                responses[i] = Response(Response.UNEXPECTED_ERROR, data)
+            return responses
+        self._dataset.commit_transaction()
+        return responses
+
     def list_samples_in(self, container_barcode):
         """Lists Samples in Container."""
         data = dict(barcode=container_barcode)
@@ -307,23 +627,20 @@ class Process(Methods):
             if not Tube.validate_barcode_format(container_barcode):
                 return Response(Response.INVALID_TUBE_BARCODE, data)
 
-            tube = self._dataset.find_sample_tube_by_barcode(container_barcode)
-            if tube:
-                data['result'] = tube
+            tube = self._dataset.find_tube_by_barcode(container_barcode)
+            if not tube:
+                return Response(Response.TUBE_NOT_FOUND, data)
+            data['result'] = tube
+            if isinstance(tube, SampleTube):
                 if tube.is_discarded():
                     return Response(Response.FOUND_DISCARDED_SAMPLE_TUBE, data)
                 else:
                     return Response(Response.FOUND_SAMPLE_TUBE, data)
             else:
-                tube = self._dataset.find_lab_tube_by_barcode(container_barcode)
-                if tube:
-                    data['result'] = tube
-                    if tube.is_discarded():
-                        return Response(Response.FOUND_DISCARDED_LAB_TUBE, data)
-                    else:
-                        return Response(Response.FOUND_LAB_TUBE, data)
+                if tube.is_discarded():
+                    return Response(Response.FOUND_DISCARDED_LAB_TUBE, data)
                 else:
-                    return Response(Response.TUBE_NOT_FOUND, data)
+                    return Response(Response.FOUND_LAB_TUBE, data)
 
         elif container_barcode.startswith(Plate.barcode_prefix):
             data['plate_barcode'] = container_barcode
@@ -340,6 +657,68 @@ class Process(Methods):
             data['prefix'] = container_barcode[:2]
             return Response(Response.INVALID_BARCODE_PREFIX, data)
 
+    def where_is(self, sample_id):
+        """Lists Tubes and Plate Wells holding Sample."""
+        data = dict(sample_id=sample_id)
+        sample = self._dataset.find_sample_by_sample_id(sample_id)
+        if not sample:
+            return Response(Response.SAMPLE_NOT_FOUND, data)
+        data['sample'] = sample
+        containers = self._dataset.find_containers_by_sample_id(
+            sample.get_sample_id())
+        data['result'] = containers
+        return Response(Response.FOUND_SAMPLE_CONTAINERS, data)
+
+    def list_samples_by_customer(self, customer, after=None, limit=None,
+                                 order=None):
+        """Lists a page of the Samples of customer, in order of name or
+        sample_id, after the name or sample_id that ended the previous page.
+        The Response has the key of the next page, or reports the last
+        page."""
+        data = dict(customer=customer, max_limit=self.max_page_size)
+        order = order or 'name'
+        if order not in ('name', 'sample_id'):
+            data.update(parameter='order', value=order)
+            return Response(Response.INVALID_PAGE, data)
+        size = self._parse_page_size(limit) if limit else self.page_size
+        if size is None:
+            data.update(parameter='limit', value=limit)
+            return Response(Response.INVALID_PAGE, data)
+        key = after or None
+        if key is not None and order == 'sample_id':
+            key = Sample.parse_sample_id(after)
+            if key is None:
+                data.update(parameter='after', value=after)
+                return Response(Response.INVALID_PAGE, data)
+
+        # One more Sample than the page tells whether there is a next page.
+        samples = self._dataset.find_samples_by_customer(
+            customer, key, size + 1, order)
+        if not samples and key is None:
+            return Response(Response.CUSTOMER_NOT_FOUND, data)
+        data['result'] = samples[:size]
+        if len(samples) <= size:
+            return Response(Response.FOUND_LAST_CUSTOMER_SAMPLES, data)
+        last = samples[size - 1]
+        if order == 'name':
+            data['next'] = last.get_name()
+        else:
+            data['next'] = last.get_sample_id()
+        return Response(Response.FOUND_CUSTOMER_SAMPLES, data)
+
+    def lineage(self, tube_barcode):
+        """Lists Tubes that the Sample of a Tube moved through, in order of
+        transfers, and its current Tube."""
+        data = dict(barcode=tube_barcode)
+        if not Tube.validate_barcode_format(tube_barcode):
+            return Response(Response.INVALID_TUBE_BARCODE, data)
+        tubes = self._dataset.find_lineage_by_barcode(tube_barcode)
+        if not tubes:
+            return Response(Response.TUBE_NOT_FOUND, data)
+        data['result'] = tubes
+        data['current'] = tubes[-1]
+        return Response(Response.FOUND_LINEAGE, data)
+
     def tag(self, sample_id, tag):
         """Applies tag to Sample."""
         data = dict(sample_id=sample_id, tag=tag)
@@ -361,7 +740,56 @@ class Process(Methods):
         self._dataset.commit_transaction()
         return Response(Response.TAGGED_SAMPLE, data)
 
+    def tags(self, rows):
+        """Applies tags to Samples from rows of sample_id and tag, for example
+        an index kit assignment of a plate. Tags are validated in one pass,
+        Samples are found with chunked queries, and the tags are applied in
+        one transaction. Returns a list of Responses, one for each row."""
+        rows = list(rows)
+        valid = [Sample.validate_tag_format(tag) for sample_id, tag in rows]
+        sample_ids = set(Sample.parse_sample_id(row[0])
+                         for row, ok in zip(rows, valid) if ok)
+        samples = self._dataset.find_samples_by_sample_ids(
+            sample_ids - {None})
+
+        responses = []
+        tagged = []  # (response index, Sample, tag)
+        for (sample_id, tag), ok in zip(rows, valid):
+            data = dict(sample_id=sample_id, tag=tag)
+            sample = samples.get(Sample.parse_sample_id(sample_id))
+            if not ok:
+                status = Response.INVALID_TAG
+            elif not sample:
+                status = Response.SAMPLE_NOT_FOUND
+            elif sample.get_tag() is not None:
+                data['sample'] = sample
+                status = Response.ALREADY_TAGGED
+            else:
+                data['sample'] = sample
+                sample.set_tag(tag)  # Later rows see the Sample as tagged.
+                tagged.append((len(responses), sample, tag))
+                status = Response.TAGGED_SAMPLE
+            responses.append(Response(status, data))
+
+        if not tagged:
+            return responses
+
+        self._dataset.begin_transaction()
+        try:
+            self._dataset.update_sample_tags([x[1:] for x in tagged])
+        except Exception:
+            self._dataset.rollback_transaction()
+            LOG.exception("tags(%s rows)", len(rows))
+            for i, sample, tag in tagged:
+                sample.set_tag(None)
+                data = responses[i].get_data()
+                responses[i] = Response(Response.UNEXPECTED_ERROR, data)
+            return responses
+        self._dataset.commit_transaction()
+        return responses
+
     def update_concentration(self, sample_id, value):
+        """Sets concentration of Sample."""
         data = dict(sample_id=sample_id, concentration=value)
         if not Sample.validate_concentration(value):
             return Response(Response.INVALID_SAMPLE_CONCENTRATION, data)
@@ -370,13 +798,145 @@ class Process(Methods):
         if not sample:
             return Response(Response.SAMPLE_NOT_FOUND, data)
 
+        self._dataset.begin_transaction()
         try:
             self._dataset.update_sample_concentration(sample, value)
         except Exception:
             self._dataset.rollback_transaction()
-            LOG.exception("tag(%s, '%s')", sample_id, value)
+            LOG.exception("update_concentration(%s, '%s')", sample_id, value)
             return Response(Response.UNEXPECTED_ERROR, data)
         self._dataset.commit_transaction()
 
         data['sample'] = sample
         return Response(Response.UPDATED_SAMPLE_CONCENTRATION, data)
+
+    def update_concentrations(self, plate_barcode, rows):
+        """Sets concentrations of Samples in Plate Wells from rows of
+        well_position and concentration, for example a plate reader file.
+        Wells are mapped to Samples through the Plate, values are validated
+        in one pass, and all values are written in one transaction. Returns a
+        list of Responses, one for each row."""
+        rows = list(rows)
+        valid = [Sample.validate_concentration(value) for label, value in rows]
+
+        plate = None
+        status = None
+        if not Plate.validate_barcode_format(plate_barcode):
+            status = Response.INVALID_PLATE_BARCODE
+        else:
+            plate = self._dataset.find_plate_by_barcode(plate_barcode)
+            if not plate:
+                status = Response.PLATE_NOT_FOUND
+        if status:
+            return [Response(status, dict(plate_barcode=plate_barcode,
+                                          well_position=label,
+                                          concentration=value))
+                    for label, value in rows]
+
+        samples = dict((x.get_label(), x.get_sample())
+                       for x in plate.get_wells())
+        responses = []
+        updated = []  # (response index, Sample, concentration)
+        for (label, value), ok in zip(rows, valid):
+            data = dict(plate_barcode=plate_barcode, well_position=label,
+                        concentration=value, plate_grid=plate.get_grid())
+            sample = samples.get(label)
+            if not Plate.validate_well_label_format(label):
+                status = Response.INVALID_WELL_POSITION
+            elif not ok:
+                status = Response.INVALID_SAMPLE_CONCENTRATION
+            elif not plate.well_in_range(label):
+                status = Response.WELL_OUT_OF_RANGE
+            elif not sample:
+                status = Response.EMPTY_WELL
+            else:
+                data['sample'] = sample
+                updated.append((len(responses), sample, int(value)))
+                status = Response.UPDATED_SAMPLE_CONCENTRATION
+            responses.append(Response(status, data))
+
+        if not updated:
+            return responses
+
+        self._dataset.begin_transaction()
+        try:
+            self._dataset.update_sample_concentrations(
+                [x[1:] for x in updated])
+        except Exception:
+            self._dataset.rollback_transaction()
+            LOG.exception("update_concentrations('%s', %s rows)",
+                          plate_barcode, len(rows))
+            for i, sample, value in updated:
+                data = responses[i].get_data()
+                del data['sample']
+                responses[i] = Response(Response.UNEXPECTED_ERROR, data)
+            return responses
+        self._dataset.commit_transaction()
+        return responses
+
+    def export_samples(self, file_format, filename, customer=None,
+                       tagged=None, min_concentration=None,
+                       max_concentration=None):
+        """Exports Samples with their current Containers and Wells to a CSV
+        or JSONL file, optionally only those of a customer, with or without
+        a tag (yes or no), or with a concentration in a range. Rows are
+        streamed from the database to the file in chunks within one read
+        transaction, so memory does not grow with the number of Samples."""
+        data = dict(format=file_format, filename=filename)
+        writer = export.formats.get(file_format)
+        if writer is None:
+            data['formats'] = ', '.join(export.formats)
+            return Response(Response.INVALID_EXPORT_FORMAT, data)
+
+        filters = dict(customer=customer or None)
+        for name, value in (('tagged', tagged),
+                            ('min_concentration', min_concentration),
+                            ('max_concentration', max_concentration)):
+            if value in (None, ''):
+                filters[name] = None
+                continue
+            try:
+                if name == 'tagged':
+                    filters[name] = dict(yes=True, no=False)[value]
+                else:
+                    filters[name] = int(value)
+            except (KeyError, ValueError):
+                data.update(filter=name, value=value)
+                return Response(Response.INVALID_FILTER, data)
+
+        start = time.perf_counter()
+        # Rows are written to a temporary file in the same directory, which
+        # replaces filename only when the export completes.
+        try:
+            fd, temp = tempfile.mkstemp(
+                dir=os.path.dirname(os.path.abspath(filename)),
+                prefix='.%s.' % os.path.basename(filename), suffix='.tmp')
+        except OSError:
+            return Response(Response.CANNOT_WRITE_FILE, data)
+        self._dataset.begin_savepoint('export')
+        try:
+            with open(fd, 'w', newline='', encoding='utf-8') as fp:
+                rows = self._dataset.iter_sample_locations(**filters)
+                count = writer(fp, rows)
+            os.replace(temp, filename)
+        except OSError:
+            self._remove(temp)
+            return Response(Response.CANNOT_WRITE_FILE, data)
+        except Exception:
+            self._remove(temp)
+            LOG.exception("export_samples(%s, '%s')", file_format, filename)
+            return Response(Response.UNEXPECTED_ERROR, data)
+        finally:
+            self._dataset.release_savepoint('export')
+        elapsed = time.perf_counter() - start
+        data['count'] = count
+        data['rows_per_second'] = int(count / elapsed) if elapsed else count
+        return Response(Response.EXPORTED_SAMPLES, data)
+
+    @staticmethod
+    def _remove(filename):
+        """Removes filename if it exists."""
+        try:
+            os.remove(filename)
+        except OSError:
+            pass
@@ -0,0 +1,356 @@
+"""Unit of Work."""
+
+import logging
+
+from .dba import DataSet
+from .lab import Sample, SampleTube, LabTube
+
+LOG = logging.getLogger(__name__)
+
+
+class Session:
+    """Provides access to DataSet through an identity map and a unit of work.
+
+    Session is opt-in: pass it to Process in place of DataSet. Shell, the
+    daemon and the HTTP API use DataSet directly; the asyncio Service uses
+    a Session on its writer thread to group writes (see aio.Service).
+
+    The identity map keeps one Sample, Tube and Plate instance for each
+    primary key while the Session lives, so repeated lookups through the
+    same Session return the same instance without querying the database
+    again. It is emptied on rollback, and by clear().
+
+    A unit of work, started with begin() or a with statement, groups the
+    writes of many commands into one transaction with one commit. Writes
+    are still executed on the connection as they happen; transactions that
+    Process begins inside the unit become savepoints, so a failed command
+    only rolls back its own savepoint and the others commit with the unit.
+    """
+
+    def __init__(self, dataset=None):
+        """Initialises Session using DataSet."""
+        if dataset is None:
+            dataset = DataSet()  # default
+        self._dataset = dataset
+        self._samples = {}  # Samples by sample_id
+        self._names = {}  # Samples by (customer, name)
+        self._tubes = {}  # SampleTubes and LabTubes by barcode
+        self._plates = {}  # Plates by barcode
+        self._unit = False  # True while a unit of work is active
+        self._savepoints = []  # Savepoint names of Process transactions
+        self._counter = 0  # For unique savepoint names
+
+    def __getattr__(self, name):
+        """Delegates other calls to DataSet."""
+        return getattr(self._dataset, name)
+
+    def __enter__(self):
+        """Begins a unit of work."""
+        self.begin()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Commits the unit of work, or rolls it back after an exception."""
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+        return False
+
+    def get_dataset(self):
+        """Returns DataSet of this Session."""
+        return self._dataset
+
+    def clear(self):
+        """Empties the identity map."""
+        self._samples.clear()
+        self._names.clear()
+        self._tubes.clear()
+        self._plates.clear()
+
+    # Unit of work
+
+    def begin(self):
+        """Begins a unit of work."""
+        if self._unit:
+            raise RuntimeError("Unit of work already active.")
+        self._unit = True
+        # The outer savepoint starts the transaction, so that releasing the
+        # savepoints of Process transactions does not commit it.
+        self._dataset.begin_transaction()
+        self._dataset.begin_savepoint('session_unit')
+
+    def commit(self):
+        """Commits the writes of the unit of work in one transaction, and
+        ends the unit of work."""
+        try:
+            self._dataset.commit_transaction()
+        finally:
+            self._end()
+
+    def rollback(self):
+        """Rollbacks the writes of the unit of work, and ends the unit of
+        work."""
+        try:
+            self._dataset.rollback_transaction()
+        finally:
+            self.clear()  # Instances may hold rolled back changes.
+            self._end()
+
+    def _end(self):
+        """Ends the unit of work."""
+        self._unit = False
+        self._savepoints = []
+
+    def in_unit(self):
+        """Returns True if a unit of work is active."""
+        return self._unit
+
+    def begin_transaction(self):
+        """Begins a transaction, or a savepoint inside a unit of work."""
+        if not self._unit:
+            return self._dataset.begin_transaction()
+        self._counter += 1
+        name = 'session_%d' % self._counter
+        self._dataset.begin_savepoint(name)
+        self._savepoints.append(name)
+
+    def commit_transaction(self):
+        """Commits a transaction, or releases its savepoint inside a unit of
+        work so that its changes wait for the unit to commit."""
+        if not self._unit:
+            return self._dataset.commit_transaction()
+        self._dataset.release_savepoint(self._savepoints.pop())
+
+    def rollback_transaction(self):
+        """Rollbacks a transaction, or its savepoint inside a unit of work.
+        The identity map is emptied because instances may hold rolled back
+        changes."""
+        self.clear()
+        if not self._unit:
+            return self._dataset.rollback_transaction()
+        self._dataset.rollback_savepoint(self._savepoints.pop())
+
+    # Identity map
+
+    def _map_sample(self, sample):
+        """Returns the mapped instance of sample, mapping it if new."""
+        if sample is None or sample.get_sample_id() is None:
+            return sample
+        key = Sample.parse_sample_id(sample.get_sample_id())
+        mapped = self._samples.get(key)
+        if mapped is not None:
+            return mapped
+        self._samples[key] = sample
+        self._names[(sample.get_customer(), sample.get_name())] = sample
+        return sample
+
+    def _map_tube(self, tube):
+        """Returns the mapped instance of tube, mapping it and its Sample if
+        new."""
+        if tube is None:
+            return tube
+        mapped = self._tubes.get(tube.get_barcode())
+        if mapped is not None:
+            return mapped
+        tube.set_sample(self._map_sample(tube.get_sample()))
+        self._tubes[tube.get_barcode()] = tube
+        return tube
+
+    def _map_plate(self, plate):
+        """Returns the mapped instance of plate, mapping it and the Samples
+        of its Wells if new."""
+        if plate is None:
+            return plate
+        mapped = self._plates.get(plate.get_barcode())
+        if mapped is not None:
+            return mapped
+        for well in plate.get_wells():
+            well.set_sample(self._map_sample(well.get_sample()))
+        self._plates[plate.get_barcode()] = plate
+        return plate
+
+    # Finders
+
+    def find_sample_by_sample_id(self, sample_id):
+        """Finds Sample by sample_id."""
+        sample = self._samples.get(Sample.parse_sample_id(sample_id))
+        if sample is None:
+            sample = self._dataset.find_sample_by_sample_id(sample_id)
+        return self._map_sample(sample)
+
+    def find_samples_by_sample_ids(self, sample_ids):
+        """Finds Samples by sample_ids and returns a dictionary of Samples by
+        sample_id. Only unmapped Samples are queried."""
+        keys = set(Sample.parse_sample_id(x) for x in sample_ids) - {None}
+        samples = dict((x, self._samples[x]) for x in keys
+                       if x in self._samples)
+        missing = keys - set(samples)
+        if missing:
+            found = self._dataset.find_samples_by_sample_ids(missing)
+            for key, sample in found.items():
+                samples[key] = self._map_sample(sample)
+        return samples
+
+    def find_sample_by_customer_sample_name(self, customer, name):
+        """Finds Sample by customer and sample name."""
+        sample = self._names.get((customer, name))
+        if sample is None:
+            sample = self._dataset.find_sample_by_customer_sample_name(
+                customer, name)
+        return self._map_sample(sample)
+
+    def find_samples_by_customer_sample_names(self, names):
+        """Finds Samples by (customer, sample name) pairs and returns a
+        dictionary of Samples by the pairs. Only unmapped Samples are
+        queried."""
+        names = set(names)
+        samples = dict((x, self._names[x]) for x in names if x in self._names)
+        missing = names - set(samples)
+        if missing:
+            found = self._dataset.find_samples_by_customer_sample_names(
+                missing)
+            for key, sample in found.items():
+                samples[key] = self._map_sample(sample)
+        return samples
+
+    def find_tube_by_barcode(self, barcode):
+        """Finds SampleTube or LabTube by barcode."""
+        tube = self._tubes.get(barcode)
+        if tube is None:
+            tube = self._dataset.find_tube_by_barcode(barcode)
+        return self._map_tube(tube)
+
+    def find_tubes_by_barcodes(self, barcodes):
+        """Finds SampleTubes and LabTubes by barcodes and returns a
+        dictionary of Tubes by barcode. Only unmapped Tubes are queried."""
+        barcodes = set(barcodes)
+        tubes = dict((x, self._tubes[x]) for x in barcodes if x in self._tubes)
+        missing = barcodes - set(tubes)
+        if missing:
+            found = self._dataset.find_tubes_by_barcodes(missing)
+            for barcode, tube in found.items():
+                tubes[barcode] = self._map_tube(tube)
+        return tubes
+
+    def find_sample_tube_by_barcode(self, barcode):
+        """Finds SampleTube by barcode."""
+        return self.find_tube_by_kind_barcode('sample_tube', barcode)
+
+    def find_lab_tube_by_barcode(self, barcode):
+        """Finds LabTube by barcode."""
+        return self.find_tube_by_kind_barcode('lab_tube', barcode)
+
+    def find_tube_by_kind_barcode(self, kind, barcode):
+        """Finds Tube by kind (sample_tube or lab_tube) and barcode."""
+        cls = SampleTube if kind == 'sample_tube' else LabTube
+        tube = self._tubes.get(barcode)
+        if tube is None:
+            tube = self._dataset.find_tube_by_kind_barcode(kind, barcode)
+            tube = self._map_tube(tube)
+        if isinstance(tube, cls):
+            return tube
+
+    def find_plate_by_barcode(self, barcode):
+        """Finds Plate by barcode, together with its Wells."""
+        plate = self._plates.get(barcode)
+        if plate is None:
+            plate = self._dataset.find_plate_by_barcode(barcode)
+        return self._map_plate(plate)
+
+    def find_plate_occupancy(self, barcode, label):
+        """Finds the occupancy of Plate from its mapped instance, or from
+        DataSet without mapping the Plate, since it has no Wells."""
+        plate = self._plates.get(barcode)
+        if plate is None:
+            return self._dataset.find_plate_occupancy(barcode, label)
+        return (plate, plate.get_filled_count(),
+                not plate.well_is_empty(label))
+
+    # Writes
+
+    def create_sample_tube(self, tube):
+        """Creates SampleTube and its Sample, and maps them."""
+        self._dataset.create_sample_tube(tube)
+        self._map_tube(tube)
+
+    def create_sample_tubes(self, tubes):
+        """Creates SampleTubes and their Samples in bulk, and maps them."""
+        tubes = list(tubes)
+        self._dataset.create_sample_tubes(tubes)
+        for tube in tubes:
+            self._map_tube(tube)
+
+    def create_lab_tube(self, tube):
+        """Creates LabTube and maps it."""
+        self._dataset.create_lab_tube(tube)
+        self._map_tube(tube)
+
+    def move_sample(self, source, destination):
+        """Transfers Sample from source Tube to destination Tube, and maps
+        both Tubes."""
+        self._dataset.move_sample(source, destination)
+        self._tubes[source.get_barcode()] = source
+        self._map_tube(destination)
+
+    def move_samples(self, pairs):
+        """Transfers Samples in bulk, and maps the Tubes."""
+        pairs = list(pairs)
+        self._dataset.move_samples(pairs)
+        for source, destination in pairs:
+            self._tubes[source.get_barcode()] = source
+            self._map_tube(destination)
+
+    def update_sample_tag(self, sample, tag):
+        """Updates tag of Sample, and maps it."""
+        self._dataset.update_sample_tag(sample, tag)
+        self._map_sample(sample)
+
+    def update_sample_tags(self, pairs):
+        """Updates tags of Samples in bulk, and maps them."""
+        pairs = list(pairs)
+        self._dataset.update_sample_tags(pairs)
+        for sample, tag in pairs:
+            self._map_sample(sample)
+
+    def update_sample_concentration(self, sample, value):
+        """Updates concentration of Sample, and maps it."""
+        self._dataset.update_sample_concentration(sample, value)
+        self._map_sample(sample)
+
+    def update_sample_concentrations(self, pairs):
+        """Updates concentrations of Samples in bulk, and maps them."""
+        pairs = list(pairs)
+        self._dataset.update_sample_concentrations(pairs)
+        for sample, value in pairs:
+            self._map_sample(sample)
+
+    def create_plate(self, plate):
+        """Creates Plate and its Wells, and maps it."""
+        self._dataset.create_plate(plate)
+        self._map_plate(plate)
+
+    def create_well(self, plate, well):
+        """Creates Well and adds it to Plate. A different mapped instance of
+        the Plate is forgotten, since it does not have the Well."""
+        self._dataset.create_well(plate, well)
+        self._forget_other_plate(plate)
+
+    def create_wells(self, plate, wells):
+        """Creates Wells in bulk and adds them to Plate."""
+        self._dataset.create_wells(plate, wells)
+        self._forget_other_plate(plate)
+
+    def _forget_other_plate(self, plate):
+        """Forgets a mapped instance other than plate with its barcode.
+        plate is not mapped instead, since it may have only some of the
+        Wells, as Plates of find_plate_occupancy."""
+        mapped = self._plates.get(plate.get_barcode())
+        if mapped is not plate:
+            self._plates.pop(plate.get_barcode(), None)
+
+    def _reset_tables(self):
+        """Empties the identity map, and truncates tables of the underlying
+        database."""
+        self.clear()
+        return self._dataset._reset_tables()
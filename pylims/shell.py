@@ -1,11 +1,14 @@
 """User Interface."""
+import contextlib
+import csv
 import logging
 import logging.config
 
 from string import Template
 
 from . import config
-from .process import Process
+from .dba import SchemaError
+from .process import Process, Response
 from .lab import Sample
 
 LOG = logging.getLogger(__name__)
@@ -17,6 +20,12 @@ RECORD_RECEIPT_HELP = """record_receipt <customer_sample_name> <tube_barcode>
     customer_sample_name format is <customer_name>-<sample_name>. 
     Example: record_receipt customer1-sample1 NT00001
 """
+RECORD_RECEIPTS_HELP = """record_receipts <manifest_file>
+    Records customer samples from a CSV or TSV manifest file with
+    customer_sample_name and tube_barcode columns. Prints a report for each
+    row and a summary.
+    Example: record_receipts manifest.csv
+"""
 ADD_TO_TUBE_HELP = """add_to_tube <sample_id> <tube_barcode>
     Records addition of a sample to a tube.
     Example: add_to_tube 12345 NT00002
@@ -25,19 +34,70 @@ ADD_TO_PLATE_HELP = """add_to_plate <sample_id> <plate_barcode> <well_position>
     Records addition of a sample to a plate.
     Example: add_to_plate 12345 DN00001 A1
 """
+ADD_TO_PLATE_MAP_HELP = """\
+add_to_plate_map <plate_barcode> <plate_map_file> [grid=<rows>x<columns>]
+    Records addition of samples to a plate from a CSV or TSV plate map file
+    with sample_id and well_position columns. Prints a report for each row
+    and a summary. A new plate has the grid, 8x12 by default, one of 2x3,
+    4x6, 6x8, 8x12, 16x24 and 32x48 for 6 to 1536 wells.
+    Example: add_to_plate_map DN00001 plate_map.csv grid=32x48
+"""
 TUBE_TRANSFER_HELP = """\
 tube_transfer <source_tube_barcode> <destination_tube_barcode>
     Records transferring a sample to another tube.
     Example: tube_transfer NT00001 NT00003
 """
+TUBE_TRANSFERS_HELP = """tube_transfers <transfer_file>
+    Records transferring samples to other tubes from a CSV or TSV file with
+    source_tube_barcode and destination_tube_barcode columns. Prints a
+    report for each row and a summary.
+    Example: tube_transfers rack.csv
+"""
 LIST_SAMPLES_IN_HELP = """list_samples_in <container_barcode>
     Reports information about samples in tubes or plates.
     Example: list_samples_in DN00004
 """
+WHERE_IS_HELP = """where_is <sample_id>
+    Reports the tubes and plate wells that hold a sample.
+    Example: where_is 12345
+"""
+LIST_SAMPLES_BY_CUSTOMER_HELP = """\
+list_samples_by_customer <customer> [after=<key>] [limit=<count>] \
+[order=name|sample_id]
+    Reports a page of the samples of a customer in order of sample name or
+    sample_id; 100 by default. The next page starts after the key reported
+    at the end of the page.
+    Example: list_samples_by_customer customer1 after=sample100
+"""
+LINEAGE_HELP = """lineage <tube_barcode>
+    Reports the tubes a sample moved through by tube transfers, in order,
+    and the tube that holds it now.
+    Example: lineage NT00002
+"""
 TAG_HELP = """tag <sample_id> <tag>
     Appends a tag to a sample. 
     Example: tag 12345 ATTGGCAT
 """
+TAGS_HELP = """tags <tag_file>
+    Appends tags to samples from a CSV or TSV file with sample_id and tag
+    columns, for example an index kit assignment. Prints a report for each
+    row and a summary.
+    Example: tags index_kit.csv
+"""
+UPDATE_CONCENTRATIONS_HELP = """\
+update_concentrations <plate_barcode> <reader_file>
+    Updates concentrations of samples on a plate from a CSV or TSV plate
+    reader file with well_position and concentration columns. Prints a
+    report for each row and a summary.
+    Example: update_concentrations DN00001 reader.csv
+"""
+EXPORT_SAMPLES_HELP = """export_samples <format> <export_file> [<option>=<value>...]
+    Exports every sample with its current tubes and plate wells to a csv or
+    jsonl file, one row per container. Options filter the samples:
+    customer=<customer>, tagged=yes|no, min_concentration=<value> and
+    max_concentration=<value>.
+    Example: export_samples csv samples.csv customer=customer1 tagged=yes
+"""
 
 HELP = """Labware & Containers LIMS
 Usage: python3 lims.py <command> [args...]
@@ -45,11 +105,20 @@ Usage: python3 lims.py <command> [args...]
 where commands and their arguments are:
 
 %(RECORD_RECEIPT_HELP)s
+%(RECORD_RECEIPTS_HELP)s
 %(ADD_TO_TUBE_HELP)s
 %(ADD_TO_PLATE_HELP)s
+%(ADD_TO_PLATE_MAP_HELP)s
 %(TUBE_TRANSFER_HELP)s
+%(TUBE_TRANSFERS_HELP)s
 %(LIST_SAMPLES_IN_HELP)s
-%(TAG_HELP)s""" % globals()
+%(WHERE_IS_HELP)s
+%(LIST_SAMPLES_BY_CUSTOMER_HELP)s
+%(LINEAGE_HELP)s
+%(TAG_HELP)s
+%(TAGS_HELP)s
+%(UPDATE_CONCENTRATIONS_HELP)s
+%(EXPORT_SAMPLES_HELP)s""" % globals()
 
 # Output templates
 
@@ -64,6 +133,19 @@ Run the application without arguments for help.
 INCORRECT_NUMBER_OF_PARAMS_TEMP = """\
 Incorrect number of arguments for command: %s
 """
+CANNOT_READ_FILE_TEMP = """Cannot read file: %s
+"""
+CANNOT_PARSE_FILE_TEMP = """Cannot parse file: %s
+Files must be CSV or TSV text in UTF-8. No rows were processed.
+"""
+BATCH_SUMMARY_TEMP = """Processed %d rows: %d succeeded, %d failed.
+"""
+OUTDATED_SCHEMA_TEMP = """Database schema is out of date: version %d of %d
+Please upgrade it with: python3 lims.py migrate
+"""
+INVALID_OPTION_TEMP = """Invalid option for command %s: %s
+Options are <name>=<value> where name is one of: %s
+"""
 
 # response templates
 
@@ -137,12 +219,17 @@ MOVED_SAMPLE_TEMP = """Moved sample successfully
 Source: ${source_tube}
 Destination: ${destination_tube}
 """
+CHAINED_TRANSFER_TEMP = """Chained transfer: ${source_tube_barcode}
+The source tube is the destination of an earlier transfer in the same file. \
+Please transfer it separately.
+"""
 INVALID_PLATE_BARCODE_TEMP = """Invalid plate barcode: ${plate_barcode}
 Plate barcode must be in DN<number> format where <number> is padded with zeros.
 """
 INVALID_WELL_POSITION_TEMP = """Invalid well position: ${well_position}
-Well labels are in <letter><number> format, where <letter> denotes the row and
-<number> denotes the column on a plate, for example, A1. Please check label.
+Well labels are in <letters><number> format, where <letters> denote the row,
+A to Z and then AA to AF on 1536-well plates, and <number> denotes the column
+on a plate, for example, A1. Please check label.
 """
 WELL_OUT_OF_RANGE_TEMP = """Plate well out of range: ${well_position}
 Plate: Barcode: ${plate_barcode}, Grid: ${plate_grid}
@@ -159,6 +246,9 @@ ${well}
 PLATE_IS_FULL_TEMP = """Plate is full
 Plate: Barcode: ${plate_barcode}, Grid: ${plate_grid}
 """
+INVALID_GRID_TEMP = """Invalid grid: ${plate_grid}
+Plate grids are ${grids}.
+"""
 INVALID_TAG_TEMP = """Invalid tag: ${tag}
 Tag can contain only the letters A, G, C and T. Please check sequence.
 """
@@ -171,9 +261,14 @@ ${sample}
 UPDATED_SAMPLE_CONCENTRATION_TEMP = """Updated sample concentration successfully
 ${sample}
 """
-INVALID_SAMPLE_CONCENTRATION_TEMP = """Invalid concentration value: {value}
+INVALID_SAMPLE_CONCENTRATION_TEMP = """\
+Invalid concentration value: ${concentration}
 The value must be between 50 and 200 inclusive.
 """
+EMPTY_WELL_TEMP = """Empty well: ${well_position}
+Plate: Barcode: ${plate_barcode}, Grid: ${plate_grid}
+Please check well position.
+"""
 
 FOUND_DISCARDED_SAMPLE_TUBE_TEMP = """Found discarded sample tube
 ${result}
@@ -194,9 +289,43 @@ ${result}
 """
 PLATE_NOT_FOUND_TEMP = """Plate not found
 """
+FOUND_SAMPLE_CONTAINERS_TEMP = """Found sample containers
+${sample}
+${result}
+"""
+FOUND_LINEAGE_TEMP = """Found lineage
+${result}
+Current location: ${current}
+"""
 INVALID_BARCODE_PREFIX_TEMP = """Invalid barcode prefix ${prefix}
 Barcode prefixes are NT for tubes and DN for plates.
 """
+CUSTOMER_NOT_FOUND_TEMP = """Customer not found: ${customer}
+"""
+INVALID_PAGE_TEMP = """Invalid page: ${parameter}=${value}
+order is name or sample_id, limit is a number from 1 to ${max_limit}, and
+after is a sample_id when order is sample_id.
+"""
+FOUND_CUSTOMER_SAMPLES_TEMP = """Found customer samples: ${customer}
+${result}
+Next page: after=${next}
+"""
+FOUND_LAST_CUSTOMER_SAMPLES_TEMP = """Found customer samples: ${customer}
+${result}
+Last page
+"""
+INVALID_EXPORT_FORMAT_TEMP = """Invalid export format: ${format}
+Export formats are ${formats}.
+"""
+INVALID_FILTER_TEMP = """Invalid filter: ${filter}=${value}
+tagged must be yes or no, and concentrations must be whole numbers.
+"""
+CANNOT_WRITE_FILE_TEMP = """Cannot write file: ${filename}
+"""
+EXPORTED_SAMPLES_TEMP = """Exported samples successfully
+File: ${filename}
+Rows: ${count} (${rows_per_second} rows/s)
+"""
 
 
 class Shell:
@@ -216,14 +345,47 @@ class Shell:
     # Available commands and their parameters.
     command_parameters = {
         'record_receipt': ('customer_sample_name', 'tube_barcode'),
+        'record_receipts': ('manifest_file',),
         'add_to_tube': ('sample_id', 'tube_barcode'),
         'add_to_plate': ('sample_id', 'plate_barcode', 'well_position'),
+        'add_to_plate_map': ('plate_barcode', 'plate_map_file'),
         'tube_transfer': ('source_tube_barcode', 'destination_tube_barcode'),
+        'tube_transfers': ('transfer_file',),
         'list_samples_in': ('container_barcode',),
+        'where_is': ('sample_id',),
+        'list_samples_by_customer': ('customer',),
+        'lineage': ('tube_barcode',),
         'tag': ('sample_id', 'tag'),
-        'update_concentration': ('sample_id', 'concentration')
+        'tags': ('tag_file',),
+        'update_concentration': ('sample_id', 'concentration'),
+        'update_concentrations': ('plate_barcode', 'reader_file'),
+        'export_samples': ('format', 'export_file'),
+    }
+
+    # Commands that take optional <name>=<value> arguments after their
+    # parameters, and the names.
+    command_options = {
+        'add_to_plate_map': ('grid',),
+        'list_samples_by_customer': ('after', 'limit', 'order'),
+        'export_samples': ('customer', 'tagged', 'min_concentration',
+                           'max_concentration'),
+    }
+
+    # Commands that read rows from a file given as their last parameter, and
+    # the columns of the file.
+    file_commands = {
+        'record_receipts': ('customer_sample_name', 'tube_barcode'),
+        'add_to_plate_map': ('sample_id', 'well_position'),
+        'tube_transfers': ('source_tube_barcode', 'destination_tube_barcode'),
+        'tags': ('sample_id', 'tag'),
+        'update_concentrations': ('well_position', 'concentration'),
     }
 
+    # File commands that load new records in bulk, which run under the
+    # bulk_import tuning profile. Other file commands change existing
+    # records, and keep the durability of the database profile.
+    bulk_commands = ('record_receipts',)
+
     def start_process(self):
         """Creates a process instance if it is not available."""
         if self._process is None:
@@ -249,36 +411,117 @@ class Shell:
             print(UNKNOWN_COMMAND_TEMP % command)
             return self.EXIT_FAILURE
 
-        # Check number of parameters for command.
+        # Check number of parameters for command, and options.
         params = args[1:]
-        if len(params) != len(self.command_parameters[command]):
+        count = len(self.command_parameters[command])
+        if len(params) < count or (len(params) > count and
+                                   command not in self.command_options):
             print(INCORRECT_NUMBER_OF_PARAMS_TEMP % command)
             return self.EXIT_FAILURE
+        params, options = params[:count], {}
+        for arg in args[1 + count:]:
+            name, equals, value = arg.partition('=')
+            if not equals or name not in self.command_options[command]:
+                names = ', '.join(self.command_options[command])
+                print(INVALID_OPTION_TEMP % (command, arg, names))
+                return self.EXIT_FAILURE
+            options[name] = value
 
         # Create a Process instance if we don't have one.
-        self.start_process()
+        try:
+            self.start_process()
+        except SchemaError as error:
+            print(OUTDATED_SCHEMA_TEMP % (error.version, error.latest))
+            return self.EXIT_FAILURE
 
         # Configure logging
         self.start_logging()
 
+        if command in self.file_commands:
+            return self._main_file(command, params, options)
+
         # Render outputs using templates and process responses.
         method = getattr(self._process, command)
-        response = method(*params)
+        response = method(*params, **options)
         status = response.get_status()
         template = self._find_template(status)
         data = response.get_data()
-        print(Template(template).safe_substitute(data))
+        print(self._render(template, data))
         return self._find_exit(status)
 
+    def _main_file(self, command, params, options):
+        """Reads rows from the file given as the last parameter, passes them
+        to Process with the other parameters and options, using the
+        bulk_import tuning profile for bulk_commands, and renders a report
+        for each row followed by a summary. The whole file is read before
+        any row is processed, so a file that cannot be parsed changes
+        nothing."""
+        *params, filename = params
+        columns = self.file_commands[command]
+        method = getattr(self._process, command)
+        try:
+            with open(filename, newline='', encoding='utf-8-sig') as fp:
+                rows = list(self._read_rows(fp, columns))
+        except OSError:
+            print(CANNOT_READ_FILE_TEMP % filename)
+            return self.EXIT_FAILURE
+        except (UnicodeDecodeError, csv.Error):
+            print(CANNOT_PARSE_FILE_TEMP % filename)
+            return self.EXIT_FAILURE
+
+        profile = contextlib.nullcontext()
+        if command in self.bulk_commands:
+            profile = self._process.get_dataset().use_profile('bulk_import')
+        with profile:
+            responses = method(*params, rows, **options)
+
+        succeeded = 0
+        for response in responses:
+            status = response.get_status()
+            template = self._find_template(status)
+            data = response.get_data()
+            print(self._render(template, data))
+            if self._find_exit(status) == self.EXIT_SUCCESS:
+                succeeded += 1
+        total = len(responses)
+        print(BATCH_SUMMARY_TEMP % (total, succeeded, total - succeeded))
+        if succeeded == total:
+            return self.EXIT_SUCCESS
+        return self.EXIT_FAILURE
+
+    def _read_rows(self, fp, columns):
+        """Yields rows of the given number of columns from a CSV or TSV file.
+        The delimiter is detected from the first line, a header line that
+        names the columns is skipped, and blank lines are ignored."""
+        first = fp.readline()
+        delimiter = '\t' if '\t' in first else ','
+        fp.seek(0)
+        reader = csv.reader(fp, delimiter=delimiter)
+        for number, row in enumerate(reader):
+            row = [x.strip() for x in row]
+            if not any(row):
+                continue
+            if number == 0 and tuple(row) == columns:
+                continue
+            # Missing values are empty strings and fail validation.
+            row = (row + [''] * len(columns))[:len(columns)]
+            yield tuple(row)
+
+    def _render(self, template, data):
+        """Renders template with data; lists are rendered one item per
+        line."""
+        data = dict((key, '\n'.join(str(x) for x in value))
+                    if isinstance(value, list) else (key, value)
+                    for key, value in data.items())
+        return Template(template).safe_substitute(data)
+
     def _find_template(self, status):
         """Returns template text corresponding to status."""
         return globals()[status.upper().replace(' ', '_') + '_TEMP']
 
     def _find_exit(self, status):
         """Returns exit code for OS by checking the start of status."""
-        magic = status.upper().startswith
-        if (magic('FOUND') or magic('RECORDED') or magic('ADDED') or
-                magic('MOVED') or magic('TAGGED') or magic('UPDATED')):
+        if Response(status).is_success():
             return self.EXIT_SUCCESS
         else:
             return self.EXIT_FAILURE
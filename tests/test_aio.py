@@ -0,0 +1,146 @@
+import asyncio
+import threading
+import unittest
+
+from pylims import aio
+from pylims import config
+from pylims.dba import DataSet
+from pylims.process import Response
+
+
+class ServiceTest(unittest.IsolatedAsyncioTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.dataset = DataSet(config.test_database)  # To reset the database.
+
+    async def asyncSetUp(self):
+        self.dataset._reset_tables()  # reset test_db tables and sequences.
+        self.service = aio.Service(config.test_database, readers=3)
+        await self.service.start()
+
+    async def asyncTearDown(self):
+        await self.service.stop()
+
+    async def test_record_receipt(self):
+        response = await self.service.record_receipt('customer1-sample1',
+                                                     'NT00001')
+        self.assertEqual(Response.RECORDED_SAMPLE, response.get_status())
+
+        response = await self.service.list_samples_in('NT00001')
+        self.assertEqual(Response.FOUND_SAMPLE_TUBE, response.get_status())
+
+    async def test_concurrent_writes(self):
+        calls = [self.service.call('record_receipt',
+                                   'customer1-sample%d' % i, 'NT%05d' % i)
+                 for i in range(1, 51)]
+        responses = await asyncio.gather(*calls)
+
+        statuses = set(x.get_status() for x in responses)
+        self.assertEqual({Response.RECORDED_SAMPLE}, statuses)
+        tubes = self.dataset.find_tubes_by_barcodes(
+            ['NT%05d' % i for i in range(1, 51)])
+        self.assertEqual(50, len(tubes))
+
+    async def test_writes_on_one_thread(self):
+        names = []
+        process_method = self.service._run
+
+        def run(name, args):
+            names.append(threading.current_thread().name)
+            return process_method(name, args)
+
+        self.service._run = run
+        calls = [self.service.tag(i, 'CAT') for i in range(1, 11)]
+        calls += [self.service.list_samples_in('NT%05d' % i)
+                  for i in range(1, 11)]
+        await asyncio.gather(*calls)
+
+        writers = set(x for x in names if x.startswith('pylims-writer'))
+        readers = set(x for x in names if x.startswith('pylims-reader'))
+        self.assertEqual(1, len(writers))
+        self.assertEqual(20, len(names))
+        self.assertGreaterEqual(len(readers), 1)
+
+    async def test_unknown_method(self):
+        with self.assertRaises(AttributeError):
+            await self.service.call('unknown')
+        with self.assertRaises(AttributeError):
+            self.service.unknown
+
+
+class GroupCommitTest(unittest.IsolatedAsyncioTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.dataset = DataSet(config.test_database)  # To reset the database.
+
+    async def asyncSetUp(self):
+        self.dataset._reset_tables()  # reset test_db tables and sequences.
+        self.service = aio.Service(config.test_database, readers=2,
+                                   group_size=10, group_delay=0.2)
+        await self.service.start()
+        self.commits = 0
+        commit_group = self.service._commit_group
+
+        def count():
+            self.commits += 1
+            commit_group()
+
+        self.service._commit_group = count
+
+    async def asyncTearDown(self):
+        await self.service.stop()
+
+    def record_receipts(self, count):
+        return [self.service.record_receipt('customer1-sample%d' % i,
+                                            'NT%05d' % i)
+                for i in range(1, count + 1)]
+
+    async def test_group_commit(self):
+        responses = await asyncio.gather(*self.record_receipts(20))
+
+        statuses = set(x.get_status() for x in responses)
+        self.assertEqual({Response.RECORDED_SAMPLE}, statuses)
+        self.assertEqual(2, self.commits)
+        tubes = self.dataset.find_tubes_by_barcodes(
+            ['NT%05d' % i for i in range(1, 21)])
+        self.assertEqual(20, len(tubes))
+
+    async def test_group_delay(self):
+        self.service._group_delay = 0.01
+        response = await self.service.record_receipt('customer1-sample1',
+                                                     'NT00001')
+
+        self.assertEqual(Response.RECORDED_SAMPLE, response.get_status())
+        self.assertEqual(1, self.commits)
+        self.assertIsNotNone(self.dataset.find_tube_by_barcode('NT00001'))
+
+    async def test_failed_write_in_group(self):
+        calls = self.record_receipts(2)
+        calls.append(self.service.record_receipt('customer1-sample3',
+                                                 'NT00001'))
+        responses = await asyncio.gather(*calls)
+
+        self.assertEqual([Response.RECORDED_SAMPLE, Response.RECORDED_SAMPLE,
+                          Response.EXISTING_SAMPLE_TUBE],
+                         [x.get_status() for x in responses])
+        self.assertIsNone(self.dataset.find_sample_by_customer_sample_name(
+            'customer1', 'sample3'))
+        self.assertIsNotNone(self.dataset.find_tube_by_barcode('NT00002'))
+
+    async def test_failed_commit(self):
+        def fail():
+            raise RuntimeError('commit failed')
+
+        self.service._commit_group = fail
+        with self.assertLogs('pylims.aio', level='ERROR'):
+            responses = await asyncio.gather(*self.record_receipts(3))
+
+        statuses = set(x.get_status() for x in responses)
+        self.assertEqual({Response.UNEXPECTED_ERROR}, statuses)
+        self.assertIsNone(self.dataset.find_tube_by_barcode('NT00001'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,170 @@
+import json
+import sqlite3
+import threading
+import unittest
+import urllib.error
+import urllib.request
+
+from pylims import api
+from pylims import config
+from pylims.dba import DataSet
+from pylims.process import Response
+
+
+class APITest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.dataset = DataSet(config.test_database)  # To reset the database.
+        cls.server = api.Server(('127.0.0.1', 0), 4, config.test_database)
+        cls.thread = threading.Thread(target=cls.server.serve_forever)
+        cls.thread.start()
+        cls.url = 'http://127.0.0.1:%d/' % cls.server.server_address[1]
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.thread.join()
+
+    def setUp(self):
+        self.dataset._reset_tables()  # reset test_db tables and sequences.
+
+    def request(self, command, params=None,
+                content_type='application/json'):
+        """Returns HTTP status code and JSON data of a request."""
+        data = None
+        if params is not None:
+            data = json.dumps(params).encode('utf-8')
+        request = urllib.request.Request(self.url + command, data,
+                                         {'Content-Type': content_type})
+        try:
+            with urllib.request.urlopen(request) as fp:
+                return fp.status, json.loads(fp.read())
+        except urllib.error.HTTPError as error:
+            return error.code, json.loads(error.read())
+
+    def test_commands(self):
+        code, data = self.request('')
+        self.assertEqual(200, code)
+        self.assertEqual(['customer_sample_name', 'tube_barcode'],
+                         data['record_receipt'])
+        self.assertEqual(['plate_barcode', 'rows', 'grid'],
+                         data['add_to_plate_map'])
+
+    def test_record_receipt(self):
+        params = dict(customer_sample_name='customer1-sample1',
+                      tube_barcode='NT00001')
+        code, data = self.request('record_receipt', params)
+
+        self.assertEqual(200, code)
+        self.assertEqual(Response.RECORDED_SAMPLE, data['status'])
+        self.assertTrue(data['success'])
+        self.assertEqual(1, data['data']['tube']['sample']['sample_id'])
+
+        code, data = self.request('record_receipt', params)
+        self.assertEqual(Response.EXISTING_CUSTOMER_SAMPLE_NAME,
+                         data['status'])
+        self.assertFalse(data['success'])
+
+    def test_list_samples_in_plate(self):
+        self.request('record_receipt', dict(
+            customer_sample_name='customer1-sample1', tube_barcode='NT00001'))
+        self.request('add_to_plate', dict(
+            sample_id=1, plate_barcode='DN00001', well_position='A1'))
+        code, data = self.request('list_samples_in',
+                                  dict(container_barcode='DN00001'))
+
+        self.assertEqual(Response.FOUND_PLATE, data['status'])
+        plate = data['data']['result']
+        self.assertEqual('DN00001', plate['barcode'])
+        self.assertEqual('A1', plate['wells'][0]['label'])
+        self.assertEqual('sample1', plate['wells'][0]['sample']['name'])
+
+    def test_file_command(self):
+        rows = [['customer1-sample1', 'NT00001'], ['customer1-sample2']]
+        code, data = self.request('record_receipts', dict(rows=rows))
+
+        self.assertEqual(200, code)
+        self.assertEqual([Response.RECORDED_SAMPLE,
+                          Response.INVALID_TUBE_BARCODE],
+                         [x['status'] for x in data])
+
+    def test_options(self):
+        code, data = self.request('')
+        self.assertEqual(['customer', 'after', 'limit', 'order'],
+                         data['list_samples_by_customer'])
+        self.request('record_receipt', dict(
+            customer_sample_name='customer1-sample1', tube_barcode='NT00001'))
+        code, data = self.request('list_samples_by_customer', dict(
+            customer='customer1', limit=0))
+        self.assertEqual(Response.INVALID_PAGE, data['status'])
+        self.assertEqual('limit', data['data']['parameter'])
+
+    def test_export_samples_not_served(self):
+        code, data = self.request('')
+        self.assertNotIn('export_samples', data)
+        code, data = self.request('export_samples', dict(
+            format='csv', export_file='/tmp/pylims-api-export.csv'))
+        self.assertEqual(404, code)
+        self.assertEqual(api.UNKNOWN_COMMAND, data['status'])
+
+    def test_content_type(self):
+        params = dict(customer_sample_name='customer1-sample1',
+                      tube_barcode='NT00001')
+        code, data = self.request('record_receipt', params, 'text/plain')
+        self.assertEqual(415, code)
+        self.assertEqual(api.UNSUPPORTED_MEDIA_TYPE, data['status'])
+        code, data = self.request('record_receipt', params,
+                                  'application/json; charset=utf-8')
+        self.assertEqual(Response.RECORDED_SAMPLE, data['status'])
+
+    def test_unknown_command(self):
+        code, data = self.request('unknown', {})
+        self.assertEqual(404, code)
+        self.assertEqual(api.UNKNOWN_COMMAND, data['status'])
+
+    def test_invalid_request(self):
+        code, data = self.request('tag', dict(sample_id=1))
+        self.assertEqual(400, code)
+        self.assertEqual(api.INVALID_REQUEST, data['status'])
+        code, data = self.request('tags', dict(rows='1,CAT'))
+        self.assertEqual(400, code)
+
+    def test_unexpected_error(self):
+        def fail(*args):
+            raise sqlite3.OperationalError('database is locked')
+
+        original = api.Process.where_is
+        api.Process.where_is = fail
+        self.addCleanup(setattr, api.Process, 'where_is', original)
+        with self.assertLogs(api.LOG):
+            code, data = self.request('where_is', dict(sample_id=1))
+
+        self.assertEqual(500, code)
+        self.assertEqual(Response.UNEXPECTED_ERROR, data['status'])
+
+    def test_concurrent_requests(self):
+        results = []
+
+        def record(number):
+            params = dict(customer_sample_name='customer1-sample%d' % number,
+                          tube_barcode='NT%05d' % number)
+            results.append(self.request('record_receipt', params))
+
+        threads = [threading.Thread(target=record, args=(i,))
+                   for i in range(1, 21)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(20, len(results))
+        self.assertTrue(all(data['success'] for code, data in results))
+        ids = sorted(data['data']['tube']['sample']['sample_id']
+                     for code, data in results)
+        self.assertEqual(list(range(1, 21)), ids)
+
+
+if __name__ == '__main__':
+    unittest.main()
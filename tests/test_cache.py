@@ -0,0 +1,54 @@
+import unittest
+
+from pylims.cache import LRUCache
+
+
+class LRUCacheTest(unittest.TestCase):
+
+    def test_get_put(self):
+        cache = LRUCache(2)
+        self.assertIsNone(cache.get('a'))
+        cache.put('a', 1)
+        self.assertEqual(1, cache.get('a'))
+        self.assertIn('a', cache)
+        self.assertEqual(1, len(cache))
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('a')  # b is now least recently used
+        cache.put('c', 3)
+
+        self.assertNotIn('b', cache)
+        self.assertIn('a', cache)
+        self.assertIn('c', cache)
+        self.assertEqual(1, cache.get_stats()['evictions'])
+
+    def test_invalidate_clear(self):
+        cache = LRUCache(3)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.invalidate('a')
+        cache.invalidate('x')  # no entry
+        self.assertNotIn('a', cache)
+        cache.clear()
+        self.assertEqual(0, len(cache))
+
+    def test_maxsize_zero(self):
+        cache = LRUCache(0)
+        cache.put('a', 1)
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(0, len(cache))
+
+    def test_stats(self):
+        cache = LRUCache(10)
+        cache.put('a', 1)
+        cache.get('a')
+        cache.get('b')
+        expected = dict(hits=1, misses=1, evictions=0, size=1, maxsize=10)
+        self.assertDictEqual(expected, cache.get_stats())
+
+
+if __name__ == '__main__':
+    unittest.main()
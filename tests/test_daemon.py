@@ -0,0 +1,127 @@
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+from pylims import config
+from pylims import daemon
+from pylims import shell
+from pylims.dba import DataSet
+from pylims.process import Process
+
+
+class DaemonTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.dataset = DataSet(config.test_database)  # To reset the database.
+        cls.app = shell.Shell(Process(cls.dataset))  # The application instance.
+        cls.directory = tempfile.mkdtemp()
+        cls.socket_file = os.path.join(cls.directory, 'test.sock')
+        ready = threading.Event()
+
+        def run():
+            # SQLite connections are used in the thread that created them.
+            app = shell.Shell(Process(DataSet(config.test_database)))
+            cls.server = daemon.Server(cls.socket_file, app)
+            ready.set()
+            cls.server.serve_forever()
+
+        cls.thread = threading.Thread(target=run)
+        cls.thread.start()
+        ready.wait()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.thread.join()
+        shutil.rmtree(cls.directory)
+
+    def setUp(self):
+        self.dataset._reset_tables()  # reset test_db tables and sequences.
+
+    def test_forward(self):
+        args = 'record_receipt customer1-sample1 NT00001'.split()
+        output, code = daemon.forward(args, self.socket_file)
+
+        self.assertEqual(self.app.EXIT_SUCCESS, code)
+        self.assertIn('Recorded', output)
+        tube = self.dataset.find_tube_by_barcode('NT00001')
+        self.assertEqual('sample1', tube.get_sample().get_name())
+
+    def test_output_and_code_identical(self):
+        commands = ['',
+                    'unknown',
+                    'record_receipt customer1-sample1',
+                    'record_receipt customer1-sample1 NT00001',
+                    'record_receipt customer1-sample1 NT00001',
+                    'list_samples_in NT00001']
+        for command in commands:
+            args = command.split()
+            self.dataset._reset_tables()
+            with redirect_stdout(StringIO()) as fp:
+                expected_code = self.app.main(args)
+            expected = fp.getvalue()
+            self.dataset._reset_tables()
+            output, code = daemon.forward(args, self.socket_file)
+
+            self.assertEqual(expected_code, code, command)
+            self.assertMultiLineEqual(expected, output)
+
+    def test_is_running(self):
+        self.assertTrue(daemon.is_running(self.socket_file))
+        missing = os.path.join(self.directory, 'missing.sock')
+        self.assertFalse(daemon.is_running(missing))
+
+    def test_forward_without_daemon(self):
+        missing = os.path.join(self.directory, 'missing.sock')
+        self.assertIsNone(daemon.forward(['list_samples_in', 'NT1'], missing))
+
+    def _fake_daemon(self, handle):
+        """Returns the socket file of a server that handles one connection
+        with handle."""
+        socket_file = os.path.join(self.directory, 'fake.sock')
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listener.bind(socket_file)
+        listener.listen(1)
+
+        def run():
+            conn, address = listener.accept()
+            with conn:
+                conn.recv(4096)
+                handle(conn)
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        self.addCleanup(os.remove, socket_file)
+        self.addCleanup(listener.close)
+        self.addCleanup(thread.join)
+        return socket_file
+
+    def test_forward_without_reply(self):
+        socket_file = self._fake_daemon(lambda conn: None)  # crashed
+        output, code = daemon.forward(['list_samples_in', 'NT1'], socket_file)
+
+        self.assertEqual(daemon.NO_REPLY_TEMP % 'invalid reply', output)
+        self.assertEqual(self.app.EXIT_FAILURE, code)
+
+    def test_forward_timeout(self):
+        done = threading.Event()
+        socket_file = self._fake_daemon(lambda conn: done.wait(5))  # hangs
+        try:
+            output, code = daemon.forward(['list_samples_in', 'NT1'],
+                                          socket_file, timeout=0.1)
+        finally:
+            done.set()
+
+        self.assertEqual(daemon.NO_REPLY_TEMP % 'timed out', output)
+        self.assertEqual(self.app.EXIT_FAILURE, code)
+
+
+if __name__ == '__main__':
+    unittest.main()
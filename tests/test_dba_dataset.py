@@ -2,7 +2,7 @@ import os
 import unittest
 
 from pylims import config
-from pylims.dba import DataSet
+from pylims.dba import DataSet, MemoryDataSource
 
 
 class DataSetTest(unittest.TestCase):
@@ -24,6 +24,10 @@ class DataSetTest(unittest.TestCase):
             conf = dict(engine='X')  # engine not supported; no DataSource impl.
             dataset = DataSet(conf)  # throws exception
 
+    def test_memory_engine(self):
+        dataset = DataSet(dict(engine='memory', name='test_memory'))
+        self.assertIsInstance(dataset.get_data_source(), MemoryDataSource)
+
     def test_default_conf(self):
         dataset = DataSet()  # default connection to app database.
         self.assertDictEqual(dataset.get_conf(), config.database)
@@ -0,0 +1,196 @@
+import unittest
+
+from pylims.lab import Sample, SampleTube, LabTube, Plate, Well
+from pylims.dba import DataSet, MemoryDataSource, IntegrityError
+from pylims.process import Process, Response
+
+
+class DataSourceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.conf = dict(engine='memory', name='test_memory')
+        self.data_source = MemoryDataSource(self.conf)
+        self.data_source._reset_tables()
+
+    def create_sample_tube(self, barcode, customer, name):
+        tube = SampleTube(barcode, Sample(customer, name))
+        self.data_source.create_sample_tube(tube)
+        return tube
+
+    def test_init(self):
+        self.assertDictEqual(self.conf, self.data_source.get_conf())
+        other = MemoryDataSource(self.conf)
+        self.assertIs(self.data_source.get_conn(), other.get_conn())
+
+    def test_find_samples(self):
+        self.create_sample_tube('NT00001', 'customer1', 'sample1')
+        self.create_sample_tube('NT00002', 'customer1', 'sample2')
+        self.data_source.commit_transaction()
+
+        sample = self.data_source.find_sample_by_customer_sample_name(
+            'customer1', 'sample2')
+        self.assertEqual(2, sample.get_sample_id())
+        self.assertIsNone(self.data_source.find_sample_by_sample_id('3'))
+
+        samples = self.data_source.find_samples_by_sample_ids(['1', '2', 'x'])
+        self.assertEqual([1, 2], sorted(samples))
+        samples = self.data_source.find_samples_by_customer_sample_names(
+            [('customer1', 'sample1'), ('customer2', 'sample1')])
+        self.assertEqual([('customer1', 'sample1')], list(samples))
+
+    def test_duplicate(self):
+        self.create_sample_tube('NT00001', 'customer1', 'sample1')
+        with self.assertRaises(IntegrityError):
+            self.create_sample_tube('NT00002', 'customer1', 'sample1')
+        with self.assertRaises(IntegrityError):
+            self.create_sample_tube('NT00001', 'customer1', 'sample2')
+
+    def test_find_tubes(self):
+        tube = self.create_sample_tube('NT00001', 'customer1', 'sample1')
+        lab_tube = LabTube('NT00002', tube.get_sample())
+        self.data_source.create_lab_tube(lab_tube)
+
+        found = self.data_source.find_tube_by_barcode('NT00002')
+        self.assertIsInstance(found, LabTube)
+        self.assertEqual(1, found.get_sample().get_sample_id())
+        self.assertIsNone(self.data_source.find_lab_tube_by_barcode('NT00001'))
+        tubes = self.data_source.find_tubes_by_barcodes(
+            ['NT00001', 'NT00002', 'NT00003'])
+        self.assertEqual(['NT00001', 'NT00002'], sorted(tubes))
+
+    def test_move_samples_and_lineage(self):
+        tube = self.create_sample_tube('NT00001', 'customer1', 'sample1')
+        destination = SampleTube('NT00002')
+        self.data_source.move_sample(tube, destination)
+        last = SampleTube('NT00003')
+        self.data_source.move_samples([(destination, last)])
+
+        source = self.data_source.find_tube_by_barcode('NT00001')
+        self.assertIsNone(source.get_sample())
+        self.assertEqual('NT00002', source.get_moved_to())
+        lineage = self.data_source.find_lineage_by_barcode('NT00002')
+        self.assertEqual(['NT00001', 'NT00002', 'NT00003'],
+                         [x.get_barcode() for x in lineage])
+        self.assertEqual([], self.data_source.find_lineage_by_barcode('x'))
+
+    def test_plates_and_containers(self):
+        tube = self.create_sample_tube('NT00001', 'customer1', 'sample1')
+        sample = tube.get_sample()
+        plate = Plate('DN00001', '2x3', [Well('B1', sample)])
+        self.data_source.create_plate(plate)
+        self.data_source.create_wells(plate, [Well('A2', sample)])
+        with self.assertRaises(IntegrityError):
+            self.data_source.create_well(plate, Well('A2', sample))
+
+        found = self.data_source.find_plate_by_barcode('DN00001')
+        self.assertEqual('2x3', found.get_grid())
+        self.assertEqual(['A2', 'B1'],
+                         [x.get_label() for x in found.get_wells()])
+        plate, filled, occupied = self.data_source.find_plate_occupancy(
+            'DN00001', 'A2')
+        self.assertEqual(('2x3', [], 2, True),
+                         (plate.get_grid(), plate.get_wells(), filled,
+                          occupied))
+        containers = self.data_source.find_containers_by_sample_id(1)
+        self.assertEqual(['NT00001', 'DN00001'],
+                         [x.get_barcode() for x in containers])
+
+    def test_updates(self):
+        tube = self.create_sample_tube('NT00001', 'customer1', 'sample1')
+        sample = tube.get_sample()
+        self.data_source.update_sample_tags([(sample, 'CAT')])
+        self.data_source.update_sample_concentration(sample, 50)
+
+        self.assertEqual(50, sample.get_concentration())
+        found = self.data_source.find_sample_by_sample_id(1)
+        self.assertEqual('CAT', found.get_tag())
+        self.assertEqual(['customer1', 'sample1', 1, 'CAT', 50],
+                         self.data_source.get_conn().samples[1])
+
+    def test_iter_sample_locations(self):
+        tube = self.create_sample_tube('NT00001', 'customer1', 'sample1')
+        self.create_sample_tube('NT00002', 'customer2', 'sample1')
+        plate = Plate('DN00001', '8x12', [Well('A10', tube.get_sample()),
+                                          Well('A2', tube.get_sample())])
+        self.data_source.create_plate(plate)
+        self.data_source.update_sample_concentration(tube.get_sample(), '60')
+
+        rows = list(self.data_source.iter_sample_locations(
+            min_concentration=50))
+        self.assertEqual([
+            (1, 'customer1', 'sample1', None, 60, 'sample_tube', 'NT00001',
+             None),
+            (1, 'customer1', 'sample1', None, 60, 'plate', 'DN00001', 'A2'),
+            (1, 'customer1', 'sample1', None, 60, 'plate', 'DN00001', 'A10'),
+        ], rows)
+        rows = self.data_source.iter_sample_locations(customer='customer2',
+                                                      tagged=False)
+        self.assertEqual([2], [x[0] for x in rows])
+
+    def test_find_samples_by_customer(self):
+        for i, name in enumerate(['sample3', 'sample1', 'sample2'], 1):
+            self.create_sample_tube('NT%05d' % i, 'customer1', name)
+        self.create_sample_tube('NT00004', 'customer2', 'sample1')
+
+        samples = self.data_source.find_samples_by_customer(
+            'customer1', 'sample1', 1)
+        self.assertEqual(['sample2'], [x.get_name() for x in samples])
+        samples = self.data_source.find_samples_by_customer(
+            'customer1', '1', 5, 'sample_id')
+        self.assertEqual([2, 3], [x.get_sample_id() for x in samples])
+
+        self.data_source.rollback_transaction()
+        self.assertEqual(
+            [], self.data_source.find_samples_by_customer('customer1'))
+
+    def test_rollback_transaction(self):
+        self.create_sample_tube('NT00001', 'customer1', 'sample1')
+        self.data_source.commit_transaction()
+        tube = self.create_sample_tube('NT00002', 'customer1', 'sample2')
+        self.data_source.move_sample(tube, SampleTube('NT00003'))
+
+        self.data_source.rollback_transaction()
+
+        self.assertIsNone(self.data_source.find_tube_by_barcode('NT00002'))
+        self.assertIsNone(self.data_source.find_tube_by_barcode('NT00003'))
+        self.assertIsNotNone(self.data_source.find_tube_by_barcode('NT00001'))
+        # The sequence is rolled back too, as in SQLite.
+        tube = self.create_sample_tube('NT00004', 'customer1', 'sample2')
+        self.assertEqual(2, tube.get_sample().get_sample_id())
+
+    def test_savepoints(self):
+        self.data_source.begin_savepoint('outer')
+        self.create_sample_tube('NT00001', 'customer1', 'sample1')
+        self.data_source.begin_savepoint('inner')
+        self.create_sample_tube('NT00002', 'customer1', 'sample2')
+        self.data_source.rollback_savepoint('inner')
+        self.data_source.release_savepoint('outer')  # commits
+        self.data_source.rollback_transaction()
+
+        tubes = self.data_source.find_tubes_by_barcodes(['NT00001', 'NT00002'])
+        self.assertEqual(['NT00001'], list(tubes))
+
+    def test_use_profile(self):
+        with self.data_source.use_profile('bulk_import') as data_source:
+            self.assertIs(self.data_source, data_source)
+        with self.assertRaises(KeyError):
+            with self.data_source.use_profile('unknown'):
+                pass
+
+
+class ProcessTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dataset = DataSet(dict(engine='memory', name='test_memory'))
+        self.dataset._reset_tables()
+        self.process = Process(self.dataset)
+
+    def test_record_receipt_and_transfer(self):
+        response = self.process.record_receipt('customer1-sample1', 'NT00001')
+        self.assertEqual(Response.RECORDED_SAMPLE, response.get_status())
+        response = self.process.tube_transfer('NT00001', 'NT00002')
+        self.assertEqual(Response.MOVED_SAMPLE, response.get_status())
+
+        response = self.process.list_samples_in('NT00002')
+        tube = response.get_data()['result']
+        self.assertEqual('sample1', tube.get_sample().get_name())
@@ -0,0 +1,160 @@
+import unittest
+
+from pylims import config
+from pylims.lab import Sample, SampleTube, LabTube, Plate, Well
+from pylims.dba import SQLite3DataSource
+
+
+class CacheTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.conf = dict(config.test_database, read_cache_size=100)
+        cls.data_source = SQLite3DataSource(cls.conf)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.data_source.close_connection()
+
+    def setUp(self):
+        self.data_source._reset_tables()
+        sample1 = Sample('customer1', 'sample1')
+        sample2 = Sample('customer1', 'sample2')
+        self.data_source.begin_transaction()
+        self.data_source.create_sample_tube(SampleTube('NT00001', sample1))
+        self.data_source.create_sample_tube(SampleTube('NT00002', sample2))
+        self.data_source.create_plate(
+            Plate('DN00001', '8x12', [Well('A1', sample1)]))
+        self.data_source.commit_transaction()
+
+    def count_statements(self, func, *args):
+        """Returns the result of func and the number of statements run, not
+        counting data_version checks."""
+        conn = self.data_source.get_conn()
+        statements = []
+        conn.set_trace_callback(statements.append)
+        try:
+            result = func(*args)
+        finally:
+            conn.set_trace_callback(None)
+        statements = [x for x in statements if x != 'pragma data_version']
+        return result, len(statements)
+
+    def test_find_tube_by_barcode(self):
+        find = self.data_source.find_tube_by_barcode
+        first, count = self.count_statements(find, 'NT00001')
+        self.assertEqual(1, count)
+        second, count = self.count_statements(find, 'NT00001')
+        self.assertEqual(0, count)
+
+        self.assertIsNot(first, second)
+        self.assertEqual(first.get_barcode(), second.get_barcode())
+        self.assertEqual('sample1', second.get_sample().get_name())
+        self.assertIsNone(self.data_source.find_lab_tube_by_barcode('NT00001'))
+
+    def test_find_tubes_by_barcodes(self):
+        find = self.data_source.find_tubes_by_barcodes
+        self.data_source.find_tube_by_barcode('NT00001')
+        tubes, count = self.count_statements(find, ['NT00001', 'NT00002'])
+        self.assertEqual(1, count)  # NT00002 only
+        tubes, count = self.count_statements(find, ['NT00001', 'NT00002'])
+        self.assertEqual(0, count)
+        self.assertEqual(['NT00001', 'NT00002'], sorted(tubes))
+
+    def test_find_samples(self):
+        samples, count = self.count_statements(
+            self.data_source.find_samples_by_sample_ids, [1, 2])
+        self.assertEqual(1, count)
+        sample, count = self.count_statements(
+            self.data_source.find_sample_by_sample_id, '2')
+        self.assertEqual(0, count)
+        self.assertEqual('sample2', sample.get_name())
+
+    def test_find_plate_by_barcode(self):
+        find = self.data_source.find_plate_by_barcode
+        self.count_statements(find, 'DN00001')
+        plate, count = self.count_statements(find, 'DN00001')
+        self.assertEqual(0, count)
+        self.assertEqual(['A1'], [x.get_label() for x in plate.get_wells()])
+
+    def test_move_sample_invalidates(self):
+        source = self.data_source.find_tube_by_barcode('NT00001')
+        self.data_source.begin_transaction()
+        self.data_source.move_sample(source, LabTube('NT00003'))
+        self.data_source.commit_transaction()
+
+        tube = self.data_source.find_tube_by_barcode('NT00001')
+        self.assertTrue(tube.is_discarded())
+        tube = self.data_source.find_tube_by_barcode('NT00003')
+        self.assertEqual('sample1', tube.get_sample().get_name())
+
+    def test_update_sample_tag_invalidates(self):
+        plate = self.data_source.find_plate_by_barcode('DN00001')
+        sample = plate.get_wells()[0].get_sample()
+        self.data_source.begin_transaction()
+        self.data_source.update_sample_tag(sample, 'CAT')
+        self.data_source.commit_transaction()
+
+        tube = self.data_source.find_tube_by_barcode('NT00001')
+        self.assertEqual('CAT', tube.get_sample().get_tag())
+        plate = self.data_source.find_plate_by_barcode('DN00001')
+        self.assertEqual('CAT', plate.get_wells()[0].get_sample().get_tag())
+
+    def test_create_well_invalidates(self):
+        plate = self.data_source.find_plate_by_barcode('DN00001')
+        sample = self.data_source.find_sample_by_sample_id(2)
+        self.data_source.begin_transaction()
+        self.data_source.create_well(plate, Well('B1', sample))
+        self.data_source.commit_transaction()
+
+        plate = self.data_source.find_plate_by_barcode('DN00001')
+        self.assertEqual(['A1', 'B1'], [x.get_label() for x in plate.get_wells()])
+
+    def test_rollback_clears(self):
+        source = self.data_source.find_tube_by_barcode('NT00002')
+        self.data_source.begin_transaction()
+        self.data_source.move_sample(source, LabTube('NT00003'))
+        self.data_source.find_tube_by_barcode('NT00003')  # cached
+        self.data_source.rollback_transaction()
+
+        self.assertIsNone(self.data_source.find_tube_by_barcode('NT00003'))
+        tube = self.data_source.find_tube_by_barcode('NT00002')
+        self.assertFalse(tube.is_discarded())
+
+    def test_other_connection_commit_clears(self):
+        self.data_source.find_tube_by_barcode('NT00001')
+        self.data_source.find_tube_by_barcode('NT00001')  # cached
+
+        other = SQLite3DataSource(self.conf)
+        try:
+            other.begin_transaction()
+            other.update_sample_tag(Sample(sample_id=1), 'CAT')
+            other.commit_transaction()
+        finally:
+            other.close_connection()
+
+        tube, count = self.count_statements(
+            self.data_source.find_tube_by_barcode, 'NT00001')
+        self.assertEqual(1, count)
+        self.assertEqual('CAT', tube.get_sample().get_tag())
+
+    def test_own_commit_keeps_cache(self):
+        self.data_source.find_tube_by_barcode('NT00002')
+        self.data_source.begin_transaction()
+        self.data_source.update_sample_tag(Sample(sample_id=1), 'CAT')
+        self.data_source.commit_transaction()
+
+        _, count = self.count_statements(
+            self.data_source.find_tube_by_barcode, 'NT00002')
+        self.assertEqual(0, count)
+
+    def test_get_cache_stats(self):
+        self.data_source.find_tube_by_barcode('NT00001')
+        self.data_source.find_tube_by_barcode('NT00001')
+        stats = self.data_source.get_cache_stats()
+        self.assertEqual(100, stats['maxsize'])
+        self.assertGreaterEqual(stats['hits'], 2)  # tube and sample rows
+
+
+if __name__ == '__main__':
+    unittest.main()
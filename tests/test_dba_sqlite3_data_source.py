@@ -397,3 +397,393 @@ class DataSourceTest(unittest.TestCase):
 
         recorded = self.data_source.find_sample_tube_by_barcode(barcode)
         self.assertIsNone(recorded)  # Not recorded.
+
+    def test_find_plate_by_barcode_constant_queries(self):
+        conn = self.data_source.get_conn()
+        plate_barcode, grid = 'DN12345', '16x24'
+        sql = "insert into plate (barcode, grid) values (?, ?)"
+        conn.execute(sql, (plate_barcode, grid))
+        for i in range(16):
+            for j in range(24):
+                sql = "insert into sample (customer, name) values (?, ?)"
+                params = 'customer1', 'sample%s-%s' % (i, j)
+                sample_id = conn.execute(sql, params).lastrowid
+                sql = ("insert into well (plate_barcode, label, sample_id) "
+                       "values (?, ?, ?)")
+                label = '%s%s' % (chr(ord('A') + i), j + 1)
+                conn.execute(sql, (plate_barcode, label, sample_id))
+        conn.commit()
+
+        statements = []
+        conn.set_trace_callback(statements.append)  # query counter
+        try:
+            plate = self.data_source.find_plate_by_barcode(plate_barcode)
+        finally:
+            conn.set_trace_callback(None)
+
+        self.assertEqual(1, len(statements))
+        self.assertTrue(plate.is_full())
+        wells = plate.get_wells()
+        self.assertEqual(384, len(wells))
+        self.assertEqual('A1', wells[0].get_label())
+        self.assertEqual('A2', wells[1].get_label())
+        self.assertEqual('P24', wells[-1].get_label())
+        self.assertEqual(1, wells[0].get_sample().get_sample_id())
+        self.assertEqual('sample15-23', wells[-1].get_sample().get_name())
+
+    def test_find_plate_by_barcode_without_wells(self):
+        conn = self.data_source.get_conn()
+        sql = "insert into plate (barcode, grid) values (?, ?)"
+        conn.execute(sql, ('DN12345', '8x12'))
+        conn.commit()
+
+        plate = self.data_source.find_plate_by_barcode('DN12345')
+
+        self.assertEqual('8x12', plate.get_grid())
+        self.assertListEqual([], plate.get_wells())
+        self.assertIsNone(self.data_source.find_plate_by_barcode('DN54321'))
+
+    def test_find_tube_by_barcode_single_query(self):
+        conn = self.data_source.get_conn()
+        sql = "insert into sample (customer, name, tag) values (?, ?, ?)"
+        conn.execute(sql, ('customer1', 'sample1', 'CAT'))
+        sql = "insert into lab_tube (barcode, sample_id) values (?, ?)"
+        conn.execute(sql, ('NT00002', 1))
+        conn.commit()
+
+        statements = []
+        conn.set_trace_callback(statements.append)
+        try:
+            tube = self.data_source.find_tube_by_barcode('NT00002')
+        finally:
+            conn.set_trace_callback(None)
+
+        self.assertEqual(1, len(statements))
+        self.assertIsInstance(tube, LabTube)
+        self.assertEqual('CAT', tube.get_sample().get_tag())
+        self.assertIsNone(self.data_source.find_tube_by_barcode('NT00003'))
+
+    def test_find_tubes_by_barcodes(self):
+        sample = Sample('customer1', 'sample1')
+        source = SampleTube('NT00001', sample)
+        self.data_source.begin_transaction()
+        self.data_source.create_sample_tube(source)
+        self.data_source.create_lab_tube(LabTube('NT00002', sample))
+        self.data_source.move_sample(source, SampleTube('NT00003'))
+        self.data_source.commit_transaction()
+
+        conn = self.data_source.get_conn()
+        statements = []
+        conn.set_trace_callback(statements.append)
+        try:
+            barcodes = ['NT00001', 'NT00002', 'NT00003', 'NT00004']
+            tubes = self.data_source.find_tubes_by_barcodes(barcodes)
+        finally:
+            conn.set_trace_callback(None)
+
+        self.assertEqual(1, len(statements))
+        self.assertEqual(['NT00001', 'NT00002', 'NT00003'], sorted(tubes))
+        self.assertIsInstance(tubes['NT00001'], SampleTube)
+        self.assertTrue(tubes['NT00001'].is_discarded())
+        self.assertEqual('NT00003', tubes['NT00001'].get_moved_to())
+        self.assertIsInstance(tubes['NT00002'], LabTube)
+        self.assertEqual(sample.get_sample_id(),
+                         tubes['NT00003'].get_sample().get_sample_id())
+
+    def test_create_sample_tubes(self):
+        self.data_source.begin_transaction()
+        self.data_source.create_sample_tube(
+            SampleTube('NT00001', Sample('customer1', 'sample1')))
+        self.data_source.commit_transaction()
+
+        tubes = [SampleTube('NT%05d' % i, Sample('customer2', 'sample%d' % i))
+                 for i in range(2, 6)]
+        self.data_source.begin_transaction()
+        self.data_source.create_sample_tubes(tubes)
+        self.data_source.commit_transaction()
+
+        ids = [x.get_sample().get_sample_id() for x in tubes]
+        self.assertEqual([2, 3, 4, 5], ids)
+        for tube in tubes:
+            recorded = self.data_source.find_sample_tube_by_barcode(
+                tube.get_barcode())
+            self.assertEqual(tube.get_sample().get_name(),
+                             recorded.get_sample().get_name())
+            self.assertEqual(tube.get_sample().get_sample_id(),
+                             recorded.get_sample().get_sample_id())
+
+    def test_find_samples_by_customer_sample_names(self):
+        tubes = [SampleTube('NT%05d' % i, Sample('customer1', 'sample%d' % i))
+                 for i in range(1, 4)]
+        self.data_source.begin_transaction()
+        self.data_source.create_sample_tubes(tubes)
+        self.data_source.commit_transaction()
+
+        names = [('customer1', 'sample1'), ('customer1', 'sample3'),
+                 ('customer2', 'sample1')]
+        samples = self.data_source.find_samples_by_customer_sample_names(names)
+
+        self.assertEqual([('customer1', 'sample1'), ('customer1', 'sample3')],
+                         sorted(samples))
+        self.assertEqual(3, samples[('customer1', 'sample3')].get_sample_id())
+
+    def test_create_wells(self):
+        tubes = [SampleTube('NT%05d' % i, Sample('customer1', 'sample%d' % i))
+                 for i in range(1, 4)]
+        plate = Plate('DN12345')
+        self.data_source.begin_transaction()
+        self.data_source.create_sample_tubes(tubes)
+        self.data_source.create_plate(plate)
+        self.data_source.commit_transaction()
+
+        samples = self.data_source.find_samples_by_sample_ids([3, 1, 4])
+        self.assertEqual([1, 3], sorted(samples))
+
+        wells = [Well('B1', samples[1]), Well('A1', samples[3])]
+        self.data_source.begin_transaction()
+        self.data_source.create_wells(plate, wells)
+        self.data_source.commit_transaction()
+
+        self.assertEqual(['A1', 'B1'], [x.get_label() for x in plate.get_wells()])
+        found = self.data_source.find_plate_by_barcode('DN12345')
+        ids = [x.get_sample().get_sample_id() for x in found.get_wells()]
+        self.assertEqual([3, 1], ids)
+
+    def test_move_samples(self):
+        sample1 = Sample('customer1', 'sample1')
+        sample2 = Sample('customer1', 'sample2')
+        source1 = SampleTube('NT00001', sample1)
+        source2 = LabTube('NT00002', sample2)
+        self.data_source.begin_transaction()
+        self.data_source.create_sample_tubes([source1])
+        self.data_source.create_sample_tubes(
+            [SampleTube('NT00009', sample2)])
+        self.data_source.create_lab_tube(source2)
+        self.data_source.commit_transaction()
+
+        target1, target2 = SampleTube('NT00003'), LabTube('NT00004')
+        self.data_source.begin_transaction()
+        self.data_source.move_samples([(source1, target1), (source2, target2)])
+        self.data_source.commit_transaction()
+
+        self.assertTrue(source1.is_discarded())
+        self.assertEqual('NT00004', source2.get_moved_to())
+        self.assertEqual(sample2, target2.get_sample())
+        tubes = self.data_source.find_tubes_by_barcodes(
+            ['NT00001', 'NT00002', 'NT00003', 'NT00004'])
+        self.assertEqual('NT00003', tubes['NT00001'].get_moved_to())
+        self.assertIsInstance(tubes['NT00004'], LabTube)
+        self.assertEqual(sample2.get_sample_id(),
+                         tubes['NT00004'].get_sample().get_sample_id())
+
+    def test_find_containers_by_sample_id(self):
+        sample1 = Sample('customer1', 'sample1')
+        sample2 = Sample('customer1', 'sample2')
+        self.data_source.begin_transaction()
+        self.data_source.create_sample_tubes([SampleTube('NT00001', sample1),
+                                              SampleTube('NT00002', sample2)])
+        self.data_source.create_lab_tube(LabTube('NT00003', sample1))
+        self.data_source.create_plate(Plate('DN00002', '8x12', [
+            Well('A1', sample1), Well('A2', sample2)]))
+        self.data_source.create_plate(Plate('DN00001', '8x12', [
+            Well('H12', sample1)]))
+        self.data_source.commit_transaction()
+
+        conn = self.data_source.get_conn()
+        statements = []
+        conn.set_trace_callback(statements.append)
+        try:
+            containers = self.data_source.find_containers_by_sample_id(1)
+        finally:
+            conn.set_trace_callback(None)
+
+        self.assertEqual(1, len(statements))
+        self.assertEqual(['NT00001', 'NT00003', 'DN00001', 'DN00002'],
+                         [x.get_barcode() for x in containers])
+        self.assertIsInstance(containers[1], LabTube)
+        self.assertEqual(['A1'],
+                         [x.get_label() for x in containers[3].get_wells()])
+        self.assertEqual('sample1',
+                         containers[3].get_wells()[0].get_sample().get_name())
+        self.assertEqual([], self.data_source.find_containers_by_sample_id(3))
+
+    def test_find_lineage_by_barcode(self):
+        # Transfers keep the kind of the source tube.
+        sample1 = Sample('customer1', 'sample1')
+        sample2 = Sample('customer1', 'sample2')
+        tubes = [SampleTube('NT00001', sample1), SampleTube('NT00002'),
+                 SampleTube('NT00003'), SampleTube('NT00004')]
+        lab_tubes = [LabTube('NT00005', sample2), LabTube('NT00006')]
+        self.data_source.begin_transaction()
+        self.data_source.create_sample_tubes([tubes[0]])
+        self.data_source.create_sample_tubes([SampleTube('NT00009', sample2)])
+        self.data_source.create_lab_tube(lab_tubes[0])
+        for source, destination in zip(tubes, tubes[1:]):
+            self.data_source.move_sample(source, destination)
+        self.data_source.move_sample(*lab_tubes)
+        self.data_source.commit_transaction()
+
+        conn = self.data_source.get_conn()
+        statements = []
+        conn.set_trace_callback(statements.append)
+        try:
+            lineage = self.data_source.find_lineage_by_barcode('NT00003')
+        finally:
+            conn.set_trace_callback(None)
+
+        self.assertEqual(1, len(statements))
+        self.assertEqual(['NT00001', 'NT00002', 'NT00003', 'NT00004'],
+                         [x.get_barcode() for x in lineage])
+        self.assertEqual('NT00002', lineage[0].get_moved_to())
+        self.assertIsNone(lineage[-1].get_moved_to())
+        self.assertEqual(1, lineage[-1].get_sample().get_sample_id())
+
+        lineage = self.data_source.find_lineage_by_barcode('NT00006')
+        self.assertEqual(['NT00005', 'NT00006'],
+                         [x.get_barcode() for x in lineage])
+        self.assertIsInstance(lineage[0], LabTube)
+        self.assertEqual([], self.data_source.find_lineage_by_barcode('NT9'))
+
+    def test_iter_sample_locations(self):
+        samples = [Sample('customer1', 'sample%d' % i) for i in range(1, 6)]
+        self.data_source.begin_transaction()
+        self.data_source.create_sample_tubes(
+            [SampleTube('NT%05d' % i, x) for i, x in enumerate(samples, 1)])
+        self.data_source.create_plate(Plate('DN00001', '8x12', [
+            Well('A10', samples[0]), Well('A2', samples[0])]))
+        self.data_source.move_sample(SampleTube('NT00002', samples[1]),
+                                     SampleTube('NT00009'))
+        self.data_source.update_sample_tag(samples[2], 'CAT')
+        self.data_source.update_sample_concentration(samples[3], 150)
+        self.data_source.commit_transaction()
+        conn = self.data_source.get_conn()
+        conn.execute("update sample_tube set sample_id = null "
+                     "where barcode = 'NT00005'")
+        conn.commit()
+
+        self.data_source.chunk_size = 2  # several chunks
+        try:
+            rows = list(self.data_source.iter_sample_locations())
+        finally:
+            del self.data_source.chunk_size
+        self.assertEqual([
+            (1, 'customer1', 'sample1', None, None, 'sample_tube', 'NT00001',
+             None),
+            (1, 'customer1', 'sample1', None, None, 'plate', 'DN00001', 'A2'),
+            (1, 'customer1', 'sample1', None, None, 'plate', 'DN00001', 'A10'),
+            (2, 'customer1', 'sample2', None, None, 'sample_tube', 'NT00009',
+             None),
+            (3, 'customer1', 'sample3', 'CAT', None, 'sample_tube', 'NT00003',
+             None),
+            (4, 'customer1', 'sample4', None, 150, 'sample_tube', 'NT00004',
+             None),
+            (5, 'customer1', 'sample5', None, None, None, None, None),
+        ], rows)
+
+        rows = self.data_source.iter_sample_locations(tagged=True)
+        self.assertEqual([3], [x[0] for x in rows])
+        rows = self.data_source.iter_sample_locations(
+            customer='customer1', tagged=False, min_concentration=100,
+            max_concentration=200)
+        self.assertEqual([4], [x[0] for x in rows])
+        rows = self.data_source.iter_sample_locations(customer='customer2')
+        self.assertEqual([], list(rows))
+
+    def test_find_samples_by_customer(self):
+        names = ['sample3', 'sample1', 'sample2', 'sample4']
+        self.data_source.begin_transaction()
+        self.data_source.create_sample_tubes(
+            [SampleTube('NT%05d' % i, Sample('customer1', x))
+             for i, x in enumerate(names, 1)])
+        self.data_source.create_sample_tubes(
+            [SampleTube('NT00009', Sample('customer2', 'sample0'))])
+        self.data_source.commit_transaction()
+
+        samples = self.data_source.find_samples_by_customer('customer1',
+                                                            limit=2)
+        self.assertEqual(['sample1', 'sample2'],
+                         [x.get_name() for x in samples])
+        samples = self.data_source.find_samples_by_customer(
+            'customer1', 'sample2', 2)
+        self.assertEqual(['sample3', 'sample4'],
+                         [x.get_name() for x in samples])
+        samples = self.data_source.find_samples_by_customer(
+            'customer1', 2, 10, 'sample_id')
+        self.assertEqual([3, 4], [x.get_sample_id() for x in samples])
+        with self.assertRaises(ValueError):
+            self.data_source.find_samples_by_customer('customer1',
+                                                      order='tag')
+
+        # Pages seek in an index instead of sorting the customer's samples.
+        conn = self.data_source.get_conn()
+        for column, index in (('name', 'sqlite_autoindex_sample_1'),
+                              ('sample_id', 'sample_customer')):
+            sql = ("explain query plan select * from sample "
+                   "where customer = ? and %s > ? order by %s limit ?"
+                   % (column, column))
+            plan = ' '.join(x[-1] for x in conn.execute(sql, ('c', 1, 1)))
+            self.assertIn(index, plan)
+            self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_find_plate_by_barcode_ordinal(self):
+        sample = Sample('customer1', 'sample1')
+        self.data_source.begin_transaction()
+        self.data_source.create_sample_tube(SampleTube('NT00001', sample))
+        plate = Plate('DN00001', '16x24', [Well('B2', sample)])
+        self.data_source.create_plate(plate)
+        self.data_source.create_wells(plate, [Well('A10', sample),
+                                              Well('A2', sample)])
+        self.data_source.commit_transaction()
+
+        conn = self.data_source.get_conn()
+        rows = conn.execute("select label, ordinal from well "
+                            "order by ordinal").fetchall()
+        self.assertEqual([('A2', 1), ('A10', 9), ('B2', 25)], rows)
+
+        # Wells come in order from the index, without sorting.
+        statements = []
+        conn.set_trace_callback(statements.append)
+        try:
+            plate = self.data_source.find_plate_by_barcode('DN00001')
+        finally:
+            conn.set_trace_callback(None)
+        self.assertEqual(['A2', 'A10', 'B2'],
+                         [x.get_label() for x in plate.get_wells()])
+        plan = ' '.join(x[-1] for x in conn.execute(
+            "explain query plan " + statements[0]))
+        self.assertIn('COVERING INDEX well_plate_ordinal', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_find_plate_occupancy(self):
+        sample = Sample('customer1', 'sample1')
+        self.data_source.begin_transaction()
+        self.data_source.create_sample_tube(SampleTube('NT00001', sample))
+        self.data_source.create_plate(Plate('DN00001', '16x24', [
+            Well('A1', sample), Well('B2', sample)]))
+        self.data_source.commit_transaction()
+
+        plate, filled, occupied = self.data_source.find_plate_occupancy(
+            'DN00001', 'B2')
+        self.assertEqual('16x24', plate.get_grid())
+        self.assertEqual([], plate.get_wells())
+        self.assertEqual(2, filled)
+        self.assertTrue(occupied)
+        plate, filled, occupied = self.data_source.find_plate_occupancy(
+            'DN00001', 'P24')
+        self.assertFalse(occupied)
+        self.assertIsNone(
+            self.data_source.find_plate_occupancy('DN00002', 'A1'))
+
+        # Wells are counted and checked in the index, without reading rows.
+        conn = self.data_source.get_conn()
+        statements = []
+        conn.set_trace_callback(statements.append)
+        try:
+            self.data_source.find_plate_occupancy('DN00001', 'A1')
+        finally:
+            conn.set_trace_callback(None)
+        self.assertEqual(1, len(statements))
+        plan = ' '.join(x[-1] for x in conn.execute(
+            "explain query plan " + statements[0]))
+        self.assertIn('COVERING INDEX sqlite_autoindex_well_1', plan)
+        self.assertNotIn('SCAN', plan)
@@ -0,0 +1,53 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from pylims import config
+from pylims.dba import SQLite3DataSource
+
+
+class ProfileTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        name = os.path.join(directory, 'profile.sqlite3')
+        shutil.copy(os.path.join(config.base_dir, 'misc',
+                                 'template_db.sqlite3'), name)
+        conf = dict(engine='sqlite3', name=name, profile='production')
+        self.data_source = SQLite3DataSource(conf)
+        self.addCleanup(self.data_source.close_connection)
+
+    def pragma(self, name):
+        return self.data_source.get_conn().execute(
+            "pragma %s" % name).fetchone()[0]
+
+    def test_production(self):
+        # The journal mode persists in the file and is left to migrate.
+        self.assertEqual('delete', self.pragma('journal_mode'))
+        self.assertEqual(1, self.pragma('synchronous'))  # normal
+        self.assertEqual(-65536, self.pragma('cache_size'))
+        self.assertEqual(5000, self.pragma('busy_timeout'))
+
+    def test_use_profile(self):
+        with self.data_source.use_profile('bulk_import'):
+            self.assertEqual(0, self.pragma('synchronous'))  # off
+            self.assertEqual(-262144, self.pragma('cache_size'))
+        self.assertEqual(1, self.pragma('synchronous'))
+        self.assertEqual(-65536, self.pragma('cache_size'))
+
+    def test_use_profile_restores_after_error(self):
+        with self.assertRaises(RuntimeError):
+            with self.data_source.use_profile('bulk_import'):
+                raise RuntimeError
+        self.assertEqual(1, self.pragma('synchronous'))
+
+    def test_unknown_profile(self):
+        with self.assertRaises(KeyError):
+            with self.data_source.use_profile('unknown'):
+                pass
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,7 +2,8 @@ import unittest
 
 from string import ascii_uppercase
 
-from pylims.lab import Sample, Container, Tube, SampleTube, LabTube, Plate, Well
+from pylims.lab import (Sample, Container, Tube, SampleTube, LabTube, Plate,
+                        Well, GridLayout)
 
 
 class LabTest(unittest.TestCase):
@@ -238,6 +239,45 @@ class LabTest(unittest.TestCase):
 
         self.assertListEqual([a1, a2, a3], plate.get_wells())
 
+    def test_plate_ordinals(self):
+        plate = Plate('DN12345', '16x24')
+
+        self.assertEqual(0, plate.get_ordinal('A1'))
+        self.assertEqual(25, plate.get_ordinal('B2'))
+        self.assertEqual(383, plate.get_ordinal('P24'))
+        self.assertIsNone(plate.get_ordinal('Q1'))
+        self.assertIsNone(plate.get_ordinal('A25'))
+        self.assertIsNone(plate.get_ordinal('AX'))
+        self.assertEqual('P24', plate.get_well_label(383))
+
+    def test_plate_next_empty_label(self):
+        sample = Sample('customer1', 'sample1', 1)
+        plate = Plate('DN12345', '2x2', [Well('A1', sample)])
+
+        self.assertEqual('A2', plate.next_empty_label())
+        plate.add_well(Well('A2', sample))
+        plate.add_well(Well('B2', sample))
+        self.assertEqual('B1', plate.next_empty_label())
+        self.assertEqual(3, plate.get_filled_count())
+        plate.add_well(Well('B1', sample))
+        self.assertIsNone(plate.next_empty_label())
+        self.assertTrue(plate.is_full())
+
+    def test_plate_well_outside_grid(self):
+        sample = Sample('customer1', 'sample1', 1)
+        h12 = Well('H12', sample)
+        a1 = Well('A1', sample)
+        plate = Plate('DN12345', '2x2', [h12, a1])
+
+        self.assertListEqual([a1, h12], plate.get_wells())
+        self.assertFalse(plate.well_is_empty('H12'))
+        self.assertEqual(2, plate.get_filled_count())
+        self.assertFalse(plate.is_full())
+        plate.add_well(Well('A2', sample))
+        plate.add_well(Well('B1', sample))
+        self.assertEqual('B2', plate.next_empty_label())
+        self.assertTrue(plate.is_full())  # counts H12, as in the database
+
     def test_plate_well_in_range(self):
         barcode = 'DN12345'
         grid = '8x12'
@@ -290,8 +330,14 @@ class LabTest(unittest.TestCase):
         label = 'P24'  # 384-well, 16x24, A1 to P24
         self.assertTrue(Plate.validate_well_label_format(label))
 
+        label = 'AF48'  # 1536-well, 32x48, A1 to AF48
+        self.assertTrue(Plate.validate_well_label_format(label))
+
     def test_validate_well_label_format_outside(self):
-        label = 'Z1'
+        label = 'AG1'
+        self.assertFalse(Plate.validate_well_label_format(label))
+
+        label = 'A49'
         self.assertFalse(Plate.validate_well_label_format(label))
 
         label = None
@@ -311,6 +357,9 @@ class LabTest(unittest.TestCase):
         label = 'A?'
         self.assertFalse(Plate.validate_well_label_format(label))
 
+        label = 'A01'
+        self.assertFalse(Plate.validate_well_label_format(label))
+
     def test_well_init(self):
         label = 'A1'
         sample = Sample('customer1', 'sample1', 1)
@@ -345,6 +394,43 @@ class LabTest(unittest.TestCase):
         a2 = Well('A2', Sample('customer1', 'sample2', 2))
 
         self.assertLess(a1, a2)
+        self.assertLess(Well('Z48'), Well('AA1'))
+        self.assertLess(Well('A2'), Well('A10'))
+
+    def test_slots(self):
+        sample = Sample('customer1', 'sample1', 1)
+        instances = [sample, SampleTube('NT00001', sample),
+                     LabTube('NT00002', sample), Plate('DN00001'),
+                     Well('A1', sample)]
+        for instance in instances:
+            with self.subTest(type(instance).__name__):
+                self.assertFalse(hasattr(instance, '__dict__'))
+                with self.assertRaises(AttributeError):
+                    instance.unknown = 1
+
+    def test_grid_layout(self):
+        layout = GridLayout.get('32x48')
+
+        self.assertIs(layout, GridLayout.get('32x48'))
+        self.assertEqual(1536, layout.get_capacity())
+        self.assertEqual(1248, layout.get_ordinal('AA1'))
+        self.assertEqual('AF48', layout.get_label(1535))
+        self.assertEqual(('AB', 3), layout.get_split_label('AB3'))
+        self.assertIsNone(layout.get_ordinal('AG1'))
+        self.assertEqual(['A', 'Z', 'AA', 'AZ', 'BA'],
+                         [GridLayout.row_name(x) for x in (0, 25, 26, 51, 52)])
+
+    def test_plate_1536_wells(self):
+        sample = Sample('customer1', 'sample1', 1)
+        af48 = Well('AF48', sample)
+        aa1 = Well('AA1', sample)
+        b1 = Well('B1', sample)
+        plate = Plate('DN12345', '32x48', [af48, aa1, b1])
+
+        self.assertEqual((32, 48), plate.get_grid_rows_columns())
+        self.assertListEqual([b1, aa1, af48], plate.get_wells())
+        self.assertFalse(plate.well_in_range('AG1'))
+        self.assertEqual(('AF', 48), af48.get_split_label())
 
     def test_sample_str(self):
         sample = Sample('customer1', 'sample1', '1')
@@ -0,0 +1,105 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from pylims import config
+from pylims import migrate
+from pylims.dba import SQLite3DataSource, SchemaError
+
+
+class MigrateTest(unittest.TestCase):
+
+    def setUp(self):
+        # Schema version 0, before sample.concentration.
+        self.conn = sqlite3.connect(':memory:', isolation_level=None)
+        self.conn.executescript("""
+            create table sample (customer text, name text,
+                sample_id integer primary key autoincrement, tag text);
+            create table sample_tube (barcode text primary key,
+                sample_id integer, moved_to text);
+            create table lab_tube (barcode text primary key,
+                sample_id integer, moved_to text);
+            create table plate (barcode text primary key,
+                grid text default '8x12');
+            create table well (plate_barcode text, label text,
+                sample_id integer);
+            insert into plate (barcode, grid) values ('DN00001', '16x24');
+            insert into well values ('DN00001', 'B2', 1);
+            insert into well values ('DN00002', 'B2', 2);
+        """)
+        self.addCleanup(self.conn.close)
+
+    def test_migrate(self):
+        self.assertEqual(0, migrate.get_version(self.conn))
+        self.assertEqual(len(migrate.migrations), migrate.migrate(self.conn))
+        self.assertEqual(len(migrate.migrations),
+                         migrate.get_version(self.conn))
+
+        columns = [x[1] for x in
+                   self.conn.execute("pragma table_info(sample)")]
+        self.assertIn('concentration', columns)
+        indexes = [x[0] for x in self.conn.execute(
+            "select name from sqlite_master where type = 'index'")]
+        self.assertIn('well_sample_id', indexes)
+        self.assertIn('sample_customer', indexes)
+        self.assertIn('well_plate_ordinal', indexes)
+        # Ordinals from the grid of each plate, 8x12 without a plate row.
+        rows = self.conn.execute("select plate_barcode, ordinal from well "
+                                 "order by plate_barcode").fetchall()
+        self.assertEqual([('DN00001', 25), ('DN00002', 13)], rows)
+
+        self.assertEqual(0, migrate.migrate(self.conn))  # up to date
+
+    def test_failed_migration(self):
+        def fail(conn):
+            conn.execute("create table partial (x)")
+            raise sqlite3.OperationalError('failed')
+
+        migrations = migrate.migrations
+        migrate.migrations = [migrations[0], fail]
+        self.addCleanup(setattr, migrate, 'migrations', migrations)
+        with self.assertRaises(sqlite3.OperationalError):
+            migrate.migrate(self.conn)
+
+        self.assertEqual(1, migrate.get_version(self.conn))
+        tables = [x[0] for x in self.conn.execute(
+            "select name from sqlite_master where type = 'table'")]
+        self.assertNotIn('partial', tables)
+
+    def test_outdated_schema(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        name = os.path.join(directory, 'outdated.sqlite3')
+        shutil.copy(os.path.join(config.base_dir, 'misc',
+                                 'template_db.sqlite3'), name)
+        conn = sqlite3.connect(name)
+        conn.execute("pragma user_version = 4")
+        conn.close()
+
+        with self.assertRaises(SchemaError) as context:
+            SQLite3DataSource(dict(engine='sqlite3', name=name))
+        self.assertEqual((4, len(migrate.migrations)),
+                         (context.exception.version, context.exception.latest))
+        self.assertIn('lims.py migrate', str(context.exception))
+
+        migrate.migrate_database(name)
+        SQLite3DataSource(dict(engine='sqlite3', name=name)).close_connection()
+
+    def test_enable_wal(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        name = os.path.join(directory, 'wal.sqlite3')
+        shutil.copy(os.path.join(config.base_dir, 'misc',
+                                 'template_db.sqlite3'), name)
+
+        self.assertEqual('wal', migrate.enable_wal(name))
+        conn = sqlite3.connect(name)
+        self.addCleanup(conn.close)
+        self.assertEqual('wal',
+                         conn.execute("pragma journal_mode").fetchone()[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
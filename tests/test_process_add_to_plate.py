@@ -147,6 +147,48 @@ class ProcessTest(unittest.TestCase):
 
         self.assertEqual(Response.ADDED_SAMPLE_TO_PLATE, response.get_status())
 
+    def test_existing_plate_is_full(self):
+        sample = Sample('customer1', 'sample1')
+        sample_tube = SampleTube('NT12345', sample)
+        plate = Plate('DN12345', '1x2', [Well('A1', sample), Well('A2', sample)])
+
+        self.dataset.begin_transaction()
+        self.dataset.create_sample_tube(sample_tube)
+        self.dataset.create_plate(plate)
+        self.dataset.commit_transaction()
+
+        response = self.process.add_to_plate(
+            sample.get_sample_id(), plate.get_barcode(), 'A1')
+
+        self.assertEqual(Response.PLATE_IS_FULL, response.get_status())
+        self.assertEqual('1x2', response.get_data()['plate_grid'])
+
+    def test_existing_plate_wells_not_loaded(self):
+        sample = Sample('customer1', 'sample1')
+        sample_tube = SampleTube('NT12345', sample)
+        plate = Plate('DN12345', '16x24', [Well('A1', sample)])
+
+        self.dataset.begin_transaction()
+        self.dataset.create_sample_tube(sample_tube)
+        self.dataset.create_plate(plate)
+        self.dataset.commit_transaction()
+
+        def raise_exception(*args):
+            raise AssertionError('plate loaded')
+
+        original = self.dataset.find_plate_by_barcode
+        self.dataset.find_plate_by_barcode = raise_exception
+        try:
+            response = self.process.add_to_plate(
+                sample.get_sample_id(), plate.get_barcode(), 'P24')
+        finally:
+            self.dataset.find_plate_by_barcode = original
+
+        self.assertEqual(Response.ADDED_SAMPLE_TO_PLATE, response.get_status())
+        plate = self.dataset.find_plate_by_barcode('DN12345')
+        self.assertEqual(['A1', 'P24'],
+                         [x.get_label() for x in plate.get_wells()])
+
     def test_new_plate_well_out_of_range(self):
         sample = Sample('customer1', 'sample1')
         sample_tube = SampleTube('NT12345', sample)
@@ -0,0 +1,106 @@
+import unittest
+
+from pylims import config
+from pylims.dba import DataSet
+from pylims.lab import Sample, Plate, Well
+from pylims.process import Process, Response
+
+
+class ProcessTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.dataset = DataSet(config.test_database)
+        cls.process = Process(cls.dataset)
+
+    def setUp(self):
+        self.dataset._reset_tables()
+        rows = [('customer1-sample%d' % i, 'NT%05d' % i) for i in range(1, 4)]
+        self.process.record_receipts(rows)  # sample_ids 1, 2 and 3
+
+    def test_new_plate(self):
+        rows = [('1', 'A1'), ('2', 'B1'), ('3', 'A2')]
+
+        responses = self.process.add_to_plate_map('DN12345', rows)
+
+        statuses = [x.get_status() for x in responses]
+        self.assertEqual([Response.ADDED_SAMPLE_TO_PLATE] * 3, statuses)
+        plate = self.dataset.find_plate_by_barcode('DN12345')
+        labels = [x.get_label() for x in plate.get_wells()]
+        self.assertEqual(['A1', 'A2', 'B1'], labels)
+
+    def test_new_plate_grid(self):
+        rows = [('1', 'AF48'), ('2', 'AA1'), ('3', 'B1')]
+
+        responses = self.process.add_to_plate_map('DN12345', rows, '32x48')
+
+        statuses = [x.get_status() for x in responses]
+        self.assertEqual([Response.ADDED_SAMPLE_TO_PLATE] * 3, statuses)
+        plate = self.dataset.find_plate_by_barcode('DN12345')
+        self.assertEqual('32x48', plate.get_grid())
+        labels = [x.get_label() for x in plate.get_wells()]
+        self.assertEqual(['B1', 'AA1', 'AF48'], labels)
+
+    def test_invalid_grid(self):
+        responses = self.process.add_to_plate_map('DN12345', [('1', 'A1')],
+                                                  '8x13')
+
+        self.assertEqual(Response.INVALID_GRID, responses[0].get_status())
+        self.assertEqual('8x13', responses[0].get_data()['plate_grid'])
+        self.assertIsNone(self.dataset.find_plate_by_barcode('DN12345'))
+
+    def test_existing_plate(self):
+        plate = Plate('DN12345')
+        plate.add_well(Well('A1', Sample('customer1', 'sample1', 1)))
+        self.dataset.begin_transaction()
+        self.dataset.create_plate(plate)
+        self.dataset.commit_transaction()
+
+        rows = [('2', 'A1'), ('2', 'A2'), ('3', 'A2'), ('3', 'A13'),
+                ('4', 'A3'), ('3', 'X'), ('x', 'A4')]
+
+        responses = self.process.add_to_plate_map('DN12345', rows)
+
+        statuses = [x.get_status() for x in responses]
+        self.assertEqual([Response.WELL_NOT_EMPTY,
+                          Response.ADDED_SAMPLE_TO_PLATE,
+                          Response.WELL_NOT_EMPTY,  # duplicate well in rows
+                          Response.WELL_OUT_OF_RANGE,
+                          Response.SAMPLE_NOT_FOUND,
+                          Response.INVALID_WELL_POSITION,
+                          Response.SAMPLE_NOT_FOUND], statuses)
+        plate = self.dataset.find_plate_by_barcode('DN12345')
+        self.assertEqual(2, len(plate.get_wells()))
+
+    def test_plate_is_full(self):
+        rows = [('1', '%s%d' % (row, column))
+                for row in 'ABCDEFGH' for column in range(1, 13)]
+        rows.append(('2', 'A1'))
+
+        responses = self.process.add_to_plate_map('DN12345', rows)
+
+        self.assertEqual(Response.PLATE_IS_FULL, responses[-1].get_status())
+        plate = self.dataset.find_plate_by_barcode('DN12345')
+        self.assertTrue(plate.is_full())
+
+    def test_invalid_plate_barcode(self):
+        responses = self.process.add_to_plate_map('DN0', [('1', 'A1')])
+
+        self.assertEqual(Response.INVALID_PLATE_BARCODE,
+                         responses[0].get_status())
+
+    def test_unexpected_error(self):
+        def raise_exception(*args):
+            raise Exception('test exception')
+
+        original = self.dataset.create_plate
+        self.dataset.create_plate = raise_exception
+        try:
+            with self.assertLogs():
+                responses = self.process.add_to_plate_map(
+                    'DN12345', [('1', 'A1')])
+        finally:
+            self.dataset.create_plate = original
+
+        self.assertEqual(Response.UNEXPECTED_ERROR, responses[0].get_status())
+        self.assertIsNone(self.dataset.find_plate_by_barcode('DN12345'))
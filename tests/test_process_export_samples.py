@@ -0,0 +1,126 @@
+import csv
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from pylims import config
+from pylims import export
+from pylims.dba import DataSet
+from pylims.process import Process, Response
+
+
+class ProcessTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.dataset = DataSet(config.test_database)
+        cls.process = Process(cls.dataset)
+
+    def setUp(self):
+        self.dataset._reset_tables()
+        self.directory = tempfile.mkdtemp()
+        self.process.record_receipt('customer1-sample1', 'NT00001')
+        self.process.add_to_plate('1', 'DN00001', 'B1')
+        self.process.record_receipt('customer1-sample2', 'NT00002')
+        self.process.tube_transfer('NT00002', 'NT00003')
+        self.process.tag('2', 'CAT')
+        self.process.update_concentration('2', '100')
+        self.process.record_receipt('customer2-sample1', 'NT00004')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_exported_csv(self):
+        filename = os.path.join(self.directory, 'samples.csv')
+
+        response = self.process.export_samples('csv', filename)
+
+        self.assertEqual(Response.EXPORTED_SAMPLES, response.get_status())
+        self.assertEqual(4, response.get_data()['count'])
+        with open(filename, newline='') as fp:
+            rows = list(csv.reader(fp))
+        self.assertEqual(list(export.columns), rows[0])
+        self.assertEqual([
+            ['1', 'customer1', 'sample1', '', '', 'sample_tube', 'NT00001', ''],
+            ['1', 'customer1', 'sample1', '', '', 'plate', 'DN00001', 'B1'],
+            ['2', 'customer1', 'sample2', 'CAT', '100', 'sample_tube',
+             'NT00003', ''],
+            ['3', 'customer2', 'sample1', '', '', 'sample_tube', 'NT00004', ''],
+        ], rows[1:])
+
+    def test_exported_jsonl_with_filters(self):
+        filename = os.path.join(self.directory, 'samples.jsonl')
+
+        response = self.process.export_samples(
+            'jsonl', filename, customer='customer1', tagged='yes',
+            min_concentration='50', max_concentration='100')
+
+        self.assertEqual(1, response.get_data()['count'])
+        with open(filename) as fp:
+            rows = [json.loads(x) for x in fp]
+        self.assertEqual([dict(sample_id=2, customer='customer1',
+                               name='sample2', tag='CAT', concentration=100,
+                               container_kind='sample_tube',
+                               container_barcode='NT00003',
+                               well_label=None)], rows)
+
+    def test_untagged(self):
+        filename = os.path.join(self.directory, 'samples.jsonl')
+        response = self.process.export_samples('jsonl', filename, tagged='no')
+        self.assertEqual(3, response.get_data()['count'])
+
+    def test_invalid_export_format(self):
+        filename = os.path.join(self.directory, 'samples.xml')
+        response = self.process.export_samples('xml', filename)
+        self.assertEqual(Response.INVALID_EXPORT_FORMAT,
+                         response.get_status())
+        self.assertFalse(os.path.exists(filename))
+
+    def test_invalid_filter(self):
+        filename = os.path.join(self.directory, 'samples.csv')
+        response = self.process.export_samples('csv', filename, tagged='maybe')
+        self.assertEqual(Response.INVALID_FILTER, response.get_status())
+        response = self.process.export_samples('csv', filename,
+                                               min_concentration='high')
+        self.assertEqual('min_concentration', response.get_data()['filter'])
+
+    def test_cannot_write_file(self):
+        filename = os.path.join(self.directory, 'missing', 'samples.csv')
+        response = self.process.export_samples('csv', filename)
+        self.assertEqual(Response.CANNOT_WRITE_FILE, response.get_status())
+
+    def test_utf8(self):
+        self.process.record_receipt('kunde-prøve', 'NT00005')
+        filename = os.path.join(self.directory, 'samples.csv')
+
+        self.process.export_samples('csv', filename, customer='kunde')
+
+        with open(filename, 'rb') as fp:
+            self.assertIn('prøve'.encode('utf-8'), fp.read())
+
+    def test_failure_keeps_existing_file(self):
+        filename = os.path.join(self.directory, 'samples.csv')
+        with open(filename, 'w') as fp:
+            fp.write('previous export\n')
+
+        def fail(fp, rows):
+            fp.write('partial\n')
+            raise Exception('test exception')
+
+        formats = dict(export.formats, csv=fail)
+        original = export.formats
+        export.formats = formats
+        self.addCleanup(setattr, export, 'formats', original)
+        with self.assertLogs():
+            response = self.process.export_samples('csv', filename)
+
+        self.assertEqual(Response.UNEXPECTED_ERROR, response.get_status())
+        with open(filename) as fp:
+            self.assertEqual('previous export\n', fp.read())
+        self.assertEqual(['samples.csv'], os.listdir(self.directory))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+
+from pylims import config
+from pylims.dba import DataSet
+from pylims.process import Process, Response
+
+
+class ProcessTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.dataset = DataSet(config.test_database)
+        cls.process = Process(cls.dataset)
+
+    def setUp(self):
+        self.dataset._reset_tables()
+
+    def test_invalid_tube_barcode(self):
+        response = self.process.lineage('NT0')
+        self.assertEqual(Response.INVALID_TUBE_BARCODE, response.get_status())
+
+    def test_tube_not_found(self):
+        response = self.process.lineage('NT00001')
+        self.assertEqual(Response.TUBE_NOT_FOUND, response.get_status())
+
+    def test_found_lineage(self):
+        self.process.record_receipt('customer1-sample1', 'NT00001')
+        for i in range(1, 11):
+            self.process.tube_transfer('NT%05d' % i, 'NT%05d' % (i + 1))
+
+        for barcode in ('NT00001', 'NT00006', 'NT00011'):
+            response = self.process.lineage(barcode)
+            self.assertEqual(Response.FOUND_LINEAGE, response.get_status())
+            data = response.get_data()
+            self.assertEqual(['NT%05d' % i for i in range(1, 12)],
+                             [x.get_barcode() for x in data['result']])
+            self.assertEqual('NT00011', data['current'].get_barcode())
+            self.assertEqual('sample1',
+                             data['current'].get_sample().get_name())
+
+    def test_without_transfers(self):
+        self.process.record_receipt('customer1-sample1', 'NT00001')
+        response = self.process.lineage('NT00001')
+        tubes = response.get_data()['result']
+        self.assertEqual(['NT00001'], [x.get_barcode() for x in tubes])
+
+
+if __name__ == '__main__':
+    unittest.main()
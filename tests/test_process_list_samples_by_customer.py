@@ -0,0 +1,82 @@
+import unittest
+
+from pylims import config
+from pylims.dba import DataSet
+from pylims.process import Process, Response
+
+
+class ProcessTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.dataset = DataSet(config.test_database)
+        cls.process = Process(cls.dataset)
+
+    def setUp(self):
+        self.dataset._reset_tables()
+        # Names in reverse order of sample_ids.
+        rows = [('customer1-sample%d' % (6 - i), 'NT%05d' % i)
+                for i in range(1, 6)]
+        rows.append(('customer2-sample1', 'NT00006'))
+        self.process.record_receipts(rows)
+
+    def names(self, response):
+        return [x.get_name() for x in response.get_data()['result']]
+
+    def test_pages_by_name(self):
+        response = self.process.list_samples_by_customer('customer1',
+                                                         limit='2')
+        self.assertEqual(Response.FOUND_CUSTOMER_SAMPLES,
+                         response.get_status())
+        self.assertEqual(['sample1', 'sample2'], self.names(response))
+        self.assertEqual('sample2', response.get_data()['next'])
+
+        response = self.process.list_samples_by_customer(
+            'customer1', 'sample2', '2')
+        self.assertEqual(['sample3', 'sample4'], self.names(response))
+
+        response = self.process.list_samples_by_customer(
+            'customer1', 'sample4', '2')
+        self.assertEqual(Response.FOUND_LAST_CUSTOMER_SAMPLES,
+                         response.get_status())
+        self.assertEqual(['sample5'], self.names(response))
+        self.assertNotIn('next', response.get_data())
+
+    def test_pages_by_sample_id(self):
+        response = self.process.list_samples_by_customer(
+            'customer1', limit='3', order='sample_id')
+        self.assertEqual(['sample5', 'sample4', 'sample3'],
+                         self.names(response))
+        self.assertEqual(3, response.get_data()['next'])
+
+        response = self.process.list_samples_by_customer(
+            'customer1', '3', '3', 'sample_id')
+        self.assertEqual(Response.FOUND_LAST_CUSTOMER_SAMPLES,
+                         response.get_status())
+        self.assertEqual(['sample2', 'sample1'], self.names(response))
+
+    def test_default_page(self):
+        response = self.process.list_samples_by_customer('customer2')
+        self.assertEqual(Response.FOUND_LAST_CUSTOMER_SAMPLES,
+                         response.get_status())
+        self.assertEqual(['sample1'], self.names(response))
+
+    def test_customer_not_found(self):
+        response = self.process.list_samples_by_customer('customer3')
+        self.assertEqual(Response.CUSTOMER_NOT_FOUND, response.get_status())
+
+    def test_invalid_page(self):
+        for options, parameter in ((dict(order='tag'), 'order'),
+                                   (dict(limit='0'), 'limit'),
+                                   (dict(limit='1001'), 'limit'),
+                                   (dict(limit='ten'), 'limit'),
+                                   (dict(after='x', order='sample_id'),
+                                    'after')):
+            response = self.process.list_samples_by_customer('customer1',
+                                                             **options)
+            self.assertEqual(Response.INVALID_PAGE, response.get_status())
+            self.assertEqual(parameter, response.get_data()['parameter'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+import unittest
+
+from pylims import config
+from pylims.dba import DataSet
+from pylims.lab import Sample, SampleTube, LabTube
+from pylims.process import Process, Response
+
+
+class ProcessTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.dataset = DataSet(config.test_database)
+        cls.process = Process(cls.dataset)
+
+    def setUp(self):
+        self.dataset._reset_tables()
+
+    def test_recorded_samples(self):
+        rows = [('customer1-sample1', 'NT00001'),
+                ('customer1-sample2', 'NT00002'),
+                ('customer2-sample1', 'NT00003')]
+
+        responses = self.process.record_receipts(rows)
+
+        statuses = [x.get_status() for x in responses]
+        self.assertEqual([Response.RECORDED_SAMPLE] * 3, statuses)
+        tube = responses[2].get_data()['tube']
+        self.assertEqual(3, tube.get_sample().get_sample_id())
+        recorded = self.dataset.find_sample_tube_by_barcode('NT00003')
+        self.assertEqual('customer2-sample1',
+                         recorded.get_sample().get_customer_sample_name())
+        self.assertEqual(3, recorded.get_sample().get_sample_id())
+
+    def test_invalid_rows(self):
+        rows = [('customer1', 'NT00001'),
+                ('customer1-sample1', 'XX00001')]
+
+        responses = self.process.record_receipts(rows)
+
+        statuses = [x.get_status() for x in responses]
+        self.assertEqual([Response.INVALID_CUSTOMER_SAMPLE_NAME,
+                          Response.INVALID_TUBE_BARCODE], statuses)
+
+    def test_existing_names_and_barcodes(self):
+        sample = Sample('customer1', 'sample1')
+        source = SampleTube('NT00001', sample)
+        self.dataset.begin_transaction()
+        self.dataset.create_sample_tube(source)
+        self.dataset.create_lab_tube(LabTube('NT00002', sample))
+        self.dataset.move_sample(source, SampleTube('NT00003'))
+        self.dataset.commit_transaction()
+
+        rows = [('customer1-sample1', 'NT00009'),
+                ('customer1-sample2', 'NT00001'),
+                ('customer1-sample3', 'NT00002'),
+                ('customer1-sample4', 'NT00003')]
+
+        responses = self.process.record_receipts(rows)
+
+        statuses = [x.get_status() for x in responses]
+        self.assertEqual([Response.EXISTING_CUSTOMER_SAMPLE_NAME,
+                          Response.DISCARDED_SAMPLE_TUBE,
+                          Response.EXISTING_LAB_TUBE,
+                          Response.EXISTING_SAMPLE_TUBE], statuses)
+
+    def test_duplicates_within_rows(self):
+        rows = [('customer1-sample1', 'NT00001'),
+                ('customer1-sample1', 'NT00002'),
+                ('customer1-sample2', 'NT00001')]
+
+        responses = self.process.record_receipts(rows)
+
+        statuses = [x.get_status() for x in responses]
+        self.assertEqual([Response.RECORDED_SAMPLE,
+                          Response.EXISTING_CUSTOMER_SAMPLE_NAME,
+                          Response.EXISTING_SAMPLE_TUBE], statuses)
+        self.assertIsNone(self.dataset.find_tube_by_barcode('NT00002'))
+
+    def test_batches(self):
+        rows = [('customer1-sample%d' % i, 'NT%05d' % i)
+                for i in range(1, 12)]
+        original = self.process.batch_size
+        self.process.batch_size = 5
+        try:
+            responses = self.process.record_receipts(iter(rows))
+        finally:
+            self.process.batch_size = original
+
+        statuses = set(x.get_status() for x in responses)
+        self.assertEqual({Response.RECORDED_SAMPLE}, statuses)
+        ids = [x.get_data()['tube'].get_sample().get_sample_id()
+               for x in responses]
+        self.assertEqual(list(range(1, 12)), ids)
+
+    def test_unexpected_error(self):
+        def raise_exception(*args):
+            raise Exception('test exception')
+
+        original = self.dataset.create_sample_tubes
+        self.dataset.create_sample_tubes = raise_exception
+        try:
+            with self.assertLogs():
+                responses = self.process.record_receipts(
+                    [('customer1-sample1', 'NT00001')])
+        finally:
+            self.dataset.create_sample_tubes = original
+
+        self.assertEqual(Response.UNEXPECTED_ERROR, responses[0].get_status())
+        self.assertIsNone(self.dataset.find_tube_by_barcode('NT00001'))
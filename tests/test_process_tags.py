@@ -0,0 +1,60 @@
+import unittest
+
+from pylims import config
+from pylims.dba import DataSet
+from pylims.process import Process, Response
+
+
+class ProcessTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.dataset = DataSet(config.test_database)
+        cls.process = Process(cls.dataset)
+
+    def setUp(self):
+        self.dataset._reset_tables()
+        rows = [('customer1-sample%d' % i, 'NT%05d' % i) for i in range(1, 4)]
+        self.process.record_receipts(rows)  # sample_ids 1, 2 and 3
+        self.process.tag(3, 'CAT')
+
+    def test_tagged_samples(self):
+        rows = [('1', 'ACGT'), ('2', 'TTGA')]
+
+        responses = self.process.tags(rows)
+
+        statuses = [x.get_status() for x in responses]
+        self.assertEqual([Response.TAGGED_SAMPLE] * 2, statuses)
+        samples = self.dataset.find_samples_by_sample_ids([1, 2])
+        self.assertEqual('ACGT', samples[1].get_tag())
+        self.assertEqual('TTGA', samples[2].get_tag())
+
+    def test_invalid_rows(self):
+        rows = [('1', 'DOG'), ('4', 'ACGT'), ('3', 'ACGT'), ('1', 'ACGT'),
+                ('1', 'GGCC')]
+
+        responses = self.process.tags(rows)
+
+        statuses = [x.get_status() for x in responses]
+        self.assertEqual([Response.INVALID_TAG,
+                          Response.SAMPLE_NOT_FOUND,
+                          Response.ALREADY_TAGGED,
+                          Response.TAGGED_SAMPLE,
+                          Response.ALREADY_TAGGED], statuses)
+        sample = self.dataset.find_sample_by_sample_id(1)
+        self.assertEqual('ACGT', sample.get_tag())
+
+    def test_unexpected_error(self):
+        def raise_exception(*args):
+            raise Exception('test exception')
+
+        original = self.dataset.update_sample_tags
+        self.dataset.update_sample_tags = raise_exception
+        try:
+            with self.assertLogs():
+                responses = self.process.tags([('1', 'ACGT')])
+        finally:
+            self.dataset.update_sample_tags = original
+
+        self.assertEqual(Response.UNEXPECTED_ERROR, responses[0].get_status())
+        self.assertIsNone(self.dataset.find_sample_by_sample_id(1).get_tag())
@@ -0,0 +1,87 @@
+import unittest
+
+from pylims import config
+from pylims.dba import DataSet
+from pylims.lab import SampleTube, LabTube
+from pylims.process import Process, Response
+
+
+class ProcessTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.dataset = DataSet(config.test_database)
+        cls.process = Process(cls.dataset)
+
+    def setUp(self):
+        self.dataset._reset_tables()
+        rows = [('customer1-sample%d' % i, 'NT%05d' % i) for i in range(1, 4)]
+        self.process.record_receipts(rows)  # NT00001 to NT00003
+        self.process.add_to_tube(1, 'NT00011')  # lab tube
+
+    def test_moved_samples(self):
+        rows = [('NT00001', 'NT00101'), ('NT00011', 'NT00111')]
+
+        responses = self.process.tube_transfers(rows)
+
+        statuses = [x.get_status() for x in responses]
+        self.assertEqual([Response.MOVED_SAMPLE] * 2, statuses)
+        tube = self.dataset.find_tube_by_barcode('NT00101')
+        self.assertIsInstance(tube, SampleTube)
+        self.assertEqual(1, tube.get_sample().get_sample_id())
+        tube = self.dataset.find_tube_by_barcode('NT00111')
+        self.assertIsInstance(tube, LabTube)
+        self.assertEqual(1, tube.get_sample().get_sample_id())
+        self.assertTrue(self.dataset.find_tube_by_barcode('NT00001')
+                        .is_discarded())
+
+    def test_conflicts(self):
+        rows = [('NT00001', 'NT00101'),
+                ('NT00101', 'NT00102'),  # destination is a later source
+                ('NT00001', 'NT00103'),  # source already transferred
+                ('NT00002', 'NT00101'),  # destination already used
+                ('NT00003', 'NT00002'),  # destination exists
+                ('NT00009', 'NT00104'),  # source not found
+                ('NTX', 'NT00105'),
+                ('NT00003', 'NTX')]
+
+        responses = self.process.tube_transfers(rows)
+
+        statuses = [x.get_status() for x in responses]
+        self.assertEqual([Response.MOVED_SAMPLE,
+                          Response.CHAINED_TRANSFER,
+                          Response.DISCARDED_SOURCE_TUBE,
+                          Response.DESTINATION_TUBE_NOT_EMPTY,
+                          Response.DESTINATION_TUBE_NOT_EMPTY,
+                          Response.SOURCE_TUBE_NOT_FOUND,
+                          Response.INVALID_SOURCE_TUBE_BARCODE,
+                          Response.INVALID_DESTINATION_TUBE_BARCODE],
+                         statuses)
+        self.assertIsNone(self.dataset.find_tube_by_barcode('NT00102'))
+        self.assertIsNone(self.dataset.find_tube_by_barcode('NT00103'))
+
+    def test_discarded_tubes(self):
+        self.process.tube_transfer('NT00001', 'NT00101')
+        rows = [('NT00001', 'NT00201'), ('NT00002', 'NT00001')]
+
+        responses = self.process.tube_transfers(rows)
+
+        statuses = [x.get_status() for x in responses]
+        self.assertEqual([Response.DISCARDED_SOURCE_TUBE,
+                          Response.DISCARDED_DESTINATION_TUBE], statuses)
+
+    def test_unexpected_error(self):
+        def raise_exception(*args):
+            raise Exception('test exception')
+
+        original = self.dataset.move_samples
+        self.dataset.move_samples = raise_exception
+        try:
+            with self.assertLogs():
+                responses = self.process.tube_transfers(
+                    [('NT00001', 'NT00101')])
+        finally:
+            self.dataset.move_samples = original
+
+        self.assertEqual(Response.UNEXPECTED_ERROR, responses[0].get_status())
+        self.assertIsNone(self.dataset.find_tube_by_barcode('NT00101'))
@@ -0,0 +1,69 @@
+import unittest
+
+from pylims import config
+from pylims.dba import DataSet
+from pylims.process import Process, Response
+
+
+class ProcessTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.dataset = DataSet(config.test_database)
+        cls.process = Process(cls.dataset)
+
+    def setUp(self):
+        self.dataset._reset_tables()
+        rows = [('customer1-sample%d' % i, 'NT%05d' % i) for i in range(1, 3)]
+        self.process.record_receipts(rows)  # sample_ids 1 and 2
+        self.process.add_to_plate_map('DN12345', [('1', 'A1'), ('2', 'B2')])
+
+    def test_updated_concentrations(self):
+        rows = [('A1', '50'), ('B2', '200')]
+
+        responses = self.process.update_concentrations('DN12345', rows)
+
+        statuses = [x.get_status() for x in responses]
+        self.assertEqual([Response.UPDATED_SAMPLE_CONCENTRATION] * 2, statuses)
+        self.assertEqual(
+            200, responses[1].get_data()['sample'].get_concentration())
+        # Sample lookups do not load concentrations; export rows do.
+        rows = self.dataset.iter_sample_locations()
+        self.assertEqual({1: 50, 2: 200}, dict((x[0], x[4]) for x in rows))
+
+    def test_invalid_rows(self):
+        rows = [('A1', '49'), ('A2', '100'), ('A13', '100'), ('X', '100'),
+                ('A1', 'n/a')]
+
+        responses = self.process.update_concentrations('DN12345', rows)
+
+        statuses = [x.get_status() for x in responses]
+        self.assertEqual([Response.INVALID_SAMPLE_CONCENTRATION,
+                          Response.EMPTY_WELL,
+                          Response.WELL_OUT_OF_RANGE,
+                          Response.INVALID_WELL_POSITION,
+                          Response.INVALID_SAMPLE_CONCENTRATION], statuses)
+
+    def test_plate_not_found(self):
+        responses = self.process.update_concentrations(
+            'DN54321', [('A1', '100')])
+        self.assertEqual(Response.PLATE_NOT_FOUND, responses[0].get_status())
+
+        responses = self.process.update_concentrations('DN0', [('A1', '100')])
+        self.assertEqual(Response.INVALID_PLATE_BARCODE,
+                         responses[0].get_status())
+
+    def test_unexpected_error(self):
+        def raise_exception(*args):
+            raise Exception('test exception')
+
+        original = self.dataset.update_sample_concentrations
+        self.dataset.update_sample_concentrations = raise_exception
+        try:
+            with self.assertLogs():
+                responses = self.process.update_concentrations(
+                    'DN12345', [('A1', '100')])
+        finally:
+            self.dataset.update_sample_concentrations = original
+
+        self.assertEqual(Response.UNEXPECTED_ERROR, responses[0].get_status())
@@ -0,0 +1,53 @@
+import unittest
+
+from pylims import config
+from pylims.dba import DataSet
+from pylims.lab import Plate, LabTube, SampleTube
+from pylims.process import Process, Response
+
+
+class ProcessTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.dataset = DataSet(config.test_database)
+        cls.process = Process(cls.dataset)
+
+    def setUp(self):
+        self.dataset._reset_tables()
+
+    def test_sample_not_found(self):
+        response = self.process.where_is('1')
+        self.assertEqual(Response.SAMPLE_NOT_FOUND, response.get_status())
+
+    def test_found_sample_containers(self):
+        self.process.record_receipt('customer1-sample1', 'NT00001')
+        self.process.add_to_tube('1', 'NT00002')
+        self.process.add_to_plate('1', 'DN00001', 'B1')
+        self.process.add_to_plate('1', 'DN00001', 'A2')
+        self.process.record_receipt('customer1-sample2', 'NT00003')
+        self.process.add_to_plate('2', 'DN00001', 'A1')
+
+        response = self.process.where_is('1')
+        self.assertEqual(Response.FOUND_SAMPLE_CONTAINERS,
+                         response.get_status())
+        tube, lab_tube, plate = response.get_data()['result']
+        self.assertIsInstance(tube, SampleTube)
+        self.assertEqual('NT00001', tube.get_barcode())
+        self.assertIsInstance(lab_tube, LabTube)
+        self.assertEqual(1, lab_tube.get_sample().get_sample_id())
+        self.assertIsInstance(plate, Plate)
+        self.assertEqual(['A2', 'B1'],
+                         [x.get_label() for x in plate.get_wells()])
+
+    def test_moved_sample(self):
+        self.process.record_receipt('customer1-sample1', 'NT00001')
+        self.process.tube_transfer('NT00001', 'NT00002')
+
+        response = self.process.where_is('1')
+        barcodes = [x.get_barcode() for x in response.get_data()['result']]
+        self.assertEqual(['NT00002'], barcodes)
+
+
+if __name__ == '__main__':
+    unittest.main()
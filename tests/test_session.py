@@ -0,0 +1,121 @@
+import unittest
+
+from pylims import config
+from pylims.dba import DataSet
+from pylims.process import Process, Response
+from pylims.session import Session
+
+
+class SessionTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.dataset = DataSet(config.test_database)
+
+    def setUp(self):
+        self.session = Session(self.dataset)
+        self.process = Process(self.session)
+        self.session._reset_tables()
+
+    def _count_statements(self, function, *args):
+        conn = self.dataset.get_conn()
+        statements = []
+        conn.set_trace_callback(statements.append)
+        try:
+            result = function(*args)
+        finally:
+            conn.set_trace_callback(None)
+        return result, statements
+
+    @unittest.skipIf(config.test_database['engine'] != 'sqlite3',
+                     'inspects SQL')
+    def test_identity_map(self):
+        self.process.record_receipt('customer1-sample1', 'NT00001')
+        self.process.add_to_plate(1, 'DN00001', 'A1')
+        self.session.clear()
+
+        tube, statements = self._count_statements(
+            self.session.find_tube_by_barcode, 'NT00001')
+        self.assertEqual(1, len(statements))
+
+        again, statements = self._count_statements(
+            self.session.find_tube_by_barcode, 'NT00001')
+        self.assertEqual(0, len(statements))
+        self.assertIs(tube, again)
+
+        sample, statements = self._count_statements(
+            self.session.find_sample_by_sample_id, '1')
+        self.assertEqual(0, len(statements))
+        self.assertIs(tube.get_sample(), sample)
+
+        plate = self.session.find_plate_by_barcode('DN00001')
+        self.assertIs(sample, plate.get_wells()[0].get_sample())
+        self.assertIsNone(self.session.find_lab_tube_by_barcode('NT00001'))
+
+    def test_writes_update_mapped_instances(self):
+        self.process.record_receipt('customer1-sample1', 'NT00001')
+        tube = self.session.find_tube_by_barcode('NT00001')
+
+        self.process.tag(1, 'CAT')
+        response = self.process.tube_transfer('NT00001', 'NT00002')
+
+        self.assertEqual(Response.MOVED_SAMPLE, response.get_status())
+        self.assertTrue(tube.is_discarded())
+        destination = self.session.find_tube_by_barcode('NT00002')
+        self.assertEqual('CAT', destination.get_sample().get_tag())
+
+    def test_plate_occupancy(self):
+        self.process.record_receipt('customer1-sample1', 'NT00001')
+        self.process.add_to_plate(1, 'DN00001', 'A1')
+        self.process.add_to_plate(1, 'DN00001', 'A2')  # header only
+
+        plate = self.session.find_plate_by_barcode('DN00001')
+        self.assertEqual(2, len(plate.get_wells()))
+        self.process.add_to_plate(1, 'DN00001', 'A3')  # mapped Plate
+        self.assertEqual(3, len(plate.get_wells()))
+        occupancy = self.session.find_plate_occupancy('DN00001', 'A3')
+        self.assertEqual((plate, 3, True), occupancy)
+
+    @unittest.skipIf(config.test_database['engine'] != 'sqlite3',
+                     'inspects SQL')
+    def test_unit_of_work(self):
+        conn = self.dataset.get_conn()
+        with self.session:
+            self.process.record_receipt('customer1-sample1', 'NT00001')
+            self.process.record_receipt('customer1-sample2', 'NT00002')
+            self.assertTrue(conn.in_transaction)  # pending changes
+        self.assertFalse(conn.in_transaction)
+        self.assertFalse(self.session.in_unit())
+
+        other = DataSet(config.test_database)
+        try:
+            self.assertIsNotNone(other.find_tube_by_barcode('NT00002'))
+        finally:
+            other.close_connection()
+
+    def test_unit_of_work_failed_command(self):
+        def raise_exception(*args):
+            raise Exception('test exception')
+
+        with self.session:
+            self.process.record_receipt('customer1-sample1', 'NT00001')
+            original = self.dataset.create_lab_tube
+            self.dataset.create_lab_tube = raise_exception
+            try:
+                with self.assertLogs():
+                    response = self.process.add_to_tube(1, 'NT00002')
+            finally:
+                self.dataset.create_lab_tube = original
+            self.assertEqual(Response.UNEXPECTED_ERROR, response.get_status())
+
+        # The failed command rolled back only its own savepoint.
+        self.assertIsNotNone(self.dataset.find_tube_by_barcode('NT00001'))
+        self.assertIsNone(self.dataset.find_tube_by_barcode('NT00002'))
+
+    def test_unit_of_work_rollback(self):
+        with self.assertRaises(ValueError):
+            with self.session:
+                self.process.record_receipt('customer1-sample1', 'NT00001')
+                raise ValueError('test exception')
+
+        self.assertIsNone(self.session.find_tube_by_barcode('NT00001'))
@@ -0,0 +1,74 @@
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from string import Template
+
+from pylims import config
+from pylims import shell
+from pylims.dba import DataSet
+from pylims.process import Process
+from pylims.lab import Sample, Well
+
+
+class ShellTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.dataset = DataSet(config.test_database)  # To reset the database.
+        cls.app = shell.Shell(Process(cls.dataset))  # The application instance.
+
+    def setUp(self):
+        self.dataset._reset_tables()  # reset test_db tables and sequences.
+
+    def _write(self, text):
+        fd, filename = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(fd, 'w') as fp:
+            fp.write(text)
+        self.addCleanup(os.remove, filename)
+        return filename
+
+    def test_added_samples_to_plate(self):
+        with redirect_stdout(StringIO()):
+            args = 'record_receipt customer1-sample1 NT00001'.split()
+            self.app.main(args)
+        filename = self._write("sample_id,well_position\n1,A1\n1,A1\n")
+        with redirect_stdout(StringIO()) as fp:
+            args = ['add_to_plate_map', 'DN12345', filename]
+            code = self.app.main(args)
+        actual = fp.getvalue().strip()
+
+        sample = Sample('customer1', 'sample1', 1)
+        expected = [
+            self._render(shell.ADDED_SAMPLE_TO_PLATE_TEMP,
+                         dict(plate_barcode='DN12345',
+                              well=Well('A1', sample))),
+            self._render(shell.WELL_NOT_EMPTY_TEMP,
+                         dict(plate_barcode='DN12345', plate_grid='8x12',
+                              well_position='A1')),
+            (shell.BATCH_SUMMARY_TEMP % (2, 1, 1)).strip()]
+        expected = '\n\n'.join(expected)
+
+        self.assertEqual(code, self.app.EXIT_FAILURE)
+        self.assertMultiLineEqual(expected, actual)
+
+    def test_grid(self):
+        filename = self._write("sample_id,well_position\n1,AA1\n")
+        with redirect_stdout(StringIO()) as fp:
+            args = ['add_to_plate_map', 'DN12345', filename, 'grid=8x13']
+            code = self.app.main(args)
+        actual = fp.getvalue().strip()
+
+        expected = [
+            self._render(shell.INVALID_GRID_TEMP,
+                         dict(plate_grid='8x13',
+                              grids='2x3, 4x6, 6x8, 8x12, 16x24, 32x48')),
+            (shell.BATCH_SUMMARY_TEMP % (1, 0, 1)).strip()]
+        expected = '\n\n'.join(expected)
+
+        self.assertEqual(code, self.app.EXIT_FAILURE)
+        self.assertMultiLineEqual(expected, actual)
+
+    def _render(self, temp, data):
+        return Template(temp).safe_substitute(data).strip()
@@ -5,7 +5,7 @@ from string import Template
 
 from pylims import config
 from pylims import shell
-from pylims.dba import DataSet
+from pylims.dba import DataSet, SchemaError
 
 
 class ShellTest(unittest.TestCase):
@@ -104,5 +104,19 @@ class ShellTest(unittest.TestCase):
         self.assertEqual(code, app.EXIT_FAILURE)
         self.assertMultiLineEqual(expected, actual)
 
+    def test_outdated_schema(self):
+        def start_process():
+            raise SchemaError(4, 5)
+
+        with redirect_stdout(StringIO()) as fp:
+            app = shell.Shell()
+            app.start_process = start_process
+            code = app.main('list_samples_in NT00001'.split())
+        actual = fp.getvalue().strip()
+        expected = (shell.OUTDATED_SCHEMA_TEMP % (4, 5)).strip()
+
+        self.assertEqual(code, app.EXIT_FAILURE)
+        self.assertMultiLineEqual(expected, actual)
+
     def _render(self, temp, data):
         return Template(temp).safe_substitute(data).strip()
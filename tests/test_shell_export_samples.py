@@ -0,0 +1,70 @@
+import os
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+from pylims import config
+from pylims import shell
+from pylims.dba import DataSet
+from pylims.process import Process
+
+
+class ShellTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.dataset = DataSet(config.test_database)  # To reset the database.
+        cls.app = shell.Shell(Process(cls.dataset))  # The application instance.
+
+    def setUp(self):
+        self.dataset._reset_tables()  # reset test_db tables and sequences.
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, 'samples.csv')
+        with redirect_stdout(StringIO()):
+            self.app.main('record_receipt customer1-sample1 NT00001'.split())
+            self.app.main('record_receipt customer2-sample1 NT00002'.split())
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_exported_samples(self):
+        with redirect_stdout(StringIO()) as fp:
+            code = self.app.main(['export_samples', 'csv', self.filename,
+                                  'customer=customer2'])
+        lines = fp.getvalue().strip().splitlines()
+
+        self.assertEqual(self.app.EXIT_SUCCESS, code)
+        self.assertEqual('Exported samples successfully', lines[0])
+        self.assertEqual('File: %s' % self.filename, lines[1])
+        self.assertTrue(lines[2].startswith('Rows: 1 ('), lines[2])
+        with open(self.filename) as fp:
+            self.assertEqual(2, len(fp.readlines()))
+
+    def test_invalid_option(self):
+        with redirect_stdout(StringIO()) as fp:
+            code = self.app.main(['export_samples', 'csv', self.filename,
+                                  'colour=red'])
+        self.assertEqual(self.app.EXIT_FAILURE, code)
+        self.assertTrue(fp.getvalue().startswith(
+            'Invalid option for command export_samples: colour=red'))
+
+    def test_options_of_other_commands(self):
+        with redirect_stdout(StringIO()) as fp:
+            code = self.app.main('where_is 1 customer=customer1'.split())
+        self.assertEqual(self.app.EXIT_FAILURE, code)
+        self.assertEqual('Incorrect number of arguments for command: where_is',
+                         fp.getvalue().strip())
+
+    def test_invalid_export_format(self):
+        with redirect_stdout(StringIO()) as fp:
+            code = self.app.main(['export_samples', 'xml', self.filename])
+        self.assertEqual(self.app.EXIT_FAILURE, code)
+        self.assertEqual('Invalid export format: xml\n'
+                         'Export formats are csv, jsonl.',
+                         fp.getvalue().strip())
+
+
+if __name__ == '__main__':
+    unittest.main()
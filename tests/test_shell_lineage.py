@@ -0,0 +1,47 @@
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+from pylims import config
+from pylims import shell
+from pylims.dba import DataSet
+from pylims.process import Process
+
+
+class ShellTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.dataset = DataSet(config.test_database)  # To reset the database.
+        cls.app = shell.Shell(Process(cls.dataset))  # The application instance.
+
+    def setUp(self):
+        self.dataset._reset_tables()  # reset test_db tables and sequences.
+
+    def test_tube_not_found(self):
+        with redirect_stdout(StringIO()) as fp:
+            code = self.app.main('lineage NT00001'.split())
+        self.assertEqual(self.app.EXIT_FAILURE, code)
+        self.assertEqual('Tube not found: NT00001', fp.getvalue().strip())
+
+    def test_found_lineage(self):
+        with redirect_stdout(StringIO()):
+            self.app.main('record_receipt customer1-sample1 NT00001'.split())
+            self.app.main('tube_transfer NT00001 NT00002'.split())
+        with redirect_stdout(StringIO()) as fp:
+            code = self.app.main('lineage NT00001'.split())
+        current = ('Sample tube: Barcode: NT00002, Sample Id: 1, '
+                   'Customer sample name: customer1-sample1')
+        expected = '\n'.join([
+            'Found lineage',
+            'Sample tube: Barcode: NT00001, Sample moved to: NT00002',
+            current,
+            'Current location: ' + current,
+        ])
+
+        self.assertEqual(self.app.EXIT_SUCCESS, code)
+        self.assertMultiLineEqual(expected, fp.getvalue().strip())
+
+
+if __name__ == '__main__':
+    unittest.main()
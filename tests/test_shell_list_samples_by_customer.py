@@ -0,0 +1,64 @@
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+from pylims import config
+from pylims import shell
+from pylims.dba import DataSet
+from pylims.process import Process
+
+
+class ShellTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.dataset = DataSet(config.test_database)  # To reset the database.
+        cls.app = shell.Shell(Process(cls.dataset))  # The application instance.
+
+    def setUp(self):
+        self.dataset._reset_tables()  # reset test_db tables and sequences.
+        with redirect_stdout(StringIO()):
+            self.app.main('record_receipt customer1-sample1 NT00001'.split())
+            self.app.main('record_receipt customer1-sample2 NT00002'.split())
+
+    def test_found_customer_samples(self):
+        with redirect_stdout(StringIO()) as fp:
+            code = self.app.main(
+                'list_samples_by_customer customer1 limit=1'.split())
+        expected = '\n'.join([
+            'Found customer samples: customer1',
+            'Sample: Sample Id: 1, Customer sample name: customer1-sample1',
+            'Next page: after=sample1',
+        ])
+        self.assertEqual(self.app.EXIT_SUCCESS, code)
+        self.assertEqual(expected, fp.getvalue().strip())
+
+    def test_found_last_customer_samples(self):
+        with redirect_stdout(StringIO()) as fp:
+            code = self.app.main('list_samples_by_customer customer1 '
+                                 'after=sample1 limit=1'.split())
+        expected = '\n'.join([
+            'Found customer samples: customer1',
+            'Sample: Sample Id: 2, Customer sample name: customer1-sample2',
+            'Last page',
+        ])
+        self.assertEqual(self.app.EXIT_SUCCESS, code)
+        self.assertEqual(expected, fp.getvalue().strip())
+
+    def test_customer_not_found(self):
+        with redirect_stdout(StringIO()) as fp:
+            code = self.app.main('list_samples_by_customer customer2'.split())
+        self.assertEqual(self.app.EXIT_FAILURE, code)
+        self.assertEqual('Customer not found: customer2',
+                         fp.getvalue().strip())
+
+    def test_invalid_page(self):
+        with redirect_stdout(StringIO()) as fp:
+            code = self.app.main(
+                'list_samples_by_customer customer1 limit=0'.split())
+        self.assertEqual(self.app.EXIT_FAILURE, code)
+        self.assertTrue(fp.getvalue().startswith('Invalid page: limit=0'))
+
+
+if __name__ == '__main__':
+    unittest.main()
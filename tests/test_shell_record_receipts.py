@@ -0,0 +1,127 @@
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from string import Template
+
+from pylims import config
+from pylims import shell
+from pylims.dba import DataSet
+from pylims.process import Process
+from pylims.lab import Sample, SampleTube
+
+
+class ShellTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.dataset = DataSet(config.test_database)  # To reset the database.
+        cls.app = shell.Shell(Process(cls.dataset))  # The application instance.
+
+    def setUp(self):
+        self.dataset._reset_tables()  # reset test_db tables and sequences.
+
+    def _write(self, text):
+        fd, filename = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(fd, 'w') as fp:
+            fp.write(text)
+        self.addCleanup(os.remove, filename)
+        return filename
+
+    def test_recorded_samples(self):
+        filename = self._write("customer_sample_name,tube_barcode\n"
+                               "customer1-sample1,NT00001\n"
+                               "\n"
+                               "customer1-sample2,NT00002\n")
+        with redirect_stdout(StringIO()) as fp:
+            args = ['record_receipts', filename]
+            code = self.app.main(args)
+        actual = fp.getvalue().strip()
+
+        expected = []
+        for i in (1, 2):
+            sample = Sample('customer1', 'sample%d' % i, i)
+            tube = SampleTube('NT0000%d' % i, sample)
+            expected.append(self._render(shell.RECORDED_SAMPLE_TEMP,
+                                         dict(tube=tube)))
+        expected.append((shell.BATCH_SUMMARY_TEMP % (2, 2, 0)).strip())
+        expected = '\n\n'.join(expected)
+
+        self.assertEqual(code, self.app.EXIT_SUCCESS)
+        self.assertMultiLineEqual(expected, actual)
+
+    def test_tab_separated_with_failures(self):
+        filename = self._write("customer1-sample1\tNT00001\n"
+                               "customer1\tNT00002\n")
+        with redirect_stdout(StringIO()) as fp:
+            args = ['record_receipts', filename]
+            code = self.app.main(args)
+        actual = fp.getvalue().strip()
+
+        expected = (shell.BATCH_SUMMARY_TEMP % (2, 1, 1)).strip()
+        self.assertEqual(code, self.app.EXIT_FAILURE)
+        self.assertTrue(actual.endswith(expected))
+        self.assertIn('Invalid customer sample name: customer1', actual)
+
+    def test_cannot_read_file(self):
+        filename = os.path.join(tempfile.gettempdir(), 'no_such_manifest.csv')
+        with redirect_stdout(StringIO()) as fp:
+            args = ['record_receipts', filename]
+            code = self.app.main(args)
+        actual = fp.getvalue().strip()
+
+        expected = (shell.CANNOT_READ_FILE_TEMP % filename).strip()
+        self.assertEqual(code, self.app.EXIT_FAILURE)
+        self.assertMultiLineEqual(expected, actual)
+
+    def test_profile(self):
+        profiles = []
+        use_profile = self.dataset.use_profile
+
+        def record(name):
+            profiles.append(name)
+            return use_profile(name)
+
+        self.dataset.use_profile = record
+        self.addCleanup(delattr, self.dataset, 'use_profile')
+        filename = self._write("customer1-sample1,NT00001\n")
+        with redirect_stdout(StringIO()):
+            self.app.main(['record_receipts', filename])
+
+        self.assertEqual(['bulk_import'], profiles)
+
+    def test_byte_order_mark(self):
+        # Excel saves "CSV UTF-8" files with a byte order mark.
+        fd, filename = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(fd, 'wb') as fp:
+            fp.write(b"\xef\xbb\xbfcustomer_sample_name,tube_barcode\n"
+                     b"customer1-sample1,NT00001\n")
+        self.addCleanup(os.remove, filename)
+        with redirect_stdout(StringIO()) as fp:
+            code = self.app.main(['record_receipts', filename])
+        actual = fp.getvalue().strip()
+
+        self.assertEqual(code, self.app.EXIT_SUCCESS)
+        self.assertTrue(actual.endswith(
+            (shell.BATCH_SUMMARY_TEMP % (1, 1, 0)).strip()))
+
+    def test_cannot_parse_file(self):
+        fd, filename = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(fd, 'wb') as fp:
+            fp.write(b"customer1-sample1,NT00001\ncustomer1-\xff,NT00002\n")
+        self.addCleanup(os.remove, filename)
+        too_long = self._write("customer1-%s,NT00003\n" % ('x' * 200000))
+
+        for name in (filename, too_long):
+            with redirect_stdout(StringIO()) as fp:
+                code = self.app.main(['record_receipts', name])
+            actual = fp.getvalue().strip()
+
+            expected = (shell.CANNOT_PARSE_FILE_TEMP % name).strip()
+            self.assertEqual(code, self.app.EXIT_FAILURE)
+            self.assertMultiLineEqual(expected, actual)
+        self.assertIsNone(self.dataset.find_tube_by_barcode('NT00001'))
+
+    def _render(self, temp, data):
+        return Template(temp).safe_substitute(data).strip()
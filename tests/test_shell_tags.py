@@ -0,0 +1,68 @@
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from string import Template
+
+from pylims import config
+from pylims import shell
+from pylims.dba import DataSet
+from pylims.process import Process
+from pylims.lab import Sample
+
+
+class ShellTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.dataset = DataSet(config.test_database)  # To reset the database.
+        cls.app = shell.Shell(Process(cls.dataset))  # The application instance.
+
+    def setUp(self):
+        self.dataset._reset_tables()  # reset test_db tables and sequences.
+
+    def _write(self, text):
+        fd, filename = tempfile.mkstemp(suffix='.tsv')
+        with os.fdopen(fd, 'w') as fp:
+            fp.write(text)
+        self.addCleanup(os.remove, filename)
+        return filename
+
+    def test_tagged_samples(self):
+        with redirect_stdout(StringIO()):
+            args = 'record_receipt customer1-sample1 NT00001'.split()
+            self.app.main(args)
+        filename = self._write("sample_id\ttag\n1\tACGT\n")
+        with redirect_stdout(StringIO()) as fp:
+            args = ['tags', filename]
+            code = self.app.main(args)
+        actual = fp.getvalue().strip()
+
+        sample = Sample('customer1', 'sample1', 1, 'ACGT')
+        expected = [
+            self._render(shell.TAGGED_SAMPLE_TEMP, dict(sample=sample)),
+            (shell.BATCH_SUMMARY_TEMP % (1, 1, 0)).strip()]
+        expected = '\n\n'.join(expected)
+
+        self.assertEqual(code, self.app.EXIT_SUCCESS)
+        self.assertMultiLineEqual(expected, actual)
+
+    def test_profile(self):
+        profiles = []
+        use_profile = self.dataset.use_profile
+
+        def record(name):
+            profiles.append(name)
+            return use_profile(name)
+
+        self.dataset.use_profile = record
+        self.addCleanup(delattr, self.dataset, 'use_profile')
+        filename = self._write("1\tACGT\n")
+        with redirect_stdout(StringIO()):
+            self.app.main(['tags', filename])
+
+        self.assertEqual([], profiles)
+
+    def _render(self, temp, data):
+        return Template(temp).safe_substitute(data).strip()
@@ -0,0 +1,52 @@
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from string import Template
+
+from pylims import config
+from pylims import shell
+from pylims.dba import DataSet
+from pylims.process import Process
+
+
+class ShellTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.dataset = DataSet(config.test_database)  # To reset the database.
+        cls.app = shell.Shell(Process(cls.dataset))  # The application instance.
+
+    def setUp(self):
+        self.dataset._reset_tables()  # reset test_db tables and sequences.
+
+    def _write(self, text):
+        fd, filename = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(fd, 'w') as fp:
+            fp.write(text)
+        self.addCleanup(os.remove, filename)
+        return filename
+
+    def test_chained_transfer(self):
+        with redirect_stdout(StringIO()):
+            args = 'record_receipt customer1-sample1 NT00001'.split()
+            self.app.main(args)
+        filename = self._write("NT00001,NT00002\nNT00002,NT00003\n")
+        with redirect_stdout(StringIO()) as fp:
+            args = ['tube_transfers', filename]
+            code = self.app.main(args)
+        actual = fp.getvalue().strip()
+
+        expected = [
+            self._render(shell.CHAINED_TRANSFER_TEMP,
+                         dict(source_tube_barcode='NT00002')),
+            (shell.BATCH_SUMMARY_TEMP % (2, 1, 1)).strip()]
+        expected = '\n\n'.join(expected)
+
+        self.assertEqual(code, self.app.EXIT_FAILURE)
+        self.assertTrue(actual.startswith('Moved sample successfully'))
+        self.assertTrue(actual.endswith(expected))
+
+    def _render(self, temp, data):
+        return Template(temp).safe_substitute(data).strip()
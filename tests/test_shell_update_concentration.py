@@ -59,7 +59,22 @@ class ShellTest(unittest.TestCase):
         self.assertEqual(code, self.app.EXIT_FAILURE)
         self.assertMultiLineEqual(expected, actual)
 
-    # TODO: Add validation test
+    def test_invalid_concentration(self):
+        with redirect_stdout(StringIO()) as fp:
+            args = 'update_concentration 1 300'.split()
+            code = self.app.main(args)
+        """
+        Invalid concentration value: 300
+        The value must be between 50 and 200 inclusive.
+        """
+        actual = fp.getvalue().strip()
+        # print('\n' + actual)
+        temp = shell.INVALID_SAMPLE_CONCENTRATION_TEMP
+        data = dict(concentration='300')
+        expected = self._render(temp, data)
+
+        self.assertEqual(code, self.app.EXIT_FAILURE)
+        self.assertMultiLineEqual(expected, actual)
 
     def _render(self, temp, data):
         return Template(temp).safe_substitute(data).strip()
\ No newline at end of file
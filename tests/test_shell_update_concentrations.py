@@ -0,0 +1,95 @@
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from string import Template
+
+from pylims import config
+from pylims import shell
+from pylims.dba import DataSet
+from pylims.process import Process
+from pylims.lab import Sample
+
+
+class ShellTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.dataset = DataSet(config.test_database)  # To reset the database.
+        cls.app = shell.Shell(Process(cls.dataset))  # The application instance.
+
+    def setUp(self):
+        self.dataset._reset_tables()  # reset test_db tables and sequences.
+        with redirect_stdout(StringIO()):
+            self.app.main('record_receipt customer1-sample1 NT00001'.split())
+            self.app.main('add_to_plate 1 DN12345 A1'.split())
+
+    def _write(self, text):
+        fd, filename = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(fd, 'w') as fp:
+            fp.write(text)
+        self.addCleanup(os.remove, filename)
+        return filename
+
+    def test_updated_concentrations(self):
+        filename = self._write("well_position,concentration\nA1,150\n")
+        with redirect_stdout(StringIO()) as fp:
+            args = ['update_concentrations', 'DN12345', filename]
+            code = self.app.main(args)
+        actual = fp.getvalue().strip()
+
+        sample = Sample('customer1', 'sample1', 1, concentration=150)
+        expected = [
+            self._render(shell.UPDATED_SAMPLE_CONCENTRATION_TEMP,
+                         dict(sample=sample)),
+            (shell.BATCH_SUMMARY_TEMP % (1, 1, 0)).strip()]
+        expected = '\n\n'.join(expected)
+
+        self.assertEqual(code, self.app.EXIT_SUCCESS)
+        self.assertMultiLineEqual(expected, actual)
+        rows = self.dataset.iter_sample_locations()
+        self.assertEqual({150}, set(x[4] for x in rows))
+
+    def test_invalid_concentration(self):
+        filename = self._write("A1,500\n")
+        with redirect_stdout(StringIO()) as fp:
+            args = ['update_concentrations', 'DN12345', filename]
+            code = self.app.main(args)
+        actual = fp.getvalue().strip()
+
+        expected = [
+            self._render(shell.INVALID_SAMPLE_CONCENTRATION_TEMP,
+                         dict(concentration='500')),
+            (shell.BATCH_SUMMARY_TEMP % (1, 0, 1)).strip()]
+        expected = '\n\n'.join(expected)
+
+        self.assertEqual(code, self.app.EXIT_FAILURE)
+        self.assertMultiLineEqual(expected, actual)
+        rows = self.dataset.iter_sample_locations()
+        self.assertEqual({None}, set(x[4] for x in rows))
+
+    def test_empty_well(self):
+        # No sample in the well, so no sample to update.
+        filename = self._write("B1,100\n")
+        with redirect_stdout(StringIO()) as fp:
+            args = ['update_concentrations', 'DN12345', filename]
+            code = self.app.main(args)
+        actual = fp.getvalue().strip()
+
+        expected = [
+            self._render(shell.EMPTY_WELL_TEMP,
+                         dict(plate_barcode='DN12345', plate_grid='8x12',
+                              well_position='B1')),
+            (shell.BATCH_SUMMARY_TEMP % (1, 0, 1)).strip()]
+        expected = '\n\n'.join(expected)
+
+        self.assertEqual(code, self.app.EXIT_FAILURE)
+        self.assertMultiLineEqual(expected, actual)
+
+    def _render(self, temp, data):
+        return Template(temp).safe_substitute(data).strip()
+
+
+if __name__ == '__main__':
+    unittest.main()
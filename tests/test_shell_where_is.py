@@ -0,0 +1,48 @@
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+from pylims import config
+from pylims import shell
+from pylims.dba import DataSet
+from pylims.process import Process
+
+
+class ShellTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.dataset = DataSet(config.test_database)  # To reset the database.
+        cls.app = shell.Shell(Process(cls.dataset))  # The application instance.
+
+    def setUp(self):
+        self.dataset._reset_tables()  # reset test_db tables and sequences.
+
+    def test_sample_not_found(self):
+        with redirect_stdout(StringIO()) as fp:
+            code = self.app.main('where_is 1'.split())
+        self.assertEqual(self.app.EXIT_FAILURE, code)
+        self.assertEqual('Sample not found: 1', fp.getvalue().strip())
+
+    def test_found_sample_containers(self):
+        with redirect_stdout(StringIO()):
+            self.app.main('record_receipt customer1-sample1 NT00001'.split())
+            self.app.main('add_to_plate 1 DN00001 A1'.split())
+        with redirect_stdout(StringIO()) as fp:
+            code = self.app.main('where_is 1'.split())
+        actual = fp.getvalue().strip()
+        expected = '\n'.join([
+            'Found sample containers',
+            'Sample: Sample Id: 1, Customer sample name: customer1-sample1',
+            'Sample tube: Barcode: NT00001, Sample Id: 1, '
+            'Customer sample name: customer1-sample1',
+            'Plate: Barcode: DN00001, Grid: 8x12',
+        ])
+
+        self.assertEqual(self.app.EXIT_SUCCESS, code)
+        self.assertTrue(actual.startswith(expected), actual)
+        self.assertIn('A1', actual.splitlines()[-1])
+
+
+if __name__ == '__main__':
+    unittest.main()